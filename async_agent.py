@@ -0,0 +1,198 @@
+"""Asyncio-native variant of SimpleAIAgent"""
+from cache import MISSING, normalize_key
+from gazetteer import UnknownPlace
+from main import NEWS_DEADLINE, NEWS_PER_TOPIC, SimpleAIAgent
+from metrics import EXCEPTION, UPSTREAM_ERROR, last_outcome
+from quota import QuotaExceededError
+from resilience import CircuitOpenError
+from transport import AsyncHTTPTransport
+
+
+class AsyncSimpleAIAgent(SimpleAIAgent):
+    """SimpleAIAgent whose upstream calls run on an asyncio event loop
+
+    Intent detection, extraction and formatting are inherited, so every
+    *_async method returns exactly what its synchronous twin would.
+    """
+
+    def __init__(self, async_transport=None, **kwargs):
+        super().__init__(**kwargs)
+        # Share breakers with the sync transport so both see one upstream health
+        self.async_transport = async_transport or AsyncHTTPTransport(
+            resilience=self.transport.resilience)
+
+    async def get_weather_async(self, location):
+        """Fetch weather data without blocking the event loop"""
+        if isinstance(location, UnknownPlace):
+            return self._unknown_place(location)
+        key = normalize_key(location)
+        report, fresh = self.weather_cache.lookup(key)
+        if report is MISSING:
+            try:
+                report = await self.singleflight.do_async(
+                    ("weather", key), lambda: self._fetch_weather_async(location, key))
+            except QuotaExceededError:
+                report = self.weather_cache.get_stale(key)
+                if report is MISSING:
+                    self.metrics.count("weather", UPSTREAM_ERROR)
+                    return "Weather lookups are paused to stay within the API quota. Please try again shortly."
+            except CircuitOpenError:
+                self.metrics.count("weather", UPSTREAM_ERROR)
+                return "Weather service is currently unavailable"
+            except Exception:
+                self.metrics.count("weather", EXCEPTION)
+                return "Weather service is currently unavailable"
+        elif not fresh:
+            # Refreshes run on the shared background pool, off the event loop
+            self._refresh_weather(key)
+        return self._answer_weather(location, report)
+
+    async def _fetch_weather_async(self, location, key):
+        """Call OpenWeather and cache its answer"""
+        await self.quota.acquire_async(self.weather_api_key, "weather")
+        with self.metrics.timer("upstream"):
+            response = await self.async_transport.get(self._weather_url(location))
+        with self.metrics.timer("decode"):
+            data = self._decoder("weather").decode(response.content)
+        return self._store_weather(key, response.status_code, data)
+
+    async def get_forecast_async(self, location):
+        """Fetch a daily forecast summary without blocking the event loop"""
+        if isinstance(location, UnknownPlace):
+            return self._unknown_place(location, "forecast")
+        key = normalize_key(location)
+        report, fresh = self.forecast_cache.lookup(key)
+        if report is MISSING:
+            try:
+                report = await self.singleflight.do_async(
+                    ("forecast", key), lambda: self._fetch_forecast_async(location, key))
+            except QuotaExceededError:
+                report = self.forecast_cache.get_stale(key)
+                if report is MISSING:
+                    self.metrics.count("forecast", UPSTREAM_ERROR)
+                    return "Forecast lookups are paused to stay within the API quota. Please try again shortly."
+            except CircuitOpenError:
+                self.metrics.count("forecast", UPSTREAM_ERROR)
+                return "Forecast service is currently unavailable"
+            except Exception:
+                self.metrics.count("forecast", EXCEPTION)
+                return "Forecast service is currently unavailable"
+        elif not fresh:
+            self._refresh_forecast(key)
+        return self._answer_forecast(location, report)
+
+    async def _fetch_forecast_async(self, location, key):
+        """Call the forecast endpoint and cache its daily summary"""
+        await self.quota.acquire_async(self.weather_api_key, "weather")
+        with self.metrics.timer("upstream"):
+            response = await self.async_transport.get(self._forecast_url(location))
+        with self.metrics.timer("decode"):
+            data = self._decoder("forecast").decode(response.content)
+        return self._store_forecasts([(key, response.status_code, data)])[0]
+
+    async def get_news_async(self, topic):
+        """Fetch news headlines without blocking the event loop"""
+        key = normalize_key(topic)
+        report, fresh = self.news_cache.lookup(key)
+        if report is MISSING:
+            try:
+                report = await self.singleflight.do_async(
+                    ("news", key), lambda: self._fetch_news_async(topic, key))
+            except QuotaExceededError:
+                report = self.news_cache.get_stale(key)
+                if report is MISSING:
+                    self.metrics.count("news", UPSTREAM_ERROR)
+                    return "News lookups are paused to stay within the API quota. Please try again later."
+            except CircuitOpenError:
+                self.metrics.count("news", UPSTREAM_ERROR)
+                return "News service is currently unavailable"
+            except Exception as e:
+                self.metrics.count("news", EXCEPTION)
+                return f"News service error: {str(e)}"
+        elif not fresh:
+            self._refresh_news(key)
+        return self._answer_news(topic, report)
+
+    async def get_news_many_async(self, topics, deadline=NEWS_DEADLINE, per_topic=NEWS_PER_TOPIC):
+        """Async counterpart of get_news_many, the fetches running as tasks"""
+        import asyncio
+
+        reports, pending = self._cached_news(topics)
+        if pending:
+            tasks = {
+                asyncio.ensure_future(self.singleflight.do_async(
+                    ("news", key), lambda topic=topic, key=key: self._fetch_news_async(topic, key))): topic
+                for topic, key in pending.items()
+            }
+            done, late = await asyncio.wait(tasks, timeout=deadline)
+            # Cancelling a waiter leaves the shielded fetch running to fill the cache
+            for task in late:
+                task.cancel()
+            for task in done:
+                if task.exception() is None:
+                    reports[tasks[task]] = task.result()
+        return self._answer_news_many(topics, reports, per_topic)
+
+    async def _fetch_news_async(self, topic, key):
+        """Call NewsAPI and cache its answer"""
+        await self.quota.acquire_async(self.news_api_key, "news")
+        with self.metrics.timer("upstream"):
+            response = await self.async_transport.get(self._news_url(topic), verify=False)
+        with self.metrics.timer("decode"):
+            data = self._decode_news(response)
+        return self._store_news(key, response.status_code, data)
+
+    async def execute_action_async(self, intent, data):
+        """Execute the determined action, awaiting upstream calls"""
+        if intent == "weather":
+            with self.metrics.timer("execute"):
+                return await self.get_weather_async(data)
+        elif intent == "trend" and not isinstance(data, UnknownPlace):
+            with self.metrics.timer("execute"):
+                return self._answer_trend(data, await self.get_weather_async(data))
+        elif intent == "forecast":
+            with self.metrics.timer("execute"):
+                return await self.get_forecast_async(data)
+        elif intent == "news" and isinstance(data, tuple):
+            with self.metrics.timer("execute"):
+                return await self.get_news_many_async(data)
+        elif intent == "news":
+            with self.metrics.timer("execute"):
+                return await self.get_news_async(data)
+        # Everything else is local and cheap, so reuse the sync dispatch
+        return self.execute_action(intent, data)
+
+    async def respond_async(self, user_input):
+        """Async counterpart of respond()"""
+        return (await self.respond_with_intent_async(user_input))[1]
+
+    async def respond_with_intent_async(self, user_input):
+        """Async counterpart of respond_with_intent()"""
+        if self.verbose:
+            print(f"User: {user_input}")
+
+        key = self.response_cache.key(user_input)
+        answer = self._memoized(key)
+        if answer is MISSING:
+            intent, data = self.process_input(user_input)
+            if self.verbose:
+                print(f"Agent thinking: Intent='{intent}', Data='{data}'")
+
+            last_outcome.set(None)
+            answer = intent, await self.execute_action_async(intent, data)
+            self._memoize(key, data, answer)
+
+        if self.verbose:
+            print(f"Agent: {answer[1]}")
+        return answer
+
+    async def aclose(self):
+        """Release pooled connections on both transports"""
+        await self.async_transport.close()
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
@@ -0,0 +1,85 @@
+"""Batch mode: stream JSONL prompts through the agent"""
+import json
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def read_prompts(lines):
+    """Yield (line_number, record) for each non-blank JSONL line
+
+    A line may be a JSON string or an object with a "prompt" key; any other
+    keys (e.g. "id") are echoed back in the result. Bad lines become records
+    with an "error" key so they still produce exactly one output line.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, {"error": f"invalid JSON: {e}"}
+            continue
+        if isinstance(record, str):
+            record = {"prompt": record}
+        if not isinstance(record, dict) or not isinstance(record.get("prompt"), str):
+            yield number, {"error": "expected a string or an object with a 'prompt' string"}
+            continue
+        yield number, record
+
+
+def answer(agent, number, record):
+    """Run one record through the agent, response cache included"""
+    result = dict(record)
+    result["line"] = number
+    if "error" in record:
+        return result
+    try:
+        result["intent"], result["response"] = agent.respond_with_intent(record["prompt"])
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def run_batch(agent, lines, out, workers=8, order="input"):
+    """Answer every prompt in lines, writing one JSON result per line to out
+
+    At most 2 * workers prompts are in flight (workers below 1 count as 1),
+    so memory stays flat however long the input is. order="input" writes results in input order;
+    order="completion" writes each result as soon as it is ready. Returns the
+    number of results written.
+    """
+    if order not in ("input", "completion"):
+        raise ValueError(f"order must be 'input' or 'completion', not {order!r}")
+    workers = max(1, workers)
+    window = workers * 2
+    written = 0
+
+    def write(future):
+        nonlocal written
+        out.write(json.dumps(future.result(), ensure_ascii=False) + "\n")
+        out.flush()
+        written += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if order == "input":
+            pending = deque()
+            for number, record in read_prompts(lines):
+                pending.append(pool.submit(answer, agent, number, record))
+                if len(pending) >= window:
+                    write(pending.popleft())
+            while pending:
+                write(pending.popleft())
+        else:
+            pending = set()
+            for number, record in read_prompts(lines):
+                pending.add(pool.submit(answer, agent, number, record))
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(future)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future)
+    return written
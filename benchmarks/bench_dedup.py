@@ -0,0 +1,77 @@
+"""Headline dedup at scale: MinHash/LSH versus naive pairwise comparison
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dedup --headlines 5000
+
+Headlines are generated as stories with syndicated variants (a source tag,
+an inserted or dropped word). The naive baseline compares every headline
+with every one kept before it; MinHashDeduper only checks the headlines it
+shares an LSH bucket with. Both keep the first of each near-duplicate
+group, so the kept counts should agree up to LSH misses.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from dedup import MinHashDeduper, pairwise_keep
+
+SOURCES = ["Reuters", "AP News", "BBC News", "CNN", "The Verge", "Bloomberg", "Financial Times"]
+FILLER = ["new", "report", "says", "after", "amid", "latest", "officials", "update"]
+
+
+def make_headlines(count, variants=4, seed=1):
+    """Return count headlines, about one story per variants headlines, shuffled"""
+    rng = random.Random(seed)
+    words = [f"w{n}" for n in range(5000)]
+    headlines = []
+    while len(headlines) < count:
+        story = rng.sample(words, rng.randint(7, 12))
+        for _ in range(rng.randint(1, 2 * variants - 1)):
+            variant = list(story)
+            edit = rng.random()
+            if edit < 0.3:
+                variant.insert(rng.randrange(len(variant) + 1), rng.choice(FILLER))
+            elif edit < 0.5:
+                del variant[rng.randrange(len(variant))]
+            title = " ".join(variant).capitalize()
+            if rng.random() < 0.7:
+                title += f" - {rng.choice(SOURCES)}"
+            headlines.append(title)
+    headlines = headlines[:count]
+    rng.shuffle(headlines)
+    return headlines
+
+
+def timed_ms(fn, repeat):
+    """Median milliseconds fn() takes over repeat runs, and its last result"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--headlines", type=int, default=5000)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    titles = make_headlines(args.headlines)
+    deduper = MinHashDeduper(args.threshold)
+    lsh_ms, lsh = timed_ms(lambda: deduper.keep(titles), args.repeat)
+    naive_ms, naive = timed_ms(lambda: pairwise_keep(titles, args.threshold), 1)
+    print(f"{len(titles)} headlines, threshold {args.threshold}, "
+          f"{deduper.bands} bands x {deduper.rows} rows")
+    print(f"{'method':<10}{'kept':>8}{'ms':>12}")
+    print(f"{'minhash':<10}{len(lsh):>8}{lsh_ms:>12.1f}")
+    print(f"{'pairwise':<10}{len(naive):>8}{naive_ms:>12.1f}  ({naive_ms / lsh_ms:.0f}x slower)")
+    print(f"agreement {len(set(lsh) & set(naive)) / len(set(lsh) | set(naive)):.3f}")
+
+
+if __name__ == "__main__":
+    main()
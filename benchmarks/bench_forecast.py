@@ -0,0 +1,77 @@
+"""Forecast aggregation for many cities: vectorized versus a per-city loop
+
+Run from the repository root:
+
+    python -m benchmarks.bench_forecast --cities 1000
+
+Every city gets a stub 5-day/3-hour forecast (40 slots) in a random
+timezone. forecast.summarize_many reduces them all in one call; the
+baseline walks each city's slots in Python, grouping by local day with
+dicts and Counter.
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from forecast import summarize_many
+from stub_server import forecast_payload
+
+
+def timed_ms(fn, repeat):
+    """Median milliseconds fn() takes over repeat runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def naive_summaries(forecasts):
+    """Daily low/high/dominant condition per city, one slot at a time"""
+    summaries = []
+    for data in forecasts:
+        offset = data["city"]["timezone"]
+        days = {}
+        for slot in data["list"]:
+            date = datetime.fromtimestamp(slot["dt"] + offset, timezone.utc).date().isoformat()
+            day = days.setdefault(date, {"low": slot["main"]["temp_min"], "high": slot["main"]["temp_max"],
+                                         "codes": Counter()})
+            day["low"] = min(day["low"], slot["main"]["temp_min"])
+            day["high"] = max(day["high"], slot["main"]["temp_max"])
+            day["codes"][slot["weather"][0]["id"]] += 1
+        summaries.append([
+            {"date": date, "low": day["low"], "high": day["high"],
+             "condition": min(day["codes"], key=lambda c: (-day["codes"][c], c))}
+            for date, day in sorted(days.items())
+        ])
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cities", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    start = 1_700_000_000 - 1_700_000_000 % 10800
+    forecasts = []
+    for city in range(args.cities):
+        data = forecast_payload(f"city-{city}", rng, start)
+        data["city"]["timezone"] = rng.randrange(-12, 15) * 3600
+        forecasts.append(data)
+
+    slots = sum(len(data["list"]) for data in forecasts)
+    vectorized = timed_ms(lambda: summarize_many(forecasts), args.repeat)
+    naive = timed_ms(lambda: naive_summaries(forecasts), args.repeat)
+    print(f"{args.cities} cities, {slots} slots")
+    print(f"{'summarize_many':<16}{vectorized:>10.2f} ms")
+    print(f"{'per-city loop':<16}{naive:>10.2f} ms  ({naive / vectorized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Weather history at scale: memory and query time for 10k+ cities
+
+Run from the repository root:
+
+    python -m benchmarks.bench_history --cities 10000 --capacity 288
+
+Every city gets a full ring of observations (a day at five-minute
+intervals by default). The same data is also kept the obvious way, as a
+list of dicts per city, to show what the ring buffers save in memory and
+what the vectorized queries save in time.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from history import DAY, WeatherHistory
+
+
+def timed_ms(fn, repeat):
+    """Median milliseconds fn() takes over repeat runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def dict_bytes(records):
+    """Approximate size of a list of observation dicts"""
+    sample = records[0]
+    per_record = sys.getsizeof(sample) + sum(sys.getsizeof(value) for value in sample.values())
+    return sys.getsizeof(records) + len(records) * per_record
+
+
+def naive_stats_all(lists, since):
+    """All-city min/max/mean the list-of-dicts way"""
+    summary = {}
+    for city, records in lists.items():
+        temps = [r["temp"] for r in records if r["time"] >= since]
+        if temps:
+            summary[city] = (min(temps), max(temps), sum(temps) / len(temps))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cities", type=int, default=10_000)
+    parser.add_argument("--capacity", type=int, default=288, help="observations kept per city")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    now = 1_700_000_000.0
+    times = now - (DAY / args.capacity) * np.arange(args.capacity)[::-1]
+    history = WeatherHistory(capacity=args.capacity)
+    lists = {}
+    start = time.perf_counter()
+    for city in range(args.cities):
+        temps = rng.normal(15, 8) + rng.normal(0, 1, args.capacity).cumsum() * 0.1
+        humidity = rng.uniform(20, 100, args.capacity)
+        history.extend(f"city-{city}", times, temps, humidity, np.full(args.capacity, 800))
+        lists[f"city-{city}"] = [
+            {"time": t, "temp": v, "humidity": h, "condition": 800}
+            for t, v, h in zip(times.tolist(), temps.tolist(), humidity.tolist())
+        ]
+    load_s = time.perf_counter() - start
+    list_bytes = sum(dict_bytes(records) for records in lists.values())
+
+    since = now - DAY / 4
+    print(f"{args.cities} cities x {args.capacity} observations (loaded in {load_s:.1f}s)")
+    print(f"ring buffers  {history.nbytes / 2**20:>8.1f} MiB")
+    print(f"list of dicts {list_bytes / 2**20:>8.1f} MiB")
+    rows = [
+        ("stats_all, last 6h", timed_ms(lambda: history.stats_all(since=since), args.repeat),
+         timed_ms(lambda: naive_stats_all(lists, since), args.repeat)),
+        ("stats, one city", timed_ms(lambda: history.stats("city-42", since=since), args.repeat * 20), None),
+        ("moving_average, one city",
+         timed_ms(lambda: history.moving_average("city-42", 3600), args.repeat * 20), None),
+        ("at, one city", timed_ms(lambda: history.at("city-42", now - DAY / 2), args.repeat * 20), None),
+    ]
+    print(f"{'query':<26}{'ring ms':>10}{'lists ms':>10}")
+    for name, ring_ms, list_ms in rows:
+        print(f"{name:<26}{ring_ms:>10.3f}{'' if list_ms is None else f'{list_ms:10.1f}':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Intent detection throughput: precompiled matcher vs the any() chain
+
+Run from the repository root:
+
+    python -m benchmarks.bench_intents --prompts 200000
+"""
+import argparse
+import random
+import time
+
+from intents import DEFAULT_INTENTS, IntentMatcher
+
+TEMPLATES = [
+    "what's the weather in {city}",
+    "temperature for {city} tomorrow",
+    "latest news about {topic}",
+    "headlines on {topic}",
+    "what time is it",
+    "calculate {a} + {b}",
+    "{a} * {b}",
+    "hello there",
+    "what can you do",
+    "tell me something about {topic} and {city}",
+    "i would like to plan a long trip to {city} with friends",
+]
+CITIES = ["paris", "tokyo", "berlin", "houston", "sao paulo", "chicago", "new york"]
+TOPICS = ["rust", "python", "ai", "sports", "elections", "markets", "space"]
+
+
+def legacy_match(text, intents=DEFAULT_INTENTS):
+    """The pre-matcher implementation: one any() scan per intent"""
+    for name, words in intents:
+        if any(word in text for word in [*words]):
+            return name
+    return None
+
+
+def build_corpus(count, seed=42):
+    """Generate count lowercase prompts from the templates"""
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(
+            city=rng.choice(CITIES), topic=rng.choice(TOPICS),
+            a=rng.randint(1, 999), b=rng.randint(1, 999),
+        )
+        for _ in range(count)
+    ]
+
+
+def throughput(match, corpus):
+    """Return prompts per second for match over corpus"""
+    start = time.perf_counter()
+    for text in corpus:
+        match(text)
+    return len(corpus) / (time.perf_counter() - start)
+
+
+def report(label, intents, corpus):
+    """Benchmark both implementations with the given intent table"""
+    # Without qualifiers, so both sides implement the same rules
+    matcher = IntentMatcher(intents, qualifiers={})
+    mismatches = sum(matcher.match(t) != legacy_match(t, intents) for t in corpus[:10000])
+    legacy = throughput(lambda t: legacy_match(t, intents), corpus)
+    compiled = throughput(matcher.match, corpus)
+    keywords = sum(len(words) for _, words in intents)
+    print(f"{label} ({keywords} keywords)")
+    print(f"  any() chain   {legacy:>12,.0f} prompts/s")
+    print(f"  compiled      {compiled:>12,.0f} prompts/s  ({compiled / legacy:.2f}x)")
+    print(f"  mismatches in first 10k prompts: {mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=200000)
+    parser.add_argument("--extra-intents", type=int, default=20,
+                        help="synthetic plugin intents for the scaling run")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.prompts)
+    report("built-in intents", DEFAULT_INTENTS, corpus)
+
+    rng = random.Random(7)
+    extra = tuple(
+        (f"plugin{i}", tuple("".join(rng.choice("bdfjkqvxz") for _ in range(6)) for _ in range(10)))
+        for i in range(args.extra_intents)
+    )
+    report(f"with {args.extra_intents} plugin intents", DEFAULT_INTENTS + extra, corpus)
+
+
+if __name__ == "__main__":
+    main()
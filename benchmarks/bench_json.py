@@ -0,0 +1,53 @@
+"""Decode time per JSON backend for the fields the agent reads
+
+Run from the repository root:
+
+    python -m benchmarks.bench_json --articles 100 --padding 500
+
+Every installed backend (msgspec, orjson, json) decodes the same weather
+and news bodies the stub serves down to the agent's schema; a plain
+json.loads of the whole body, what the agent used to do, is the reference.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from jsonbackend import BACKENDS, NEWS, WEATHER, Decoder
+from stub_server import news_payload, weather_payload
+
+
+def decode_us(decoder, body, repeat):
+    """Median microseconds decoder.decode(body) (or .loads) takes over repeat runs"""
+    decode = getattr(decoder, "decode", None) or decoder.loads
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(body)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--padding", type=int, default=500, help="characters of content per article")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    bodies = {
+        "weather": (json.dumps(weather_payload("London", random.Random(1))).encode(), WEATHER),
+        "news": (json.dumps(news_payload("python", args.articles, args.padding)).encode(), NEWS),
+    }
+    print(f"{'body':<10}{'bytes':>9}{'decoder':>14}{'us':>10}{'speedup':>9}")
+    for name, (body, schema) in bodies.items():
+        reference = decode_us(json, body, args.repeat)
+        rows = [("json.loads", reference)]
+        rows += [(backend, decode_us(Decoder(schema, backend), body, args.repeat)) for backend in BACKENDS]
+        for decoder, us in rows:
+            print(f"{name:<10}{len(body):>9}{decoder:>14}{us:>10.1f}{reference / us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
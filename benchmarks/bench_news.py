@@ -0,0 +1,63 @@
+"""Bytes transferred and decode time for full versus lean news fetches
+
+Run from the repository root:
+
+    python -m benchmarks.bench_news --articles 100 --padding 2000
+
+The full fetch asks the stub for every article and decodes the body with
+json.loads; the lean fetch asks for pageSize=5 and reads only the first
+five titles with newsparse.first_titles. The lean decoder is also timed on
+the full body, which is what a server that ignores pageSize would send.
+"""
+import argparse
+import json
+import statistics
+import time
+
+import requests
+
+from main import NEWS_TITLES
+from newsparse import first_titles
+from stub_server import Behavior, StubUpstream
+
+
+def decode_ms(decode, body, repeat):
+    """Median milliseconds decode(body) takes over repeat runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(body)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=100, help="articles the stub has per topic")
+    parser.add_argument("--padding", type=int, default=2000, help="characters of content per article")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    behavior = Behavior(articles=args.articles, padding=args.padding)
+    with StubUpstream(behaviors={"news": behavior}) as upstream:
+        url = f"{upstream.base_url}/v2/everything?q=python&apiKey=bench&sortBy=popularity"
+        full = requests.get(url).content
+        lean = requests.get(f"{url}&pageSize={NEWS_TITLES}").content
+
+    assert first_titles(full, NEWS_TITLES) == [a["title"] for a in json.loads(full)["articles"][:NEWS_TITLES]]
+    runs = [
+        ("full body, json.loads", len(full), decode_ms(json.loads, full, args.repeat)),
+        ("full body, first_titles", len(full), decode_ms(lambda b: first_titles(b, NEWS_TITLES), full, args.repeat)),
+        ("pageSize, first_titles", len(lean), decode_ms(lambda b: first_titles(b, NEWS_TITLES), lean, args.repeat)),
+    ]
+    print(f"{args.articles} articles with {args.padding} characters of content each")
+    print(f"{'fetch':<26}{'bytes':>10}{'decode ms':>12}")
+    for name, size, ms in runs:
+        print(f"{name:<26}{size:>10}{ms:>12.4f}")
+    base_bytes, base_ms = runs[0][1], runs[0][2]
+    print(f"lean saves {base_bytes - len(lean)} bytes ({1 - len(lean) / base_bytes:.0%}) "
+          f"and {base_ms - runs[2][2]:.4f}ms of decoding per answer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""End-to-end respond() latency for a mixed workload against the stub upstream
+
+Run from the repository root:
+
+    python -m benchmarks.bench_respond --requests 5000 --concurrency 8 --output run.json
+    python -m benchmarks.bench_respond --baseline run.json --threshold 0.2
+
+Each prompt goes through SimpleAIAgent.respond; process_input and
+execute_action are timed as they are called from inside it, and respond
+is also broken down by intent. The response cache is off, so every prompt
+runs the pipeline; --response-cache adds a second run with it on and
+reports both. With --baseline the run exits non-zero when any stage's p95
+(or --metric) of the uncached run is more than --threshold slower than
+the stored run.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gazetteer import default_gazetteer
+from cache import ResponseCache
+from main import RESPONSE_TTLS, SimpleAIAgent
+from quota import QuotaManager
+from stub_server import Behavior, StubUpstream, fixed
+
+# intent -> (weight, prompt templates)
+WORKLOAD = {
+    "weather": (4, ["what's the weather in {city}", "temperature in {city}"]),
+    "news": (3, ["latest news about {topic}", "headlines on {topic}"]),
+    "time": (1, ["what time is it", "what's the time now"]),
+    "math": (1, ["{a} + {b}", "{a} * {b} - {b}"]),
+    "greeting": (1, ["hello there", "hey"]),
+}
+TOPICS = ["rust", "python", "ai", "sports", "elections", "markets", "space", "climate"]
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def build_workload(count, cities=10, seed=42):
+    """Return count (intent, prompt) pairs drawn by the WORKLOAD weights
+
+    Locations are the largest cities in the gazetteer; drawing from fewer
+    of them raises the cache hit ratio.
+    """
+    rng = random.Random(seed)
+    intents = list(WORKLOAD)
+    weights = [WORKLOAD[name][0] for name in intents]
+    places = [place.name for place in default_gazetteer().places if place.kind == "city"][:cities]
+    workload = []
+    for intent in rng.choices(intents, weights, k=count):
+        template = rng.choice(WORKLOAD[intent][1])
+        workload.append((intent, template.format(
+            city=rng.choice(places), topic=rng.choice(TOPICS),
+            a=rng.randint(1, 999), b=rng.randint(1, 999))))
+    return workload
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies, elapsed):
+    """Return count, throughput and latency percentiles (milliseconds)"""
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "throughput_rps": round(len(ordered) / elapsed, 1),
+        "mean_ms": round(sum(ordered) / len(ordered), 4),
+        "p50_ms": round(percentile(ordered, 0.50), 4),
+        "p95_ms": round(percentile(ordered, 0.95), 4),
+        "p99_ms": round(percentile(ordered, 0.99), 4),
+    }
+
+
+def _timed(fn, latencies):
+    """Wrap fn so each call's duration (ms) is appended to latencies"""
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            latencies.append((time.perf_counter() - start) * 1000)
+    return wrapper
+
+
+def run(workload, concurrency, base_url, response_cache=False):
+    """Drive respond() over workload and return per-stage summaries
+
+    Without response_cache no answer is memoized (no intent has a TTL),
+    so repeated prompts still run the pipeline.
+    """
+    stages = {"respond": [], "process_input": [], "execute_action": []}
+    by_intent = {intent: [] for intent in WORKLOAD}
+    cache = ResponseCache(RESPONSE_TTLS if response_cache else {})
+    with SimpleAIAgent(verbose=False, quota=QuotaManager(limits={}), response_cache=cache,
+                       weather_base_url=base_url, news_base_url=base_url) as agent:
+        agent.gazetteer  # load the place index before the clock starts
+        # respond() looks these up on the instance, so the wrappers see every call
+        agent.process_input = _timed(agent.process_input, stages["process_input"])
+        execute_action = agent.execute_action
+        agent.execute_action = _timed(execute_action, stages["execute_action"])
+        respond = _timed(agent.respond, stages["respond"])
+
+        def one(item):
+            intent, prompt = item
+            start = time.perf_counter()
+            respond(prompt)
+            by_intent[intent].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, workload))
+        elapsed = time.perf_counter() - start
+
+    results = {stage: summarize(latencies, elapsed) for stage, latencies in stages.items()}
+    results["by_intent"] = {
+        intent: summarize(latencies, elapsed) for intent, latencies in by_intent.items() if latencies
+    }
+    return results
+
+
+def regressions(results, baseline, threshold, metric="p95_ms", min_delta_ms=0.05):
+    """Return a message for every stage whose metric grew past threshold
+
+    Growth under min_delta_ms is ignored, so timer noise on stages that
+    take microseconds does not fail the check.
+    """
+    found = []
+    for stage in ("respond", "process_input", "execute_action"):
+        before, after = baseline["results"][stage][metric], results[stage][metric]
+        if after > before * (1 + threshold) and after - before > min_delta_ms:
+            growth = f" (+{after / before - 1:.0%})" if before else ""
+            found.append(f"{stage} {metric}: {before:.4f} -> {after:.4f}{growth}")
+    return found
+
+
+def print_table(results):
+    """Print one line per stage and per intent"""
+    rows = [(stage, results[stage]) for stage in ("respond", "process_input", "execute_action")]
+    rows += [(f"  {intent}", summary) for intent, summary in results["by_intent"].items()]
+    print(f"{'stage':<16}{'count':>7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in rows:
+        print(f"{name:<16}{s['count']:>7}{s['throughput_rps']:>10.0f}"
+              f"{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--cities", type=int, default=10,
+                        help="distinct locations (more means fewer cache hits)")
+    parser.add_argument("--upstream-latency", type=float, default=5.0, metavar="MS",
+                        help="fixed latency of every stub upstream answer")
+    parser.add_argument("--response-cache", action="store_true",
+                        help="also run with the response cache on and report both")
+    parser.add_argument("--output", metavar="FILE", help="save the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against a saved run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown over the baseline (0.2 = 20%%)")
+    parser.add_argument("--metric", choices=METRICS, default="p95_ms")
+    parser.add_argument("--min-delta", type=float, default=0.05, metavar="MS",
+                        help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    behavior = Behavior(latency=fixed(args.upstream_latency) if args.upstream_latency else None)
+    workload = build_workload(args.requests, args.cities)
+    with StubUpstream(behaviors={"weather": behavior, "news": behavior}) as upstream:
+        results = run(workload, args.concurrency, upstream.base_url)
+        cached = run(workload, args.concurrency, upstream.base_url, response_cache=True) if args.response_cache else None
+
+    report = {
+        "config": {key: getattr(args, key) for key in ("requests", "concurrency", "cities", "upstream_latency")},
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    print(f"{args.requests} prompts, concurrency {args.concurrency}, "
+          f"{args.cities} cities, upstream {args.upstream_latency}ms")
+    print("response cache off")
+    print_table(results)
+    if cached is not None:
+        report["cached_results"] = cached
+        print("response cache on")
+        print_table(cached)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.threshold, args.metric, args.min_delta)
+        for message in found:
+            print(f"REGRESSION {message}")
+        if found:
+            return 1
+        print(f"no stage slower than baseline by more than {args.threshold:.0%} ({args.metric})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
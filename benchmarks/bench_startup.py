@@ -0,0 +1,83 @@
+"""Cold-start cost: importing main and answering offline prompts
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup --runs 10
+
+Each run is a fresh interpreter that imports main, builds a SimpleAIAgent
+and answers prompts that never touch the network. The phases are timed
+inside the child, and it reports which heavy modules got loaded on the
+way; none should be, since the HTTP stack and the JSON backends wait for
+the first upstream call.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only upstream calls, the asyncio agent or the CLI need
+HEAVY_MODULES = ("requests", "urllib3", "aiohttp", "asyncio", "numpy", "concurrent.futures",
+                 "jsonbackend", "orjson", "msgspec", "sqlite3", "argparse", "http.server")
+
+OFFLINE_PROMPTS = ("what time is it", "2 + 2", "hello")
+
+_CHILD = """
+import sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+agent = main.SimpleAIAgent(verbose=False)
+constructed = time.perf_counter()
+agent.respond(PROMPTS[0])
+first = time.perf_counter()
+for prompt in PROMPTS[1:]:
+    agent.respond(prompt)
+done = time.perf_counter()
+import json
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "construct_ms": (constructed - imported) * 1000,
+    "first_response_ms": (first - start) * 1000,
+    "all_offline_ms": (done - start) * 1000,
+    "heavy_modules": [name for name in HEAVY if name in sys.modules],
+}))
+"""
+
+PHASES = ("import_ms", "construct_ms", "first_response_ms", "all_offline_ms")
+
+
+def measure_once(prompts=OFFLINE_PROMPTS):
+    """Time one cold start in a fresh interpreter and return its report"""
+    code = f"PROMPTS = {list(prompts)!r}\nHEAVY = {list(HEAVY_MODULES)!r}\n{_CHILD}"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def measure(runs=10, prompts=OFFLINE_PROMPTS):
+    """Median of each phase over runs cold starts, plus any heavy modules seen"""
+    reports = [measure_once(prompts) for _ in range(runs)]
+    summary = {phase: round(statistics.median(r[phase] for r in reports), 3) for phase in PHASES}
+    summary["heavy_modules"] = sorted({name for r in reports for name in r["heavy_modules"]})
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    summary = measure(args.runs)
+    print(f"median of {args.runs} cold starts ({', '.join(OFFLINE_PROMPTS)})")
+    for phase in PHASES:
+        print(f"{phase:<20}{summary[phase]:>10.2f}")
+    print(f"heavy modules loaded: {', '.join(summary['heavy_modules']) or 'none'}")
+    return 1 if summary["heavy_modules"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
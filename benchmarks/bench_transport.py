@@ -0,0 +1,57 @@
+"""Per-request latency with and without pooled keep-alive sessions
+
+Run from the repository root:
+
+    python -m benchmarks.bench_transport --requests 500
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+from stub_server import StubUpstream
+from transport import HTTPTransport
+
+
+def measure(get, url, count):
+    """Time count sequential GETs and return latencies in milliseconds"""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        get(url).content
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(name, latencies):
+    """Print mean/p50/p99 for one run"""
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{name:<12} mean={statistics.mean(ordered):.3f}ms "
+          f"p50={statistics.median(ordered):.3f}ms p99={p99:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    with StubUpstream() as upstream:
+        base_url = upstream.base_url
+        url = f"{base_url}/data/2.5/weather?q=Paris&units=metric"
+        # Warm up both paths so import and first-connection costs are excluded
+        requests.get(url).content
+        unpooled = measure(requests.get, url, args.requests)
+        with HTTPTransport() as transport:
+            transport.get(url).content
+            pooled = measure(transport.get, url, args.requests)
+
+    print(f"{args.requests} sequential GETs against {base_url}")
+    summarize("unpooled", unpooled)
+    summarize("pooled", pooled)
+    print(f"speedup (mean): {statistics.mean(unpooled) / statistics.mean(pooled):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""In-memory caches for upstream lookups"""
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by TTLCache.get on a miss, so None can be cached as a value
+MISSING = object()
+
+
+def normalize_key(text):
+    """Collapse case and whitespace so equivalent lookups share an entry"""
+    return " ".join(text.split()).lower()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a TTL
+
+    With a store attached (see attach), misses read through to it and
+    writes go to both, so processes sharing the store share answers.
+
+    For stale-while-revalidate, lookup() keeps returning an expired entry
+    for grace more seconds, flagged as stale so the caller can refresh it.
+    Reads are counted per key so the hottest entries can be refreshed
+    before they expire (see hot_keys), and added to the store's hit
+    counters every flush_every seconds (see flush_reads).
+    """
+
+    def __init__(self, maxsize=1024, ttl=600, negative_ttl=60, clock=time.monotonic, grace=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.grace = grace
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._reads = {}  # key -> lookups since it was cached
+        self._unflushed = {}  # key -> lookups not yet added to the store
+        self._lock = threading.Lock()
+        self.store = None
+        self.namespace = None
+        self.flush_every = None
+        self._flushed_at = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.store_hits = 0
+        self.stale_hits = 0
+
+    def attach(self, store, namespace, flush_every=30.0):
+        """Back this cache with a shared store, under namespace
+
+        Read counts reach the store at most every flush_every seconds, on
+        the next lookup or write, so reads stay read-only in the store.
+        """
+        self.store = store
+        self.namespace = namespace
+        self.flush_every = flush_every
+        self._flushed_at = self._clock()
+
+    def _count_read(self, key):
+        """Count a read of a cached key; call with the lock held"""
+        self._reads[key] += 1
+        if self.store is not None:
+            self._unflushed[key] = self._unflushed.get(key, 0) + 1
+
+    def flush_reads(self):
+        """Add the reads counted since the last flush to the store; return how many keys"""
+        if self.store is None:
+            return 0
+        with self._lock:
+            counts, self._unflushed = self._unflushed, {}
+            self._flushed_at = self._clock()
+        if counts:
+            self.store.add_hits(self.namespace, counts)
+        return len(counts)
+
+    def _maybe_flush_reads(self):
+        """Flush read counts once flush_every seconds have passed"""
+        if self.store is not None and self._clock() - self._flushed_at >= self.flush_every:
+            self.flush_reads()
+
+    def get(self, key, default=MISSING):
+        """Return the live value for key, or default on a miss"""
+        self._maybe_flush_reads()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._count_read(key)
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+        return self._read_through(key, default)
+
+    def lookup(self, key):
+        """Return (value, fresh) for key
+
+        fresh is False when the entry has expired but is still within the
+        grace window; value is MISSING when there is nothing servable.
+        """
+        self._maybe_flush_reads()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._count_read(key)
+                expires_at, value = entry
+                now = self._clock()
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value, True
+                if expires_at + self.grace > now:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    return value, False
+            self.misses += 1
+        value = self._read_through(key, MISSING)
+        return value, value is not MISSING
+
+    def _read_through(self, key, default):
+        """Fetch key from the attached store into memory, if there is one"""
+        if self.store is not None:
+            value, ttl = self.store.get(self.namespace, key)
+            if value is not MISSING:
+                self._set_local(key, value, ttl)
+                with self._lock:
+                    self._count_read(key)
+                    self.store_hits += 1
+                return value
+        return default
+
+    def get_stale(self, key, default=MISSING):
+        """Return the last value stored for key even if it has expired
+
+        Expired entries stay until LRU eviction pushes them out, so they can
+        still serve as a degraded answer.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            return default if entry is None else entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Store value for ttl seconds (the cache default if omitted)"""
+        ttl = self.ttl if ttl is None else ttl
+        self._set_local(key, value, ttl)
+        if self.store is not None:
+            self.store.set(self.namespace, key, value, ttl)
+            self._maybe_flush_reads()
+
+    def _set_local(self, key, value, ttl):
+        """Store value in memory only"""
+        expires_at = self._clock() + ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            self._reads.setdefault(key, 0)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                del self._reads[evicted]
+                self.evictions += 1
+
+    def set_negative(self, key, value=None):
+        """Remember a failed lookup for the shorter negative TTL"""
+        self.set(key, value, ttl=self.negative_ttl)
+
+    def preload(self, limit):
+        """Warm memory with the store's limit most-read live entries"""
+        if self.store is None:
+            return 0
+        entries = self.store.hottest(self.namespace, limit)
+        for key, value, ttl in reversed(entries):
+            # Hottest last, so it is the most recently used in the LRU order
+            self._set_local(key, value, ttl)
+        return len(entries)
+
+    def touch(self, key):
+        """Count a read of key for hot_keys without looking it up"""
+        with self._lock:
+            if key in self._reads:
+                self._count_read(key)
+
+    def hot_keys(self, limit, due_within):
+        """Return which of the limit most-read keys are due for a refresh
+
+        A key is due when it expires within due_within seconds or has
+        expired but is still inside the grace window. Negative (None)
+        entries are never returned. Read counts are halved on every call
+        so popularity follows recent traffic.
+        """
+        now = self._clock()
+        with self._lock:
+            hottest = heapq.nlargest(limit, self._reads.items(), key=lambda item: item[1])
+            due = []
+            for key, _ in hottest:
+                expires_at, value = self._data[key]
+                if value is not None and now - self.grace < expires_at <= now + due_within:
+                    due.append(key)
+            for key in self._reads:
+                self._reads[key] //= 2
+        return due
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+            self._reads.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "store_hits": self.store_hits,
+                "stale_hits": self.stale_hits,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResponseCache:
+    """Bounded LRU cache of whole answers keyed by prompt, each kept for its intent's TTL
+
+    Keys are a 16-byte BLAKE2b digest of the normalized prompt, so two
+    prompts share an answer only when they are equal up to case and
+    whitespace, and a key costs the same however long the prompt. Past maxsize the least
+    recently used entries are evicted. Intents missing from ttls, or with
+    a TTL of 0, are never cached.
+    """
+
+    def __init__(self, ttls, maxsize=4096, clock=time.monotonic):
+        self.ttls = dict(ttls)
+        self.maxsize = maxsize
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(prompt):
+        """Return the cache key of a prompt"""
+        return hashlib.blake2b(normalize_key(prompt).encode(), digest_size=16).digest()
+
+    def get(self, key, default=MISSING):
+        """Return the live value for key, or default"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return default
+
+    def set(self, key, intent, value):
+        """Cache value for intent's TTL; returns whether it was cached"""
+        ttl = self.ttls.get(intent, 0)
+        if not ttl:
+            return False
+        expires_at = self._clock() + ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,115 @@
+"""Persistent SQLite store shared by agent processes"""
+import json
+import sqlite3
+import threading
+import time
+
+from cache import MISSING
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at);
+"""
+
+
+class SQLiteCacheStore:
+    """On-disk cache of upstream answers in WAL mode
+
+    Several worker processes can point at the same file: WAL lets readers
+    proceed while one process writes, and get() never writes. Values are
+    stored as JSON with a wall-clock expiry, and each row has a hit counter
+    that caches add their read counts to in batches (add_hits), so the
+    hottest keys can be preloaded on startup. Expired rows are deleted in
+    bulk by sweep(), which also runs every sweep_every writes.
+    """
+
+    def __init__(self, path, sweep_every=1000, clock=time.time):
+        self.path = path
+        self.sweep_every = sweep_every
+        self._clock = clock
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def get(self, namespace, key):
+        """Return (value, seconds_left) for a live row, or (MISSING, None)"""
+        now = self._clock()
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, now),
+        ).fetchone()
+        if row is None:
+            return MISSING, None
+        return json.loads(row[0]), row[1] - now
+
+    def set(self, namespace, key, value, ttl):
+        """Store value under (namespace, key) for ttl seconds, keeping its hit count"""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET "
+                "value = excluded.value, expires_at = excluded.expires_at",
+                (namespace, key, json.dumps(value), self._clock() + ttl),
+            )
+        with self._lock:
+            self._writes += 1
+            due = self.sweep_every and self._writes % self.sweep_every == 0
+        if due:
+            self.sweep()
+
+    def add_hits(self, namespace, counts):
+        """Add {key: reads} to the rows' hit counters in one transaction"""
+        with self._connection() as conn:
+            conn.executemany(
+                "UPDATE cache SET hits = hits + ? WHERE namespace = ? AND key = ?",
+                [(reads, namespace, key) for key, reads in counts.items()],
+            )
+
+    def sweep(self):
+        """Delete every expired row in one statement; return how many went"""
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM cache WHERE expires_at <= ?", (self._clock(),)).rowcount
+
+    def hottest(self, namespace, limit):
+        """Return [(key, value, seconds_left)] for the most-read live rows"""
+        now = self._clock()
+        rows = self._connection().execute(
+            "SELECT key, value, expires_at FROM cache WHERE namespace = ? AND expires_at > ? "
+            "ORDER BY hits DESC LIMIT ?",
+            (namespace, now, limit),
+        ).fetchall()
+        return [(key, json.loads(value), expires_at - now) for key, value, expires_at in rows]
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self):
+        """Close every connection this store opened"""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
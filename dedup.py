@@ -0,0 +1,190 @@
+"""Near-duplicate headline suppression with shingling and MinHash/LSH
+
+Syndicated stories come back from NewsAPI as the same headline from
+several outlets, worded slightly differently. Each headline is reduced to
+a set of word shingles, the sets to MinHash signatures (all headlines at
+once, in NumPy), and the signatures are cut into LSH bands. A headline is
+only compared with the earlier ones it shares a band bucket with, so
+deduplicating n headlines takes roughly linear time instead of the n²/2
+comparisons of checking every pair. Without NumPy, dedupe() checks every
+pair instead and keeps the same headlines.
+"""
+import re
+import zlib
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # dedupe() falls back to pairwise_keep
+    np = None
+
+# A trailing " - Reuters" / " | BBC News" source tag, as NewsAPI titles carry
+_SOURCE_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,40}$")
+_WORD = re.compile(r"[a-z0-9]+")
+
+def shingles(text, size=2, strip_source=True):
+    """Return the set of size-word shingles of a headline
+
+    Text is lowercased and split into alphanumeric words, after dropping a
+    trailing source tag. Headlines shorter than size words give one shingle.
+    """
+    if strip_source:
+        text = _SOURCE_SUFFIX.sub("", text)
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a, b):
+    """Jaccard similarity of two sets (1.0 for two empty sets)"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def pairwise_keep(titles, threshold=0.5, shingle_size=2):
+    """Indexes of the titles kept when each is compared with every kept one"""
+    sets = [shingles(title, shingle_size) for title in titles]
+    kept = []
+    for index, shingle_set in enumerate(sets):
+        if all(jaccard(shingle_set, sets[other]) < threshold for other in kept):
+            kept.append(index)
+    return kept
+
+
+def _bands_for(threshold, num_perm, recall):
+    """Return the LSH (bands, rows) with the most rows that keeps recall
+
+    That is, a pair exactly at threshold still becomes a candidate with
+    probability recall.
+    A pair with similarity s shares at least one bucket with probability
+    1 - (1 - s**rows)**bands. More rows mean fewer dissimilar candidates to
+    check; the exact check afterwards drops any false candidates.
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class MinHashDeduper:
+    """Keeps the first of every group of headlines with similar wording
+
+    Headlines count as duplicates when the Jaccard similarity of their
+    shingle sets is at least threshold. LSH only proposes candidates: a
+    pair at threshold shares a bucket with probability recall, more similar
+    pairs more often. Every candidate is then checked exactly, so no two
+    kept headlines are more similar than threshold.
+    """
+
+    def __init__(self, threshold=0.5, num_perm=64, shingle_size=2, recall=0.99, seed=1):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _bands_for(threshold, num_perm, recall)
+        rng = np.random.default_rng(seed)
+        # Multiply-add-shift hashing of 32-bit shingle hashes, one (a, b)
+        # per permutation: h(x) = (a * x + b) >> 32 in wrapping 64-bit math
+        self._a = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64, endpoint=False)
+        self._b = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64, endpoint=False)
+
+    def signatures(self, shingle_sets):
+        """Return the MinHash signatures of shingle sets as a [n, num_perm] array"""
+        owners, values = [], []
+        for index, shingle_set in enumerate(shingle_sets):
+            for shingle in shingle_set:
+                owners.append(index)
+                values.append(shingle)
+        signatures = np.full((len(shingle_sets), self.num_perm), 2 ** 32, np.uint64)
+        if not values:
+            return signatures
+        # CRC32 rather than hash(), which is salted per process and would make
+        # the signatures (and so the buckets) differ from run to run
+        x = np.fromiter((zlib.crc32(v.encode()) for v in values), np.uint64, len(values))
+        owners = np.array(owners, np.int64)
+        # [num_perm, shingles], so each permutation's minima reduce over contiguous memory
+        hashed = (self._a[:, None] * x[None, :] + self._b[:, None]) >> np.uint64(32)
+        # Shingles arrive grouped by owner, so each owner's columns are one run
+        starts = np.flatnonzero(np.diff(owners, prepend=-1))
+        signatures[owners[starts]] = np.minimum.reduceat(hashed, starts, axis=1).T
+        return signatures
+
+    def keep(self, titles, limit=None):
+        """Return the indexes of the titles to keep, in order, at most limit
+
+        Earlier titles win, so pass them in rank order.
+        """
+        sets = [shingles(title, self.shingle_size) for title in titles]
+        kept = np.ones(len(sets), bool)
+        for first, second in self._duplicates(sets):
+            # Edges come ordered by their later title, so kept[first] is final
+            if kept[first]:
+                kept[second] = False
+        indexes = np.flatnonzero(kept).tolist()
+        return indexes if limit is None else indexes[:limit]
+
+    def _duplicates(self, sets):
+        """Return the (earlier, later) index pairs at or above threshold, ordered by later"""
+        if len(sets) < 2:
+            return []
+        keys = _band_keys(self.signatures(sets), self.bands, self.rows).ravel()
+        order = np.argsort(keys, kind="stable")
+        keys, owners = keys[order], order // self.bands
+        # Candidates: titles sharing a bucket, i.e. equal keys at distance d in
+        # the sorted run, for every d up to the largest bucket
+        codes = []
+        for distance in range(1, len(keys)):
+            same = np.flatnonzero(keys[distance:] == keys[:-distance])
+            if not len(same):
+                break
+            first, second = owners[same], owners[same + distance]
+            codes.append(np.minimum(first, second) * len(sets) + np.maximum(first, second))
+        if not codes:
+            return []
+        codes = np.unique(np.concatenate(codes))
+        first, second = (codes // len(sets)).tolist(), (codes % len(sets)).tolist()
+        pairs = sorted(
+            (b, a) for a, b in zip(first, second)
+            if a != b and jaccard(sets[a], sets[b]) >= self.threshold
+        )
+        return [(a, b) for b, a in pairs]
+
+    def dedupe(self, titles, limit=None):
+        """Return titles without near-duplicates, in order, at most limit"""
+        return [titles[index] for index in self.keep(titles, limit)]
+
+
+def _mix(x):
+    """splitmix64 finalizer: spreads values over all 64 bits"""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _band_keys(signatures, bands, rows):
+    """Hash each band of rows signature values into one integer, shape [n, bands]
+
+    The band number is hashed in too, so keys of different bands never meet.
+    """
+    banded = signatures[:, :bands * rows].reshape(len(signatures), bands, rows)
+    keys = np.broadcast_to(np.arange(bands, dtype=np.uint64), (len(signatures), bands))
+    for row in range(rows):
+        keys = _mix(keys ^ banded[:, :, row])
+    return keys
+
+
+@lru_cache(maxsize=8)
+def _deduper(threshold):
+    return MinHashDeduper(threshold)
+
+
+def dedupe(titles, threshold=0.5, limit=None):
+    """Return titles without near-duplicates (see MinHashDeduper), at most limit"""
+    if np is None:
+        return [titles[index] for index in pairwise_keep(titles, threshold)][:limit]
+    return _deduper(threshold).dedupe(titles, limit)
@@ -0,0 +1,115 @@
+"""Daily summaries of OpenWeather 5-day/3-hour forecasts
+
+The forecast endpoint answers with about 40 three-hour slots per city.
+summarize_many() flattens the slots of any number of cities into a few
+arrays once, then groups them by (city, local day) and reduces every group
+at the same time: low and high with ufunc.reduceat, the dominant condition
+with one count matrix of (group, condition) pairs. A digest of a thousand
+cities costs one pass of NumPy work instead of a Python loop per city and
+day. Without NumPy the same summaries are computed slot by slot.
+"""
+from collections import Counter
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:  # summarize_many() falls back to plain Python
+    np = None
+
+DAY = 86400
+
+
+def summarize(data):
+    """Return the daily summaries for one decoded forecast answer"""
+    return summarize_many([data])[0]
+
+
+def summarize_many(forecasts):
+    """Return a list of daily summaries per decoded forecast answer
+
+    Each summary is {"date", "low", "high", "condition", "description",
+    "slots"}, days in the city's local time (the answer's city.timezone
+    offset) and in date order. The dominant condition is the most frequent
+    condition code of the day; ties go to the lower code, which in
+    OpenWeather's numbering is the more eventful weather.
+    """
+    # One pass over every slot of every city into a single 2-D array
+    rows = [
+        (index, slot["dt"] + offset, slot["main"]["temp_min"], slot["main"]["temp_max"], slot["weather"][0]["id"])
+        for index, data in enumerate(forecasts)
+        for offset in [(data.get("city") or {}).get("timezone") or 0]
+        for slot in data.get("list") or ()
+    ]
+    descriptions = {
+        slot["weather"][0]["id"]: slot["weather"][0]["description"]
+        for data in forecasts for slot in data.get("list") or ()
+    }
+    if np is None:
+        return _summarize_rows(rows, descriptions, len(forecasts))
+    summaries = [[] for _ in forecasts]
+    if not rows:
+        return summaries
+    columns = np.array(rows, np.float64)
+    city = columns[:, 0].astype(np.int64)
+    day = columns[:, 1].astype(np.int64) // DAY
+    low, high, code = columns[:, 2], columns[:, 3], columns[:, 4].astype(np.int64)
+
+    # One group per (city, local day); a stable sort on a combined key makes
+    # each group a run while keeping slots in time order within it
+    base = day.min()
+    day -= base
+    order = np.argsort(city * (day.max() + 1) + day, kind="stable")
+    city, day, low, high, code = city[order], day[order], low[order], high[order], code[order]
+    boundary = np.ones(len(day), bool)
+    boundary[1:] = (city[1:] != city[:-1]) | (day[1:] != day[:-1])
+    starts = np.flatnonzero(boundary)
+    group = np.cumsum(boundary) - 1
+    group_low = np.minimum.reduceat(low, starts)
+    group_high = np.maximum.reduceat(high, starts)
+    group_slots = np.diff(np.append(starts, len(day)))
+
+    # Dominant condition: a (group x distinct code) count matrix; argmax
+    # takes the first maximum, so ties go to the lowest code
+    distinct, code_index = np.unique(code, return_inverse=True)
+    counts = np.bincount(group * len(distinct) + code_index, minlength=len(starts) * len(distinct))
+    group_code = distinct[counts.reshape(len(starts), len(distinct)).argmax(axis=1)]
+
+    dates = {}
+    for owner, local_day, day_low, day_high, day_code, slots in zip(
+            city[starts].tolist(), (day[starts] + base).tolist(), group_low.tolist(), group_high.tolist(),
+            group_code.tolist(), group_slots.tolist()):
+        date = dates.get(local_day)
+        if date is None:
+            date = dates[local_day] = datetime.fromtimestamp(local_day * DAY, timezone.utc).date().isoformat()
+        summaries[owner].append({
+            "date": date,
+            "low": day_low,
+            "high": day_high,
+            "condition": day_code,
+            "description": descriptions[day_code],
+            "slots": slots,
+        })
+    return summaries
+
+
+def _summarize_rows(rows, descriptions, count):
+    """summarize_many() for (city, local time, low, high, code) rows, without NumPy"""
+    groups = {}  # (city, local day) -> [lows, highs, codes]
+    for owner, local_time, low, high, code in rows:
+        group = groups.setdefault((owner, int(local_time) // DAY), ([], [], []))
+        group[0].append(low)
+        group[1].append(high)
+        group[2].append(code)
+    summaries = [[] for _ in range(count)]
+    for (owner, local_day), (lows, highs, codes) in sorted(groups.items()):
+        counts = Counter(codes)
+        code = min(counts, key=lambda c: (-counts[c], c))
+        summaries[owner].append({
+            "date": datetime.fromtimestamp(local_day * DAY, timezone.utc).date().isoformat(),
+            "low": float(min(lows)),
+            "high": float(max(highs)),
+            "condition": code,
+            "description": descriptions[code],
+            "slots": len(codes),
+        })
+    return summaries
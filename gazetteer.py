@@ -0,0 +1,313 @@
+"""Offline gazetteer for finding place names in prompts
+
+The bundled data/cities.tsv.gz holds every GeoNames city with at least
+15,000 inhabitants, every country and every US state, plus a few common
+aliases such as NYC and LA (GeoNames, CC BY 4.0). Rebuild it from
+geonamescache's data files with:
+
+    python gazetteer.py build cities15000.json --countries countries.json --regions us_states.json
+"""
+import gzip
+import os
+import re
+import unicodedata
+from collections import namedtuple
+from collections.abc import Sequence
+from functools import lru_cache
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.tsv.gz")
+
+# kind is "city", "country" or "region"; only cities have OpenWeather city IDs
+Place = namedtuple("Place", "geonameid name country population latitude longitude kind", defaults=("city",))
+
+# Words that introduce a place ("weather in ...", "forecast for ...")
+_PREPOSITIONS = frozenset({"in", "for", "at", "near", "around"})
+
+# Words after "in"/"for" that are not places ("forecast for tomorrow")
+_NOT_PLACES = frozenset({
+    "a", "an", "and", "the", "this", "that", "these", "next", "me", "my", "our", "us", "it",
+    "now", "today", "tomorrow", "tonight", "later", "here", "there", "please",
+    "morning", "afternoon", "evening", "night", "day", "days", "week", "weekend",
+    "hour", "hours", "celsius", "fahrenheit", "general",
+})
+
+# Place names that are also everyday words; matched only after a preposition
+_COMMON_WORDS = frozenset({
+    "bath", "buffalo", "concord", "independence", "man", "mobile", "nice", "orange",
+    "paradise", "reading", "split", "surprise",
+})
+
+# Alternate names are only indexed for cities at least this big
+ALTERNATES_POPULATION = 100_000
+
+# Short names people type that GeoNames does not list (or that the
+# alternate-name filter drops), by the official name they stand for
+ALIASES = {
+    "New York City": ("NYC", "New York"),
+    "Los Angeles": ("LA", "L.A."),
+    "San Francisco": ("SF",),
+    "Washington": ("DC", "Washington DC"),
+    "Las Vegas": ("Vegas",),
+    "Philadelphia": ("Philly",),
+    "Rio de Janeiro": ("Rio",),
+    "The Netherlands": ("Netherlands", "Holland"),
+    "United States": ("USA", "America"),
+    "United Kingdom": ("UK", "Britain", "Great Britain"),
+    "United Arab Emirates": ("UAE",),
+}
+
+
+class UnknownPlace(str):
+    """Text in place position ("weather in Xyz") that the gazetteer does not know"""
+
+
+def tokenize(text):
+    """Lowercase, strip accents and split text into alphanumeric tokens"""
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.findall(r"[a-z0-9]+", folded.lower())
+
+
+def normalize(name):
+    """Return name as its space-joined tokens, the form the index is keyed by"""
+    return " ".join(tokenize(name))
+
+
+class _Places(Sequence):
+    """Place rows parsed on first access, so loading does not build tens of thousands of tuples"""
+
+    def __init__(self, rows):
+        self._rows = rows  # tab-separated Place fields
+        self._parsed = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = range(len(self._rows))[index]
+        place = self._parsed.get(index)
+        if place is None:
+            geonameid, kind, name, country, population, latitude, longitude = self._rows[index].split("\t")
+            place = self._parsed[index] = Place(
+                int(geonameid), name, country, int(population),
+                float(latitude) if latitude else None, float(longitude) if longitude else None, kind)
+        return place
+
+
+class Gazetteer:
+    """Index of place names, official and alternate, keyed by normalized name
+
+    Scanning a prompt tries the longest word runs first at each position,
+    so it is one left-to-right pass of dict lookups. Collisions between
+    names are settled by build() (see _ranked_names), so every name in
+    the index belongs to exactly one place.
+    """
+
+    def __init__(self, places, names):
+        """places is a sequence of Place; names[i] lists place i's normalized
+        names, its official name first ("" if another place owns it)"""
+        self.places = places
+        self._names = {}  # normalized name -> place index, or ~index for an alternate name
+        for index, (official, *alternates) in enumerate(names):
+            if official:
+                self._names.setdefault(official, index)
+            for name in alternates:
+                self._names.setdefault(name, ~index)
+        self._longest = max((name.count(" ") + 1 for name in self._names), default=0)
+
+    @classmethod
+    def load(cls, path=DATA_PATH):
+        """Read a gazetteer written by build()"""
+        rows, names = [], []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#"):
+                    continue
+                row, _, known = line.rstrip("\n").rpartition("\t")
+                rows.append(row)
+                names.append(known.split("|"))
+        return cls(_Places(rows), names)
+
+    def _entry(self, name):
+        """Return (place, official) for a normalized name, or None"""
+        index = self._names.get(name)
+        if index is None:
+            return None
+        return (self.places[index], True) if index >= 0 else (self.places[~index], False)
+
+    def lookup(self, name):
+        """Return the Place called name (official or alternate), or None"""
+        entry = self._entry(normalize(name))
+        return None if entry is None else entry[0]
+
+    def scan(self, tokens):
+        """Yield (start, end, place, official) for the longest name at each position"""
+        position, count = 0, len(tokens)
+        while position < count:
+            for end in range(min(count, position + self._longest), position, -1):
+                entry = self._entry(" ".join(tokens[position:end]))
+                if entry is not None:
+                    yield (position, end) + entry
+                    position = end
+                    break
+            else:
+                position += 1
+
+    def locate(self, text):
+        """Return the Place a prompt is about, an UnknownPlace, or None
+
+        A known name right after "in"/"for"/"at" wins; otherwise the first
+        official name of a country, region or big city that is not an
+        everyday word (small towns are called Time or Date). With no known name,
+        the words after "in"/"for" come back as an UnknownPlace, for
+        callers to pass on to an upstream that knows more places.
+        """
+        tokens = tokenize(text)
+        fallback = None
+        for start, end, place, official in self.scan(tokens):
+            if start and tokens[start - 1] in _PREPOSITIONS:
+                return place
+            if (fallback is None and official and " ".join(tokens[start:end]) not in _COMMON_WORDS
+                    and (place.kind != "city" or place.population >= ALTERNATES_POPULATION)):
+                fallback = place
+        if fallback is not None:
+            return fallback
+        for position, token in enumerate(tokens):
+            if token in ("in", "for"):
+                words = []
+                for word in tokens[position + 1:position + 4]:
+                    if word in _NOT_PLACES:
+                        break
+                    words.append(word)
+                if words:
+                    return UnknownPlace(" ".join(words).title())
+        return None
+
+    def __len__(self):
+        return len(self.places)
+
+
+@lru_cache(maxsize=None)
+def default_gazetteer():
+    """Return the bundled gazetteer, loading it on first use"""
+    return Gazetteer.load()
+
+
+def _alternates(city):
+    """Normalized alternate names worth indexing for a geonamescache city
+
+    Alternate names are kept when they are ASCII, start with a capital,
+    are at least four letters and are not all caps, which drops airport
+    codes, lowercase transliterations and scripts prompts are not typed in.
+    """
+    return {
+        normalize(name) for name in city.get("alternatenames", ())
+        if name.isascii() and name[:1].isupper() and any(ch.islower() for ch in name)
+        and not any(ch.isdigit() for ch in name) and len(normalize(name).replace(" ", "")) >= 4
+    }
+
+
+def _ranked_names(rows):
+    """Yield (rank, row index, normalized name, official) from best claim to worst
+
+    Ranks: ALIASES, then official names of countries and of cities with
+    ALTERNATES_POPULATION people, then US states, then smaller cities,
+    then alternate names; bigger places first within a rank. So "new
+    york" is the city, "washington" the capital and "york" the English
+    city rather than an old name of Newark.
+    """
+    first_by_name = {}
+    for index, row in enumerate(rows):
+        first_by_name.setdefault(row["name"], index)
+    for name, aliases in ALIASES.items():
+        if name in first_by_name:
+            for alias in aliases:
+                yield 0, first_by_name[name], normalize(alias), False
+    for index, row in enumerate(rows):
+        big = row["kind"] == "country" or row["population"] >= ALTERNATES_POPULATION
+        rank = 1 if big else 2 if row["kind"] == "region" else 3
+        yield rank, index, normalize(row["name"]), True
+        for name in row["alternates"]:
+            yield 4, index, name, False
+
+
+def build(source, path=DATA_PATH, min_population=15_000, countries=None, regions=None):
+    """Write the gazetteer file from geonamescache JSON dumps
+
+    source is a cities JSON (cities15000.json); countries (countries.json)
+    and regions (us_states.json) are optional. Alternate names are only
+    kept for cities with ALTERNATES_POPULATION people: names the index
+    misses still reach OpenWeather, so the index only has to be fast for
+    the places people ask about most. Names are written pre-normalized
+    and each under the one place that owns it, so loading does no
+    tokenizing or ranking. Returns the number of places written.
+    """
+    import json
+
+    def read(filename):
+        with open(filename, encoding="utf-8") as f:
+            return list(json.load(f).values())
+
+    rows = []
+    for city in read(source):
+        if city["population"] >= min_population:
+            rows.append({"geonameid": city["geonameid"], "kind": "city", "name": city["name"],
+                         "country": city["countrycode"], "population": city["population"],
+                         "latitude": str(city["latitude"]), "longitude": str(city["longitude"]),
+                         "alternates": _alternates(city) if city["population"] >= ALTERNATES_POPULATION else ()})
+    for country in read(countries) if countries else ():
+        rows.append({"geonameid": country["geonameid"], "kind": "country", "name": country["name"].strip(),
+                     "country": country["iso"], "population": country["population"],
+                     "latitude": "", "longitude": "", "alternates": ()})
+    for region in read(regions) if regions else ():
+        rows.append({"geonameid": region["geonameid"], "kind": "region", "name": region["name"],
+                     "country": "US", "population": 0, "latitude": "", "longitude": "", "alternates": ()})
+    rows.sort(key=lambda row: (-row["population"], row["geonameid"]))
+
+    owners, official, alternates = set(), set(), [[] for _ in rows]
+    for _, index, name, is_official in sorted(_ranked_names(rows), key=lambda claim: claim[:2]):
+        if name and name not in owners:
+            owners.add(name)
+            if is_official:
+                official.add(index)
+            else:
+                alternates[index].append(name)
+
+    lines = [
+        f"# GeoNames cities with population >= {min_population}, countries and regions "
+        "(CC BY 4.0, https://www.geonames.org)\n",
+        "# geonameid\tkind\tname\tcountry\tpopulation\tlatitude\tlongitude\t"
+        "normalized names, official first or empty (|-separated)\n",
+    ]
+    for index, row in enumerate(rows):
+        names = [normalize(row["name"]) if index in official else ""] + sorted(alternates[index])
+        lines.append("\t".join([
+            str(row["geonameid"]), row["kind"], row["name"], row["country"], str(row["population"]),
+            row["latitude"], row["longitude"], "|".join(names),
+        ]) + "\n")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # mtime=0 keeps rebuilds byte-identical
+    with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+        f.write("".join(lines).encode("utf-8"))
+    return len(rows)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the bundled place gazetteer")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build_parser = subcommands.add_parser("build", help="rebuild data/cities.tsv.gz")
+    build_parser.add_argument("source", help="geonamescache cities15000.json")
+    build_parser.add_argument("--countries", help="geonamescache countries.json")
+    build_parser.add_argument("--regions", help="geonamescache us_states.json")
+    build_parser.add_argument("--min-population", type=int, default=15_000)
+    build_parser.add_argument("--output", default=DATA_PATH)
+    args = parser.parse_args(argv)
+    count = build(args.source, args.output, args.min_population, args.countries, args.regions)
+    print(f"wrote {count} places to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
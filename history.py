@@ -0,0 +1,184 @@
+"""Rolling history of weather observations per city
+
+Observations live in fixed-size ring buffers, one row per city across a
+few column arrays, so a city never costs more than capacity observations
+however long the agent runs, and queries over one city or all of them are
+NumPy operations rather than loops over Python objects.
+"""
+import threading
+
+import numpy as np
+
+DAY = 86400.0
+
+# Column arrays and the bytes one observation takes in each
+_COLUMNS = (("time", np.float64), ("temp", np.float32), ("humidity", np.float32), ("condition", np.int16))
+OBSERVATION_BYTES = sum(np.dtype(dtype).itemsize for _, dtype in _COLUMNS)
+
+
+class WeatherHistory:
+    """Ring buffers of (timestamp, temp, humidity, condition code) per city
+
+    Each city keeps its last capacity observations (a day of five-minute
+    refreshes by default); older ones are overwritten. Empty slots hold NaN
+    timestamps, which no time window matches, so queries need no fill
+    counts. Rows are added for new cities by doubling the arrays; once
+    max_cities is reached, observations for further cities are dropped.
+    Unknown humidity is NaN and an unknown condition code -1.
+    """
+
+    def __init__(self, capacity=288, max_cities=None, initial_cities=64):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.max_cities = max_cities
+        self._rows = {}  # city -> row
+        self._lock = threading.Lock()
+        self._columns = {name: self._empty(name, dtype, initial_cities) for name, dtype in _COLUMNS}
+        self._next = np.zeros(initial_cities, np.int64)  # slot the next observation goes to
+
+    def _empty(self, name, dtype, rows):
+        fill = np.nan if name in ("time", "temp", "humidity") else -1
+        return np.full((rows, self.capacity), fill, dtype)
+
+    def _row(self, city):
+        """Return city's row, adding one if there is room (call with the lock held)"""
+        row = self._rows.get(city)
+        if row is not None:
+            return row
+        if self.max_cities is not None and len(self._rows) >= self.max_cities:
+            return None
+        row = len(self._rows)
+        allocated = len(self._next)
+        if row == allocated:
+            for name, dtype in _COLUMNS:
+                self._columns[name] = np.concatenate([self._columns[name], self._empty(name, dtype, allocated)])
+            self._next = np.concatenate([self._next, np.zeros(allocated, np.int64)])
+        self._rows[city] = row
+        return row
+
+    def record(self, city, timestamp, temp, humidity=None, condition=None):
+        """Add one observation for city; returns False if max_cities refused it"""
+        return self.extend(city, [timestamp], [temp],
+                           [np.nan if humidity is None else humidity],
+                           [-1 if condition is None else condition])
+
+    def extend(self, city, timestamps, temps, humidity=None, conditions=None):
+        """Add many observations for city at once (only the last capacity are kept)"""
+        count = len(timestamps)
+        values = {
+            "time": timestamps, "temp": temps,
+            "humidity": np.full(count, np.nan) if humidity is None else humidity,
+            "condition": np.full(count, -1) if conditions is None else conditions,
+        }
+        keep = min(count, self.capacity)
+        with self._lock:
+            row = self._row(city)
+            if row is None:
+                return False
+            start = self._next[row]
+            slots = (start + np.arange(keep)) % self.capacity
+            for name, column in self._columns.items():
+                column[row, slots] = np.asarray(values[name])[count - keep:]
+            self._next[row] = (start + keep) % self.capacity
+        return True
+
+    def observations(self, city, since=None, until=None):
+        """Return city's observations in [since, until] as time-sorted column arrays"""
+        with self._lock:
+            row = self._rows.get(city)
+            if row is None:
+                return {name: np.empty(0, dtype) for name, dtype in _COLUMNS}
+            columns = {name: column[row].copy() for name, column in self._columns.items()}
+        times = columns["time"]
+        mask = ~np.isnan(times)
+        if since is not None:
+            mask &= times >= since
+        if until is not None:
+            mask &= times <= until
+        order = np.argsort(times[mask], kind="stable")
+        return {name: column[mask][order] for name, column in columns.items()}
+
+    def latest(self, city):
+        """Return (timestamp, temp) of city's newest observation, or None"""
+        times = self.observations(city)
+        if not len(times["time"]):
+            return None
+        return float(times["time"][-1]), float(times["temp"][-1])
+
+    def at(self, city, timestamp, tolerance=3 * 3600):
+        """Return the temp observed nearest timestamp, if within tolerance seconds"""
+        data = self.observations(city, timestamp - tolerance, timestamp + tolerance)
+        if not len(data["time"]):
+            return None
+        return float(data["temp"][np.argmin(np.abs(data["time"] - timestamp))])
+
+    def stats(self, city, since=None, until=None):
+        """Return count, min, max, mean, first, last and delta (last - first) of temps
+
+        None when city has no observations in the window.
+        """
+        data = self.observations(city, since, until)
+        temps = data["temp"]
+        if not len(temps):
+            return None
+        return {
+            "count": len(temps),
+            "since": float(data["time"][0]),
+            "until": float(data["time"][-1]),
+            "min": float(temps.min()),
+            "max": float(temps.max()),
+            "mean": float(temps.mean(dtype=np.float64)),
+            "first": float(temps[0]),
+            "last": float(temps[-1]),
+            "delta": float(temps[-1] - temps[0]),
+        }
+
+    def moving_average(self, city, window, since=None, until=None):
+        """Return (timestamps, mean temp over the window seconds ending at each)"""
+        data = self.observations(city, since, until)
+        times, temps = data["time"], data["temp"].astype(np.float64)
+        totals = np.concatenate([[0.0], np.cumsum(temps)])
+        starts = np.searchsorted(times, times - window, side="right")
+        ends = np.arange(1, len(times) + 1)
+        return times, (totals[ends] - totals[starts]) / (ends - starts)
+
+    def stats_all(self, since=None, until=None):
+        """Return {"cities", "count", "min", "max", "mean"} arrays over every city at once
+
+        Cities without observations in the window get NaN statistics.
+        """
+        with self._lock:
+            cities = list(self._rows)
+            rows = len(cities)
+            times = self._columns["time"][:rows].copy()
+            temps = self._columns["temp"][:rows].copy()
+        mask = ~np.isnan(times)
+        if since is not None:
+            mask &= times >= since
+        if until is not None:
+            mask &= times <= until
+        count = mask.sum(axis=1)
+        seen = count > 0
+        # Reductions with where= skip out-of-window slots without temporaries
+        total = temps.sum(axis=1, where=mask, dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+        return {
+            "cities": cities,
+            "count": count,
+            "min": np.where(seen, temps.min(axis=1, where=mask, initial=np.inf), np.nan),
+            "max": np.where(seen, temps.max(axis=1, where=mask, initial=-np.inf), np.nan),
+            "mean": np.where(seen, mean, np.nan),
+        }
+
+    @property
+    def nbytes(self):
+        """Bytes held by the ring buffers"""
+        return sum(column.nbytes for column in self._columns.values()) + self._next.nbytes
+
+    def __contains__(self, city):
+        return city in self._rows
+
+    def __len__(self):
+        return len(self._rows)
@@ -0,0 +1,163 @@
+"""Precompiled keyword intent matcher"""
+import re
+from functools import lru_cache
+
+# Keyword lists in priority order: when a prompt contains keywords of several
+# intents, the one listed first wins. Matching is by substring, so "now" also
+# matches "know" and "hi" matches "this". Keywords in DEFAULT_QUALIFIERS
+# additionally need one of their qualifying words.
+DEFAULT_INTENTS = (
+    ("trend", ("warmer", "colder", "cooler", "hotter", "yesterday")),
+    ("forecast", ("forecast", "tomorrow", "this week", "next few days")),
+    ("weather", ("weather", "temperature")),
+    ("news", ("news", "headlines", "latest")),
+    ("time", ("time", "clock", "now")),
+    ("math", ("calculate", "math", "+", "-", "*", "/")),
+    ("greeting", ("hello", "hi", "hey", "greetings")),
+    ("help", ("help", "capabilities", "what can you do")),
+)
+
+# Words that say a prompt is about the weather, matched as whole words
+WEATHER_WORDS = (
+    "weather", "temperature", "degrees", "rain", "rainy", "raining", "snow", "snowy", "snowing",
+    "sun", "sunny", "cloudy", "wind", "windy", "storm", "storms", "hot", "cold", "warm", "umbrella",
+)
+
+# Comparison words ask for a trend next to a weather word or a comparison
+COMPARISON_WORDS = WEATHER_WORDS + ("than", "yesterday", "today", "outside")
+
+# Keywords that only count when one of their qualifying words also occurs:
+# "was it cold yesterday" is a trend question, "headlines from yesterday" is
+# not, "is it warmer than yesterday" is but "news about a colder winter" is
+# not, and "news this week" is no forecast
+DEFAULT_QUALIFIERS = {
+    "warmer": COMPARISON_WORDS,
+    "colder": COMPARISON_WORDS,
+    "cooler": COMPARISON_WORDS,
+    "hotter": COMPARISON_WORDS,
+    "yesterday": WEATHER_WORDS,
+    "tomorrow": WEATHER_WORDS,
+    "this week": WEATHER_WORDS,
+    "next few days": WEATHER_WORDS,
+}
+
+
+def _trie_regex(words):
+    """Build a prefix-factored scanner for words
+
+    Each match consumes only the keyword's first character and checks the
+    rest in a lookahead, so scanning resumes at the next character and
+    overlapping keywords are all seen. An empty marker group closes every
+    keyword; the returned list maps group numbers to keywords. Longer
+    keywords are tried before the shorter ones they extend.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = word
+    groups = [None]
+    if not trie:
+        return "(?!)", groups
+
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if "" in node:
+            groups.append(node[""])
+            branches.append("()")
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    # Starting every branch with a literal lets re skip ahead quickly to
+    # characters that can begin a keyword
+    pattern = "|".join(
+        re.escape(char) + "(?=" + render(child) + ")"
+        for char, child in sorted(trie.items())
+    )
+    return pattern, groups
+
+
+@lru_cache(maxsize=32)
+def _compile(intents, qualifiers=()):
+    """Compile (intent, keywords) pairs into a scanner and per-group candidates
+
+    Each group maps to the (rank, qualifier search or None) pairs of the
+    keywords it stands for, best rank first. Shared by every matcher with
+    the same configuration, so building an agent does not recompile the
+    pattern.
+    """
+    keywords = {}
+    for rank, (_, words) in enumerate(intents):
+        for word in words:
+            keywords.setdefault(word, rank)
+    searches = {
+        word: re.compile(r"\b(?:" + "|".join(map(re.escape, needed)) + r")\b").search
+        for word, needed in qualifiers
+    }
+
+    # Only the longest keyword starting at a position is reported. Shorter
+    # ones starting there are its prefixes, so fold them in to keep "every
+    # keyword" semantics, down to the first one that needs no qualifier.
+    candidates = {}
+    for word in keywords:
+        folded = []
+        for rank, other in sorted((rank, other) for other, rank in keywords.items() if word.startswith(other)):
+            folded.append((rank, searches.get(other)))
+            if other not in searches:
+                break
+        candidates[word] = tuple(folded)
+    pattern, groups = _trie_regex(keywords)
+    group_candidates = [None] + [candidates[word] for word in groups[1:]]
+    return re.compile(pattern).finditer, tuple(group_candidates)
+
+
+class IntentMatcher:
+    """Finds every intent keyword in one scan and applies priority order"""
+
+    def __init__(self, intents=DEFAULT_INTENTS, qualifiers=DEFAULT_QUALIFIERS):
+        self._intents = [(name, tuple(words)) for name, words in intents]
+        self._qualifiers = tuple(sorted((word, tuple(needed)) for word, needed in qualifiers.items()))
+        self._recompile()
+
+    def register(self, intent, keywords, before=None):
+        """Add keywords for intent
+
+        A new intent is checked after all existing ones unless before names
+        the intent it should take priority over. Keywords added to an
+        existing intent keep that intent's priority.
+        """
+        keywords = [word for word in keywords if word]
+        names = self.names()
+        if intent in names:
+            index = names.index(intent)
+            name, words = self._intents[index]
+            self._intents[index] = (name, words + tuple(k for k in keywords if k not in words))
+        elif before is None:
+            self._intents.append((intent, tuple(keywords)))
+        else:
+            self._intents.insert(names.index(before), (intent, tuple(keywords)))
+        self._recompile()
+
+    def _recompile(self):
+        """Refresh the compiled scanner after a registration"""
+        self._finditer, self._group_candidates = _compile(tuple(self._intents), self._qualifiers)
+        self._names = self.names()
+
+    def names(self):
+        """Return intent names in priority order"""
+        return [name for name, _ in self._intents]
+
+    def match(self, text):
+        """Return the highest-priority intent whose keyword occurs in text"""
+        best = None
+        for match in self._finditer(text):
+            for rank, qualified in self._group_candidates[match.lastindex]:
+                if qualified is None or qualified(text):
+                    break
+            else:
+                continue
+            if rank == 0:
+                return self._names[0]
+            if best is None or rank < best:
+                best = rank
+        return None if best is None else self._names[best]
@@ -0,0 +1,145 @@
+"""JSON decoding for upstream answers with the fastest installed backend
+
+msgspec or orjson is used when installed, otherwise the stdlib json module.
+A Decoder can be given a schema of the fields the agent reads and returns
+only those; msgspec skips the rest while parsing, the other backends drop
+them afterwards. Anything a fast backend rejects (NaN, integers past 64
+bits, UTF-16 bodies) is retried with json, so every backend accepts the
+same documents, returns the same values and fails with the same
+DecodeError.
+"""
+import json
+from typing import Any, TypedDict
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fastest first
+BACKENDS = tuple(name for name, module in (("msgspec", msgspec), ("orjson", orjson), ("json", json)) if module)
+
+# Schemas: a dict keeps the listed keys, a one-item list applies its item to
+# every element and None keeps the value as it is
+WEATHER = {"dt": None, "main": {"temp": None, "humidity": None}, "weather": [{"id": None, "description": None}],
+           "message": None}
+WEATHER_GROUP = {"list": [dict(WEATHER, id=None)], "message": None}
+FORECAST = {"list": [{"dt": None, "main": {"temp_min": None, "temp_max": None},
+                      "weather": [{"id": None, "description": None}]}],
+            "city": {"timezone": None}, "message": None}
+NEWS = {"articles": [{"title": None}], "message": None}
+
+# orjson reads integers past 64 bits as floats; results holding a float this
+# large are decoded again by json, which also agrees on genuine big floats
+_ORJSON_INT_LIMIT = 2.0 ** 63
+
+
+class DecodeError(ValueError):
+    """Raised when an upstream body is not valid JSON"""
+
+
+def select(value, schema):
+    """Return the parts of a decoded value that schema lists
+
+    Values whose type does not match the schema are kept whole, so the
+    caller sees the same surprise it would have seen without a schema.
+    """
+    picker = _picker(schema)
+    return value if picker is None else picker(value)
+
+
+def _picker(schema, guard=False):
+    """Compile schema into a function selecting its parts, or None for "keep all"
+
+    With guard, every kept value is checked for floats orjson may have made
+    from integers past 64 bits, raising ValueError so json decodes again.
+    """
+    if schema is None:
+        return _guarded if guard else None
+    if isinstance(schema, dict):
+        fields = [(key, _picker(sub, guard)) for key, sub in schema.items()]
+
+        def pick(value):
+            if type(value) is not dict:
+                return _guarded(value) if guard else value
+            picked = {}
+            for key, sub in fields:
+                if key in value:
+                    picked[key] = value[key] if sub is None else sub(value[key])
+            return picked
+        return pick
+    item = _picker(schema[0], guard)
+
+    def pick_each(value):
+        if type(value) is not list:
+            return _guarded(value) if guard else value
+        return value if item is None else [item(element) for element in value]
+    return pick_each
+
+
+def _guarded(value):
+    """Return value unless it may hold an orjson-mangled integer"""
+    if _has_huge_float(value):
+        raise ValueError("integer may not fit in 64 bits")
+    return value
+
+
+def _has_huge_float(value):
+    """Whether value holds a float orjson may have made from a huge integer"""
+    if isinstance(value, float):
+        return abs(value) >= _ORJSON_INT_LIMIT
+    if isinstance(value, dict):
+        return any(_has_huge_float(item) for item in value.values())
+    if isinstance(value, list):
+        return any(_has_huge_float(item) for item in value)
+    return False
+
+
+def _keep(value):
+    return value
+
+
+def _typed(schema, name="Body"):
+    """Translate a schema into the type msgspec decodes it as"""
+    if schema is None:
+        return Any
+    if isinstance(schema, list):
+        return list[_typed(schema[0], name)]
+    fields = {key: _typed(sub, f"{name}_{key}") for key, sub in schema.items()}
+    return TypedDict(name, fields, total=False)
+
+
+class Decoder:
+    """Decodes JSON bodies, optionally down to a schema, with one backend"""
+
+    def __init__(self, schema=None, backend=None):
+        backend = backend or BACKENDS[0]
+        if backend not in BACKENDS:
+            raise ValueError(f"JSON backend {backend!r} is not installed (have {', '.join(BACKENDS)})")
+        self.schema = schema
+        self.backend = backend
+        self._pick = _picker(schema) or _keep
+        if backend == "msgspec":
+            self._fast = msgspec.json.Decoder(_typed(schema)).decode
+        elif backend == "orjson":
+            pick = _picker(schema, guard=True)
+            self._fast = lambda body: pick(orjson.loads(body))
+        else:
+            self._fast = None
+
+    def decode(self, body):
+        """Return the decoded (and selected) body, raising DecodeError if it is not JSON"""
+        if self._fast is not None:
+            try:
+                return self._fast(body)
+            except ValueError:
+                pass  # json decides, so odd documents are handled the same everywhere
+        try:
+            return self._pick(json.loads(body))
+        except ValueError:
+            raise DecodeError("upstream sent invalid JSON") from None
@@ -1,14 +1,82 @@
-import requests
-import json
 from datetime import datetime
 import re
 import os
+import sys
+import time
+
+from cache import MISSING, ResponseCache, TTLCache, normalize_key
+from gazetteer import UnknownPlace, default_gazetteer
+from intents import IntentMatcher
+from mathexpr import MathError, MathEvaluator, MathLimitError
+from metrics import EXCEPTION, INVALID, PARTIAL, SUCCESS, UPSTREAM_ERROR, Metrics, last_outcome
+from quota import QuotaExceededError, QuotaManager
+from refresh import BackgroundRefresher
+from resilience import CircuitOpenError
+from singleflight import SingleFlight
+from transport import HTTPTransport
+
+# Upstream roots, overridable (e.g. to point at stub_server.py) with
+# OPENWEATHER_BASE_URL / NEWS_BASE_URL or the constructor arguments
+WEATHER_BASE_URL = "http://api.openweathermap.org"
+NEWS_BASE_URL = "https://newsapi.org"
+
+# OpenWeather's group endpoint takes at most this many city IDs per request
+WEATHER_GROUP_SIZE = 20
+
+# Headlines shown per news answer, and read per topic when near-duplicates
+# are dropped so enough distinct stories are left
+NEWS_TITLES = 5
+NEWS_CANDIDATES = 20
+
+# Multi-topic news: most topics per prompt, headlines kept per topic and
+# seconds to wait for the slowest topic before answering with the rest
+NEWS_MAX_TOPICS = 5
+NEWS_PER_TOPIC = 3
+NEWS_DEADLINE = 2.0
+
+# What separates topics in "news about rust, python and ai"
+_TOPIC_SEPARATORS = re.compile(r"\s*(?:,|&|\band\b|\bor\b|\bplus\b)\s*")
+
+# Seconds respond() reuses a whole answer, per intent. Answers that depend
+# only on the prompt are kept until evicted; upstream-backed ones for less
+# than their upstream cache TTL; time and intents not listed are never kept.
+# Unknown prompts are not kept: the fallback answer costs nothing, and an
+# intent registered later must be able to answer them.
+FOREVER = float("inf")
+RESPONSE_TTLS = {
+    "math": FOREVER,
+    "greeting": FOREVER,
+    "help": FOREVER,
+    "weather": 60,
+    "trend": 60,
+    "forecast": 300,
+    "news": 60,
+}
+
+# Answers worth memoizing; errors are retried on the next ask
+_MEMOIZED_OUTCOMES = frozenset({SUCCESS, INVALID})
+
+# Days shown in a forecast answer
+FORECAST_DAYS = 5
+
+# Seconds in a day, and how far from exactly a day ago an observation may
+# be to count as "yesterday" in trend answers
+DAY = 86400
+TREND_TOLERANCE = 3 * 3600
 
 class SimpleAIAgent:
-    def __init__(self):
+    def __init__(self, transport=None, weather_cache=None, singleflight=None, verbose=True,
+                 news_cache=None, quota=None, cache_store=None, warm_start=0,
+                 weather_base_url=None, news_base_url=None, metrics=None, gazetteer=None,
+                 lean_news=False, json_backend=None, history=None, forecast_cache=None,
+                 dedupe_news=False, response_cache=None, resolve_unknown_places=False):
         # You'll need to get free API keys for these services
         self.weather_api_key = os.environ.get("OPENWEATHER_API_KEY")  # Get from openweathermap.org
         self.news_api_key = os.environ.get("NEWS_API_KEY")  # Get from newsapi.org
+        self.weather_base_url = (weather_base_url or os.environ.get("OPENWEATHER_BASE_URL")
+                                 or WEATHER_BASE_URL).rstrip("/")
+        self.news_base_url = (news_base_url or os.environ.get("NEWS_BASE_URL")
+                              or NEWS_BASE_URL).rstrip("/")
 
         # Agent's knowledge base
         self.capabilities = [
@@ -16,87 +84,727 @@ class SimpleAIAgent:
             "get news",
             "tell time",
             "simple math",
-            "greet user"
+            "greet user",
+            "compare weather with yesterday",
+            "daily forecasts"
         ]
+
+        # Keyword intent detection, compiled once; extractors produce the
+        # data passed on to execute_action, handlers serve plugged-in intents
+        self.intents = IntentMatcher()
+        self.intent_extractors = {
+            "weather": self.extract_location,
+            "trend": self.extract_location,
+            "forecast": self.extract_location,
+            "news": self.extract_news_topics,
+            "math": lambda text: text,
+        }
+        self.intent_handlers = {}
+
+        # Arithmetic for the math intent, bounded so no input can run away
+        self.math = MathEvaluator()
+
+        # Known city names; the bundled one is loaded on first use
+        self._gazetteer = gazetteer
+
+        # respond() echoes each exchange to stdout unless this is False
+        self.verbose = verbose
+
+        # Stage timings and outcomes; pass Metrics(enabled=False) to turn off
+        self.metrics = metrics or Metrics()
+
+        # Pooled keep-alive sessions, one per upstream host
+        self.transport = transport or HTTPTransport()
+
+        # Recent weather reports keyed by normalized location; unknown
+        # locations are remembered for the shorter negative TTL. Expired
+        # reports are still served during the grace window while a
+        # background refresh fetches a new one.
+        if weather_cache is None:
+            weather_cache = TTLCache(maxsize=1024, ttl=600, negative_ttl=60, grace=300)
+        self.weather_cache = weather_cache
+
+        # Daily forecast summaries keyed by normalized location and shared by
+        # everyone asking; OpenWeather recomputes forecasts every few hours
+        if forecast_cache is None:
+            forecast_cache = TTLCache(maxsize=1024, ttl=1800, negative_ttl=60, grace=600)
+        self.forecast_cache = forecast_cache
+
+        # Upstream bodies are decoded straight to the fields the agent reads,
+        # with the fastest installed JSON backend unless one is named; the
+        # decoders are built by the first upstream call (see _decoder)
+        self.json_backend = json_backend
+        self._decoders = {}
+
+        # Every weather observation fetched, per location, for trend
+        # questions; the default store is created by the first one
+        self._history = history
+
+        # Lean mode asks NewsAPI for only the articles shown and decodes
+        # just their titles (see newsparse)
+        self.lean_news = lean_news
+
+        # Dedup mode reads a larger page of candidates and drops syndicated
+        # near-duplicates before picking the headlines shown (see dedup)
+        self.dedupe_news = dedupe_news
+
+        # Place names the gazetteer does not know are refused locally unless
+        # this asks OpenWeather to resolve them (a 404 is negatively cached)
+        self.resolve_unknown_places = resolve_unknown_places
+
+        # Recent headline lists keyed by normalized topic
+        if news_cache is None:
+            news_cache = TTLCache(maxsize=256, ttl=300, grace=300)
+        self.news_cache = news_cache
+
+        # Whole answers by prompt, checked before intent detection
+        if response_cache is None:
+            response_cache = ResponseCache(RESPONSE_TTLS)
+        self.response_cache = response_cache
+
+        # Optional on-disk store (e.g. cache_store.SQLiteCacheStore) shared
+        # between worker processes; both caches read and write through it
+        self.cache_store = cache_store
+        if cache_store is not None:
+            self.weather_cache.attach(cache_store, "weather")
+            self.forecast_cache.attach(cache_store, "forecast")
+            self.news_cache.attach(cache_store, "news")
+            if warm_start:
+                self.warm_start(warm_start)
+
+        # Client-side token buckets per API key and endpoint
+        self.quota = quota or QuotaManager()
+
+        # Concurrent identical fetches share one upstream request
+        self.singleflight = singleflight or SingleFlight()
+        self.refresher = BackgroundRefresher(self.singleflight)
+
+    def warm_start(self, limit):
+        """Drop expired rows and preload the hottest stored answers"""
+        self.cache_store.sweep()
+        return {
+            "weather": self.weather_cache.preload(limit),
+            "forecast": self.forecast_cache.preload(limit),
+            "news": self.news_cache.preload(limit),
+        }
+
+    def start_background_refresh(self, top_k=50, interval=30.0, lead=60.0):
+        """Refresh the top_k most requested locations/topics before they expire
+
+        Every interval seconds, hot entries expiring within lead seconds are
+        refetched in the background, so popular lookups stay cache hits.
+        main() starts this in --serve mode; library callers with a
+        long-lived agent call it themselves, once.
+        """
+        def refresh_hot_keys():
+            for key in self.weather_cache.hot_keys(top_k, lead):
+                self._refresh_weather(key)
+            for key in self.forecast_cache.hot_keys(top_k, lead):
+                self._refresh_forecast(key)
+            for key in self.news_cache.hot_keys(top_k, lead):
+                self._refresh_news(key)
+
+        self.refresher.schedule(refresh_hot_keys, interval)
+
+    def close(self):
+        """Release pooled upstream connections"""
+        self.refresher.close()
+        self.transport.close()
+        if self.cache_store is not None:
+            for cache in (self.weather_cache, self.forecast_cache, self.news_cache):
+                cache.flush_reads()
+            self.cache_store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
     
     def process_input(self, user_input):
         """Process user input and determine intent"""
-        user_input = user_input.lower().strip()
-        
-        # Simple intent detection using keywords
-        if any(word in user_input for word in ["weather", "temperature", "forecast"]):
-            return "weather", self.extract_location(user_input)
-        elif any(word in user_input for word in ["news", "headlines", "latest"]):
-            return "news", self.extract_topic(user_input)
-        elif any(word in user_input for word in ["time", "clock", "now"]):
-            return "time", None
-        elif any(word in user_input for word in ["calculate", "math", "+", "-", "*", "/"]):
-            return "math", user_input
-        elif any(word in user_input for word in ["hello", "hi", "hey", "greetings"]):
-            return "greeting", None
-        elif any(word in user_input for word in ["help", "capabilities", "what can you do"]):
-            return "help", None
-        else:
-            return "unknown", user_input
+        with self.metrics.timer("intent"):
+            user_input = user_input.lower().strip()
+
+            # Simple intent detection using keywords, found in a single pass
+            intent = self.intents.match(user_input)
+            if intent is None:
+                return "unknown", user_input
+            extract = self.intent_extractors.get(intent)
+            return intent, extract(user_input) if extract else None
+
+    def register_intent(self, intent, keywords, handler=None, extract=None, before=None):
+        """Teach the agent a new intent (or more keywords for an existing one)
+
+        handler(data) produces the response and extract(text) the data it
+        receives. The intent is checked after the built-in ones unless
+        before names the intent it should take priority over. Memoized
+        answers are dropped, since the new intent may answer them differently.
+        """
+        self.intents.register(intent, keywords, before=before)
+        self.response_cache.clear()
+        if handler is not None:
+            self.intent_handlers[intent] = handler
+        if extract is not None:
+            self.intent_extractors[intent] = extract
     
+    @property
+    def gazetteer(self):
+        if self._gazetteer is None:
+            self._gazetteer = default_gazetteer()
+        return self._gazetteer
+
+    @property
+    def history(self):
+        """The WeatherHistory behind trend answers, or None without NumPy"""
+        if self._history is None:
+            # NumPy is only needed once there are observations to keep
+            try:
+                from history import WeatherHistory
+            except ImportError:
+                self._history = False  # weather still works; trends are off
+            else:
+                self._history = WeatherHistory()
+        return None if self._history is False else self._history
+
     def extract_location(self, text):
-        """Extract location from weather request"""
-        # Simple regex to find city names (this is basic - real agents use NLP)
-        words = text.split()
-        # Look for words after "in" or "for"
-        for i, word in enumerate(words):
-            if word in ["in", "for"] and i + 1 < len(words):
-                return words[i + 1].title()
-        return "London"  # Default location
+        """Extract location from weather request
+
+        Known places (multi-word and alternate names included) come back
+        under their canonical name. An unknown name after "in"/"for" comes
+        back as an UnknownPlace, which the lookups refuse without an
+        upstream call, or as plain text for OpenWeather to resolve when
+        resolve_unknown_places is set.
+        """
+        place = self.gazetteer.locate(text)
+        if place is None:
+            return "London"  # Default location
+        if isinstance(place, UnknownPlace):
+            return str(place) if self.resolve_unknown_places else place
+        return place.name
     
     def extract_topic(self, text):
-        """Extract topic from news request"""
+        """Extract topic from news request (the first one, see extract_topics)"""
+        return self.extract_topics(text)[0]
+
+    def extract_topics(self, text):
+        """Extract every topic from a news request, e.g. "news about rust and python"
+
+        Returns up to NEWS_MAX_TOPICS distinct topics, the first word after
+        each separator without its punctuation, or ["general"] when none is
+        named.
+        """
         words = text.split()
         for i, word in enumerate(words):
             if word in ["about", "on"] and i + 1 < len(words):
-                return words[i + 1]
-        return "general"  # Default topic
+                topics, seen = [], set()
+                for part in _TOPIC_SEPARATORS.split(" ".join(words[i + 1:])):
+                    topic = part.split()[0].strip(".?!;:") if part.split() else ""
+                    if topic and normalize_key(topic) not in seen:
+                        seen.add(normalize_key(topic))
+                        topics.append(topic)
+                return topics[:NEWS_MAX_TOPICS] or ["general"]
+        return ["general"]
+
+    def extract_news_topics(self, text):
+        """News extractor: one topic as a string, several as a tuple"""
+        topics = self.extract_topics(text)
+        if len(topics) > 1:
+            return tuple(topics)
+        return topics[0]
     
     def get_weather(self, location):
         """Fetch weather data"""
-        try:
-            url = f"http://api.openweathermap.org/data/2.5/weather?q={location}&appid={self.weather_api_key}&units=metric"
-            response = requests.get(url)
-            data = response.json()
-            
-            if response.status_code == 200:
-                temp = data['main']['temp']
-                description = data['weather'][0]['description']
-                return f"Weather in {location}: {temp}°C, {description}"
-            else:
-                return f"Sorry, I couldn't get weather data for {location}"
-        except:
-            return "Weather service is currently unavailable"
+        if isinstance(location, UnknownPlace):
+            return self._unknown_place(location)
+        key = normalize_key(location)
+        report, fresh = self.weather_cache.lookup(key)
+        if report is MISSING:
+            try:
+                report = self.singleflight.do(
+                    ("weather", key), lambda: self._fetch_weather(location, key))
+            except QuotaExceededError:
+                # Out of budget: fall back to the last answer we had, if any
+                report = self.weather_cache.get_stale(key)
+                if report is MISSING:
+                    self.metrics.count("weather", UPSTREAM_ERROR)
+                    return "Weather lookups are paused to stay within the API quota. Please try again shortly."
+            except CircuitOpenError:
+                self.metrics.count("weather", UPSTREAM_ERROR)
+                return "Weather service is currently unavailable"
+            except Exception:
+                self.metrics.count("weather", EXCEPTION)
+                return "Weather service is currently unavailable"
+        elif not fresh:
+            self._refresh_weather(key)
+        return self._answer_weather(location, report)
+
+    def get_weather_many(self, locations, max_workers=8):
+        """Fetch weather for many locations, returning get_weather's answers in order
+
+        Cached cities are answered from the cache. The rest are resolved to
+        city IDs through the gazetteer (OpenWeather IDs are GeoNames IDs)
+        and fetched WEATHER_GROUP_SIZE at a time from the group endpoint,
+        which fills the per-city cache. Unknown places are refused as in
+        get_weather. Names without a city ID (countries, regions, unknown
+        places resolved upstream), cities missing from a group answer and
+        failed group requests fall back to concurrent get_weather calls.
+        """
+        answers = [None] * len(locations)
+        keys_by_id = {}
+        for index, location in enumerate(locations):
+            if isinstance(location, UnknownPlace):
+                answers[index] = self._unknown_place(location)
+                continue
+            key = normalize_key(location)
+            report, fresh = self.weather_cache.lookup(key)
+            if report is MISSING:
+                place = self.gazetteer.lookup(key)
+                if place is not None and place.kind == "city":
+                    keys = keys_by_id.setdefault(place.geonameid, [])
+                    if key not in keys:
+                        keys.append(key)
+                continue
+            if not fresh:
+                self._refresh_weather(key)
+            answers[index] = self._answer_weather(location, report)
+
+        ids = list(keys_by_id)
+        for start in range(0, len(ids), WEATHER_GROUP_SIZE):
+            try:
+                self._fetch_weather_group(ids[start:start + WEATHER_GROUP_SIZE], keys_by_id)
+            except Exception:
+                pass  # those cities are fetched one by one below
+
+        # Whatever is still unanswered is in the cache now, or needs its own request
+        remaining = [index for index, answer in enumerate(answers) if answer is None]
+        if len(remaining) <= 1 or max_workers <= 1:
+            for index in remaining:
+                answers[index] = self.get_weather(locations[index])
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(remaining))) as pool:
+                for index, answer in zip(remaining, pool.map(self.get_weather, [locations[i] for i in remaining])):
+                    answers[index] = answer
+        return answers
+
+    def _fetch_weather_group(self, ids, keys_by_id):
+        """Fetch up to WEATHER_GROUP_SIZE cities in one call and cache each"""
+        self.quota.acquire(self.weather_api_key, "weather")
+        with self.metrics.timer("upstream"):
+            response = self.transport.get(self._weather_group_url(ids))
+        with self.metrics.timer("decode"):
+            data = self._decoder("weather_group").decode(response.content)
+        if response.status_code != 200:
+            return
+        for city in data.get('list', []):
+            for key in keys_by_id.get(city.get('id'), ()):
+                self._store_weather(key, 200, city)
+
+    def _decoder(self, name):
+        """Return the JSON decoder for an upstream answer, building it on first use"""
+        decoder = self._decoders.get(name)
+        if decoder is None:
+            # Loading a JSON backend is upstream work, so offline prompts skip it
+            import jsonbackend
+            schema = {"weather": jsonbackend.WEATHER, "weather_group": jsonbackend.WEATHER_GROUP,
+                      "forecast": jsonbackend.FORECAST, "news": jsonbackend.NEWS}[name]
+            decoder = self._decoders[name] = jsonbackend.Decoder(schema, self.json_backend)
+        return decoder
+
+    def _weather_group_url(self, ids):
+        """Build the OpenWeather multi-city URL for a list of city IDs"""
+        id_list = ",".join(str(city_id) for city_id in ids)
+        return f"{self.weather_base_url}/data/2.5/group?id={id_list}&appid={self.weather_api_key}&units=metric"
+
+    def _unknown_place(self, location, intent="weather"):
+        """Answer for a place the gazetteer does not know, without an upstream call"""
+        self.metrics.count(intent, INVALID)
+        return f"Sorry, I don't know a place called {location}"
+
+    def _refresh_weather(self, key):
+        """Refetch a cached location in the background"""
+        # Normalized keys are valid OpenWeather queries (matching is case-insensitive)
+        self.refresher.submit(("weather", key), lambda: self._fetch_weather(key, key))
+
+    def _fetch_weather(self, location, key):
+        """Call OpenWeather and cache its answer"""
+        self.quota.acquire(self.weather_api_key, "weather")
+        with self.metrics.timer("upstream"):
+            response = self.transport.get(self._weather_url(location))
+        with self.metrics.timer("decode"):
+            data = self._decoder("weather").decode(response.content)
+        return self._store_weather(key, response.status_code, data)
+
+    def _weather_url(self, location):
+        """Build the OpenWeather current-conditions URL for a location"""
+        return f"{self.weather_base_url}/data/2.5/weather?q={location}&appid={self.weather_api_key}&units=metric"
+
+    def _store_weather(self, key, status_code, data):
+        """Cache an upstream weather answer and return its report"""
+        if status_code == 200:
+            report = {
+                "temp": data['main']['temp'],
+                "description": data['weather'][0]['description'],
+            }
+            self.weather_cache.set(key, report)
+            history = self.history
+            if history is not None:
+                history.record(key, data.get('dt') or time.time(), report["temp"],
+                               data['main'].get('humidity'), data['weather'][0].get('id'))
+            return report
+        if status_code == 404:
+            self.weather_cache.set_negative(key)
+        return None
+
+    def _answer_weather(self, location, report):
+        """Count a weather lookup's outcome and render its report"""
+        self.metrics.count("weather", UPSTREAM_ERROR if report is None else SUCCESS)
+        with self.metrics.timer("format"):
+            return self._format_weather(location, report)
+
+    def _format_weather(self, location, report):
+        """Render a weather report (None means the location is unknown)"""
+        if report is None:
+            return f"Sorry, I couldn't get weather data for {location}"
+        return f"Weather in {location}: {report['temp']}°C, {report['description']}"
     
+    def get_forecast(self, location):
+        """Fetch a daily forecast summary"""
+        if isinstance(location, UnknownPlace):
+            return self._unknown_place(location, "forecast")
+        key = normalize_key(location)
+        report, fresh = self.forecast_cache.lookup(key)
+        if report is MISSING:
+            try:
+                report = self.singleflight.do(
+                    ("forecast", key), lambda: self._fetch_forecast(location, key))
+            except QuotaExceededError:
+                report = self.forecast_cache.get_stale(key)
+                if report is MISSING:
+                    self.metrics.count("forecast", UPSTREAM_ERROR)
+                    return "Forecast lookups are paused to stay within the API quota. Please try again shortly."
+            except CircuitOpenError:
+                self.metrics.count("forecast", UPSTREAM_ERROR)
+                return "Forecast service is currently unavailable"
+            except Exception:
+                self.metrics.count("forecast", EXCEPTION)
+                return "Forecast service is currently unavailable"
+        elif not fresh:
+            self._refresh_forecast(key)
+        return self._answer_forecast(location, report)
+
+    def get_forecast_many(self, locations, max_workers=8):
+        """Fetch forecasts for many locations, returning get_forecast's answers in order
+
+        Cached cities are answered from the cache. The rest are downloaded
+        concurrently and all their slots are reduced to daily summaries in
+        one summarize_many() call, so a digest of many cities pays for the
+        aggregation once. Cities whose download failed fall back to
+        get_forecast for its error handling.
+        """
+        answers = [None] * len(locations)
+        pending = {}  # key -> (location as first asked, indexes)
+        for index, location in enumerate(locations):
+            if isinstance(location, UnknownPlace):
+                answers[index] = self._unknown_place(location, "forecast")
+                continue
+            key = normalize_key(location)
+            report, fresh = self.forecast_cache.lookup(key)
+            if report is MISSING:
+                pending.setdefault(key, (location, []))[1].append(index)
+                continue
+            if not fresh:
+                self._refresh_forecast(key)
+            answers[index] = self._answer_forecast(location, report)
+        if not pending:
+            return answers
+
+        def download(location):
+            try:
+                return self._download_forecast(location)
+            except Exception:
+                return None, None
+
+        keys = list(pending)
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as pool:
+            downloads = list(pool.map(download, [pending[key][0] for key in keys]))
+        stored = [(key, status, data) for key, (status, data) in zip(keys, downloads) if status is not None]
+        reports = dict(zip((key for key, _, _ in stored), self._store_forecasts(stored)))
+        for key in keys:
+            location, indexes = pending[key]
+            for index in indexes:
+                if reports.get(key) is None:
+                    answers[index] = self.get_forecast(locations[index])
+                else:
+                    answers[index] = self._answer_forecast(locations[index], reports[key])
+        return answers
+
+    def _refresh_forecast(self, key):
+        """Refetch a cached forecast in the background"""
+        self.refresher.submit(("forecast", key), lambda: self._fetch_forecast(key, key))
+
+    def _fetch_forecast(self, location, key):
+        """Call the forecast endpoint and cache its daily summary"""
+        status_code, data = self._download_forecast(location)
+        return self._store_forecasts([(key, status_code, data)])[0]
+
+    def _download_forecast(self, location):
+        """Return (status code, decoded body) of a 5-day/3-hour forecast"""
+        # Forecasts spend the same OpenWeather key as current conditions
+        self.quota.acquire(self.weather_api_key, "weather")
+        with self.metrics.timer("upstream"):
+            response = self.transport.get(self._forecast_url(location))
+        with self.metrics.timer("decode"):
+            return response.status_code, self._decoder("forecast").decode(response.content)
+
+    def _forecast_url(self, location):
+        """Build the OpenWeather 5-day/3-hour forecast URL for a location"""
+        return f"{self.weather_base_url}/data/2.5/forecast?q={location}&appid={self.weather_api_key}&units=metric"
+
+    def _store_forecasts(self, answers):
+        """Summarize (key, status code, body) forecast answers in one batch and cache them
+
+        Returns each answer's report, None for errors.
+        """
+        from forecast import summarize_many
+        with self.metrics.timer("aggregate"):
+            summaries = iter(summarize_many([data for _, status, data in answers if status == 200]))
+        reports = []
+        for key, status_code, data in answers:
+            report = None
+            if status_code == 200:
+                report = {"days": next(summaries)[:FORECAST_DAYS]}
+                self.forecast_cache.set(key, report)
+            elif status_code == 404:
+                self.forecast_cache.set_negative(key)
+            reports.append(report)
+        return reports
+
+    def _answer_forecast(self, location, report):
+        """Count a forecast lookup's outcome and render its report"""
+        self.metrics.count("forecast", SUCCESS if report else UPSTREAM_ERROR)
+        with self.metrics.timer("format"):
+            return self._format_forecast(location, report)
+
+    def _format_forecast(self, location, report):
+        """Render daily summaries as one line per day"""
+        if not report or not report["days"]:
+            return f"Sorry, I couldn't get a forecast for {location}"
+        lines = [
+            f"• {datetime.strptime(day['date'], '%Y-%m-%d'):%a %d %b}: "
+            f"{day['low']:.0f} to {day['high']:.0f}°C, {day['description']}"
+            for day in report["days"]
+        ]
+        return f"Forecast for {location}:\n" + "\n".join(lines)
+
     def get_news(self, topic):
         """Fetch news headlines"""
-        try:
-            if topic == "general":
-                url = f"https://newsapi.org/v2/top-headlines?country=us&apiKey={self.news_api_key}"
-            else:
-                url = f"https://newsapi.org/v2/everything?q={topic}&apiKey={self.news_api_key}&sortBy=popularity"
-            
-            response = requests.get(url, verify=False)
-            data = response.json()
-            
-            if response.status_code == 200 and 'articles' in data and data['articles']:
-                headlines = []
-                for article in data['articles'][:5]:  # Get top 5
-                    headlines.append(f"• {article['title']}")
-                return f"Latest news about {topic}:\n" + "\n".join(headlines)
-            else:
-                if 'message' in data:
-                    return f"News API Error: {data['message']}"
-                else:
-                    return f"Sorry, I couldn't find news about {topic}. Status code: {response.status_code}"
-        except Exception as e:
-            return f"News service error: {str(e)}"
+        key = normalize_key(topic)
+        report, fresh = self.news_cache.lookup(key)
+        if report is MISSING:
+            try:
+                report = self.singleflight.do(
+                    ("news", key), lambda: self._fetch_news(topic, key))
+            except QuotaExceededError:
+                report = self.news_cache.get_stale(key)
+                if report is MISSING:
+                    self.metrics.count("news", UPSTREAM_ERROR)
+                    return "News lookups are paused to stay within the API quota. Please try again later."
+            except CircuitOpenError:
+                self.metrics.count("news", UPSTREAM_ERROR)
+                return "News service is currently unavailable"
+            except Exception as e:
+                self.metrics.count("news", EXCEPTION)
+                return f"News service error: {str(e)}"
+        elif not fresh:
+            self._refresh_news(key)
+        return self._answer_news(topic, report)
+
+    def get_news_many(self, topics, deadline=NEWS_DEADLINE, per_topic=NEWS_PER_TOPIC):
+        """Fetch several topics concurrently and merge their headlines into one answer
+
+        Cached topics are answered from the cache; the rest are fetched in
+        parallel and waited for at most deadline seconds in total. Topics
+        that time out or fail are left out of the answer (a late fetch still
+        fills the cache for next time) so one slow query cannot sink the
+        others. See _merge_news for the ranking.
+        """
+        reports, pending = self._cached_news(topics)
+        if pending:
+            from concurrent.futures import ThreadPoolExecutor, wait
+            pool = ThreadPoolExecutor(max_workers=len(pending))
+            futures = {
+                pool.submit(self.singleflight.do, ("news", key),
+                            lambda topic=topic, key=key: self._fetch_news(topic, key)): topic
+                for topic, key in pending.items()
+            }
+            done, _ = wait(futures, timeout=deadline)
+            # Don't block on stragglers; their threads exit when the call returns
+            pool.shutdown(wait=False)
+            for future in done:
+                if future.exception() is None:
+                    reports[futures[future]] = future.result()
+        return self._answer_news_many(topics, reports, per_topic)
+
+    def _cached_news(self, topics):
+        """Split topics into ({topic: cached report}, {topic: key} still to fetch)"""
+        reports, pending = {}, {}
+        for topic in topics:
+            key = normalize_key(topic)
+            report, fresh = self.news_cache.lookup(key)
+            if report is MISSING:
+                pending[topic] = key
+                continue
+            if not fresh:
+                self._refresh_news(key)
+            reports[topic] = report
+        return reports, pending
+
+    def _answer_news_many(self, topics, reports, per_topic):
+        """Count a multi-topic lookup's outcome and render the merged headlines"""
+        merged = self._merge_news(topics, reports, per_topic)
+        if self.dedupe_news and merged:
+            # The same wire story often turns up under several topics
+            from dedup import dedupe
+            distinct = set(dedupe([title for _, title in merged]))
+            merged = [(topic, title) for topic, title in merged if title in distinct]
+        missing = [topic for topic in topics if 'titles' not in reports.get(topic, {})]
+        # Partial answers are not memoized, so asking again picks up late topics
+        self.metrics.count("news", UPSTREAM_ERROR if not merged else PARTIAL if missing else SUCCESS)
+        with self.metrics.timer("format"):
+            subject = ", ".join(topics[:-1]) + f" and {topics[-1]}"
+            if not merged:
+                return f"Sorry, I couldn't get news about {subject} right now"
+            lines = [f"• [{topic}] {title}" for topic, title in merged]
+            if missing:
+                lines.append(f"(no headlines about {', '.join(missing)} right now)")
+            return f"Latest news about {subject}:\n" + "\n".join(lines)
+
+    @staticmethod
+    def _merge_news(topics, reports, per_topic):
+        """Merge per-topic headlines into one ranked list of (topic, title)
+
+        NewsAPI ranks each topic's articles by popularity, so the merge takes
+        every topic's first headline, then every second one and so on, up to
+        per_topic each. A headline found under several topics is kept once.
+        """
+        ranked = [(topic, reports[topic]['titles'][:per_topic])
+                  for topic in topics if 'titles' in reports.get(topic, {})]
+        merged, seen = [], set()
+        for rank in range(per_topic):
+            for topic, titles in ranked:
+                if rank < len(titles) and titles[rank] not in seen:
+                    seen.add(titles[rank])
+                    merged.append((topic, titles[rank]))
+        return merged
+
+    def _refresh_news(self, key):
+        """Refetch a cached topic in the background"""
+        self.refresher.submit(("news", key), lambda: self._fetch_news(key, key))
+
+    def _fetch_news(self, topic, key):
+        """Call NewsAPI and cache its answer"""
+        self.quota.acquire(self.news_api_key, "news")
+        with self.metrics.timer("upstream"):
+            response = self.transport.get(self._news_url(topic), verify=False)
+        with self.metrics.timer("decode"):
+            data = self._decode_news(response)
+        return self._store_news(key, response.status_code, data)
+
+    def _news_url(self, topic):
+        """Build the NewsAPI URL for a topic"""
+        page = f"&pageSize={self._news_page_size()}" if self.lean_news else ""
+        if topic == "general":
+            return f"{self.news_base_url}/v2/top-headlines?country=us&apiKey={self.news_api_key}{page}"
+        return f"{self.news_base_url}/v2/everything?q={topic}&apiKey={self.news_api_key}&sortBy=popularity{page}"
+
+    def _news_page_size(self):
+        """Articles to request and read per topic"""
+        return NEWS_CANDIDATES if self.dedupe_news else NEWS_TITLES
+
+    def _decode_news(self, response):
+        """Decode a NewsAPI answer; in lean mode only the shown titles are read"""
+        if self.lean_news and response.status_code == 200:
+            from newsparse import first_titles
+            titles = first_titles(response.content, self._news_page_size())
+            if titles is not None:
+                return {"articles": [{"title": title} for title in titles]}
+        return self._decoder("news").decode(response.content)
+
+    def _store_news(self, key, status_code, data):
+        """Cache a NewsAPI answer with articles and return its report"""
+        if status_code == 200 and 'articles' in data and data['articles']:
+            titles = [article['title'] for article in data['articles'][:self._news_page_size()]]
+            if self.dedupe_news:
+                from dedup import dedupe
+                titles = dedupe(titles, limit=NEWS_TITLES)
+            report = {"titles": titles[:NEWS_TITLES]}
+            self.news_cache.set(key, report)
+            return report
+        report = {"status": status_code}
+        if 'message' in data:
+            report["message"] = data['message']
+        return report
+
+    def _answer_news(self, topic, report):
+        """Count a news lookup's outcome and render its report"""
+        self.metrics.count("news", SUCCESS if 'titles' in report else UPSTREAM_ERROR)
+        with self.metrics.timer("format"):
+            return self._format_news(topic, report)
+
+    def _format_news(self, topic, report):
+        """Render a news report as a headline list or an error"""
+        if 'titles' in report:
+            headlines = [f"• {title}" for title in report['titles']]
+            return f"Latest news about {topic}:\n" + "\n".join(headlines)
+        elif 'message' in report:
+            return f"News API Error: {report['message']}"
+        else:
+            return f"Sorry, I couldn't find news about {topic}. Status code: {report['status']}"
+
+    def remaining_quota(self):
+        """Report how many upstream requests each API key may still make"""
+        # Make sure both configured keys show up even before their first call
+        self.quota.bucket(self.weather_api_key, "weather")
+        self.quota.bucket(self.news_api_key, "news")
+        return self.quota.remaining()
     
+    def get_trend(self, location):
+        """Compare the current temperature in location with yesterday's"""
+        if isinstance(location, UnknownPlace):
+            return self._unknown_place(location, "trend")
+        return self._answer_trend(location, self.get_weather(location))
+
+    def _answer_trend(self, location, weather):
+        """Answer a trend question from the history, given the weather answer just made"""
+        if self.history is None:
+            self.metrics.count("trend", EXCEPTION)
+            return f"{weather}\n(Comparing with yesterday needs NumPy, which is not installed)"
+        key = normalize_key(location)
+        latest = self.history.latest(key)
+        if latest is None:
+            # The weather lookup failed and nothing was ever observed
+            self.metrics.count("trend", UPSTREAM_ERROR)
+            return weather
+        self.metrics.count("trend", SUCCESS)
+        now, temp = latest
+        yesterday = self.history.at(key, now - DAY, tolerance=TREND_TOLERANCE)
+        if yesterday is not None:
+            change = temp - yesterday
+            comparison = ("about as warm as" if abs(change) < 0.5
+                          else f"{abs(change):.1f}°C {'warmer' if change > 0 else 'colder'} than")
+            return (f"{location} is {comparison} yesterday: {temp:.1f}°C now, "
+                    f"{yesterday:.1f}°C this time yesterday")
+        stats = self.history.stats(key, since=now - DAY)
+        if stats["count"] < 2:
+            return f"I don't have earlier weather for {location} yet; it's {temp:.1f}°C now"
+        hours = (now - stats["since"]) / 3600
+        return (f"I don't have yesterday's weather for {location} yet. Over the last {hours:.0f}h "
+                f"it ranged {stats['min']:.1f}-{stats['max']:.1f}°C (mean {stats['mean']:.1f}°C); "
+                f"it's {temp:.1f}°C now")
+
     def get_time(self):
         """Get current time"""
         now = datetime.now()
@@ -104,15 +812,25 @@ class SimpleAIAgent:
     
     def do_math(self, expression):
         """Simple calculator"""
-        try:
-            # Extract numbers and operators (basic security - don't eval arbitrary code!)
-            if re.match(r'^[\d\+\-\*\/\.\s\(\)]+$', expression):
-                result = eval(expression)
-                return f"Result: {result}"
-            else:
-                return "Sorry, I can only do basic math operations"
-        except:
-            return "Sorry, I couldn't calculate that"
+        with self.metrics.timer("math"):
+            try:
+                # Only numbers and operators reach the evaluator
+                if re.match(r'^[\d\+\-\*\/\.\s\(\)]+$', expression):
+                    result = self.math.evaluate(expression)
+                    self.metrics.count("math", SUCCESS)
+                    return f"Result: {result}"
+                else:
+                    self.metrics.count("math", INVALID)
+                    return "Sorry, I can only do basic math operations"
+            except MathLimitError as e:
+                self.metrics.count("math", INVALID)
+                return f"Sorry, I couldn't calculate that: {e}"
+            except MathError:
+                self.metrics.count("math", INVALID)
+                return "Sorry, I couldn't calculate that"
+            except ArithmeticError:
+                self.metrics.count("math", EXCEPTION)
+                return "Sorry, I couldn't calculate that"
     
     def greet_user(self):
         """Friendly greeting"""
@@ -124,40 +842,166 @@ class SimpleAIAgent:
     
     def execute_action(self, intent, data):
         """Execute the determined action"""
-        if intent == "weather":
-            return self.get_weather(data)
-        elif intent == "news":
-            return self.get_news(data)
-        elif intent == "time":
-            return self.get_time()
-        elif intent == "math":
-            return self.do_math(data)
-        elif intent == "greeting":
-            return self.greet_user()
-        elif intent == "help":
-            return self.show_help()
-        else:
-            return "I'm not sure how to help with that. Try asking about weather, news, time, or math!"
+        with self.metrics.timer("execute"):
+            # Weather, trend, forecast, news and math count their own outcomes
+            if intent == "weather":
+                return self.get_weather(data)
+            elif intent == "trend":
+                return self.get_trend(data)
+            elif intent == "forecast":
+                return self.get_forecast(data)
+            elif intent == "news" and isinstance(data, tuple):
+                return self.get_news_many(data)
+            elif intent == "news":
+                return self.get_news(data)
+            elif intent == "math":
+                return self.do_math(data)
+            elif intent == "time":
+                response = self.get_time()
+            elif intent == "greeting":
+                response = self.greet_user()
+            elif intent == "help":
+                response = self.show_help()
+            elif intent in self.intent_handlers:
+                try:
+                    response = self.intent_handlers[intent](data)
+                except Exception:
+                    self.metrics.count(intent, EXCEPTION)
+                    raise
+            else:
+                self.metrics.count("unknown", INVALID)
+                return "I'm not sure how to help with that. Try asking about weather, news, time, or math!"
+            self.metrics.count(intent, SUCCESS)
+            return response
     
     def respond(self, user_input):
         """Main method to process input and generate response"""
-        print(f"User: {user_input}")
-        
-        # Step 1: Process input and determine intent
-        intent, data = self.process_input(user_input)
-        print(f"Agent thinking: Intent='{intent}', Data='{data}'")
-        
-        # Step 2: Execute appropriate action
-        response = self.execute_action(intent, data)
-        
+        return self.respond_with_intent(user_input)[1]
+
+    def respond_with_intent(self, user_input):
+        """respond(), returning (intent, response) for callers that report the intent"""
+        if self.verbose:
+            print(f"User: {user_input}")
+
+        # Step 0: Answer a repeated prompt from the response cache
+        key = self.response_cache.key(user_input)
+        answer = self._memoized(key)
+        if answer is MISSING:
+            # Step 1: Process input and determine intent
+            intent, data = self.process_input(user_input)
+            if self.verbose:
+                print(f"Agent thinking: Intent='{intent}', Data='{data}'")
+
+            # Step 2: Execute appropriate action
+            last_outcome.set(None)
+            answer = intent, self.execute_action(intent, data)
+            self._memoize(key, data, answer)
+
         # Step 3: Return response
-        print(f"Agent: {response}")
-        return response
+        if self.verbose:
+            print(f"Agent: {answer[1]}")
+        return answer
+
+    def _memoized(self, key):
+        """Return the cached (intent, response) for a prompt key, counted like a fresh one, or MISSING"""
+        entry = self.response_cache.get(key)
+        if entry is MISSING:
+            return MISSING
+        counted, reads, answer = entry
+        self.metrics.count(*counted)
+        # The upstream caches still see the read, so hot_keys keeps popular
+        # locations and topics refreshed while their answers are memoized
+        for cache, read_key in reads:
+            cache.touch(read_key)
+        return answer
+
+    def _memoize(self, key, data, answer):
+        """Cache an answer if execute_action counted it as reusable"""
+        counted = last_outcome.get()
+        if counted is not None and counted[1] in _MEMOIZED_OUTCOMES:
+            reads = self._cache_reads(answer[0], data)
+            self.response_cache.set(key, counted[0], (counted, reads, answer))
+
+    def _cache_reads(self, intent, data):
+        """Return the (upstream cache, key) pairs an answer for intent and data was read from"""
+        if intent in ("weather", "trend"):
+            return ((self.weather_cache, normalize_key(data)),)
+        if intent == "forecast":
+            return ((self.forecast_cache, normalize_key(data)),)
+        if intent == "news":
+            topics = data if isinstance(data, tuple) else (data,)
+            return tuple((self.news_cache, normalize_key(topic)) for topic in topics)
+        return ()
 
 # Example usage and testing
-def main():
-    agent = SimpleAIAgent()
-    
+def main(argv=None):
+    # Imported here, like everything main() alone needs, so `import main`
+    # stays cheap for library and serverless callers
+    import argparse
+
+    def positive_int(value):
+        number = int(value)
+        if number < 1:
+            raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+        return number
+
+    parser = argparse.ArgumentParser(description="Simple AI agent for weather, news, time and math")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer prompts from a JSONL file ('-' for stdin) and write JSONL results")
+    parser.add_argument("--output", metavar="FILE", default="-",
+                        help="where batch results go ('-' for stdout)")
+    parser.add_argument("--workers", type=positive_int, default=8,
+                        help="concurrent prompts in batch or server mode")
+    parser.add_argument("--order", choices=["input", "completion"], default="input",
+                        help="write batch results in input order or as they finish")
+    parser.add_argument("--cache-db", metavar="FILE",
+                        help="share cached weather/news answers through this SQLite file")
+    parser.add_argument("--warm-start", type=int, default=100, metavar="N",
+                        help="preload the N most-read answers from --cache-db")
+    parser.add_argument("--serve", action="store_true",
+                        help="answer POST /respond requests over HTTP instead of stdin")
+    parser.add_argument("--host", default="127.0.0.1", help="server mode bind address")
+    parser.add_argument("--port", type=int, default=8000, help="server mode port")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="requests waiting for a worker before new ones get 503")
+    parser.add_argument("--refresh-interval", type=float, default=30.0, metavar="SECONDS",
+                        help="server mode: refetch popular answers this often before they expire (0 to disable)")
+    args = parser.parse_args(argv)
+
+    cache_store = None
+    if args.cache_db:
+        from cache_store import SQLiteCacheStore
+        cache_store = SQLiteCacheStore(args.cache_db)
+
+    if args.batch:
+        with SimpleAIAgent(verbose=False, cache_store=cache_store, warm_start=args.warm_start) as agent:
+            run_batch_files(agent, args.batch, args.output, args.workers, args.order)
+    elif args.serve:
+        from server import serve
+        with SimpleAIAgent(verbose=False, cache_store=cache_store, warm_start=args.warm_start) as agent:
+            if args.refresh_interval > 0:
+                agent.start_background_refresh(interval=args.refresh_interval)
+            serve(agent, args.host, args.port, args.workers, args.queue_size)
+    else:
+        with SimpleAIAgent(cache_store=cache_store, warm_start=args.warm_start) as agent:
+            run_interactive(agent)
+
+def run_batch_files(agent, input_path, output_path, workers, order):
+    """Open the batch input/output (or stdin/stdout) and stream through them"""
+    from batch import run_batch
+
+    source = sys.stdin if input_path == "-" else open(input_path, encoding="utf-8")
+    sink = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    try:
+        run_batch(agent, source, sink, workers=workers, order=order)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+def run_interactive(agent):
+    """Chat with the agent on stdin until the user quits"""
     print("=== Simple AI Agent Demo ===")
     print("Note: You'll need to add your API keys to make weather and news work!")
     print()
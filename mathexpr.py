@@ -0,0 +1,200 @@
+"""Bounded arithmetic evaluator used by do_math instead of eval"""
+import re
+from functools import lru_cache
+
+# One token per match: a number or an operator/parenthesis
+_TOKEN = re.compile(r"\s*(?:(\d+\.\d*|\.\d+|\d+)|(\*\*|//|[-+*/()]))")
+
+
+class MathError(ValueError):
+    """Raised for expressions that are malformed or cannot be computed"""
+
+
+class MathLimitError(MathError):
+    """Raised when an expression or its result exceeds an evaluator limit"""
+
+
+def tokenize(text):
+    """Split text into number and operator tokens"""
+    tokens = []
+    position, end = 0, len(text.rstrip())
+    while position < end:
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise MathError(f"unexpected character {text[position:].lstrip()[:1]!r}")
+        number, operator = match.groups()
+        if number is not None:
+            if "." in number:
+                tokens.append(("num", float(number)))
+            elif len(number) > 1 and number[0] == "0" and number.strip("0"):
+                # Python rejects leading zeros on non-zero integers, so do we
+                raise MathError(f"leading zeros in {number!r}")
+            else:
+                tokens.append(("num", int(number)))
+        else:
+            tokens.append(("op", operator))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser following Python's operator precedence
+
+    expr   := term (("+" | "-") term)*
+    term   := factor (("*" | "/" | "//") factor)*
+    factor := ("+" | "-") factor | power
+    power  := atom ["**" factor]
+    atom   := NUMBER | "(" expr ")"
+
+    Nodes are tuples: ("num", value), ("neg", node), ("pos", node) or
+    (operator, left, right).
+    """
+
+    def __init__(self, tokens, max_depth):
+        self.tokens = tokens
+        self.position = 0
+        self.depth = 0
+        self.max_depth = max_depth
+
+    def parse(self):
+        if not self.tokens:
+            raise MathError("empty expression")
+        node = self.expr()
+        if self.position != len(self.tokens):
+            raise MathError(f"unexpected {self.tokens[self.position][1]!r}")
+        return node
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            kind, value = self.tokens[self.position]
+            if kind == "op":
+                return value
+        return None
+
+    def expr(self):
+        node = self.term()
+        while self.peek() in ("+", "-"):
+            self.position += 1
+            node = (self.tokens[self.position - 1][1], node, self.term())
+        return node
+
+    def term(self):
+        node = self.factor()
+        while self.peek() in ("*", "/", "//"):
+            self.position += 1
+            node = (self.tokens[self.position - 1][1], node, self.factor())
+        return node
+
+    def factor(self):
+        operator = self.peek()
+        if operator in ("+", "-"):
+            self.position += 1
+            self.enter()
+            node = ("neg" if operator == "-" else "pos", self.factor())
+            self.depth -= 1
+            return node
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        if self.peek() == "**":
+            self.position += 1
+            self.enter()
+            node = ("**", node, self.factor())
+            self.depth -= 1
+        return node
+
+    def atom(self):
+        if self.position >= len(self.tokens):
+            raise MathError("unexpected end of expression")
+        kind, value = self.tokens[self.position]
+        self.position += 1
+        if kind == "num":
+            return ("num", value)
+        if value == "(":
+            self.enter()
+            node = self.expr()
+            if self.peek() != ")":
+                raise MathError("missing ')'")
+            self.position += 1
+            self.depth -= 1
+            return node
+        raise MathError(f"unexpected {value!r}")
+
+    def enter(self):
+        """Descend one nesting level, enforcing max_depth"""
+        self.depth += 1
+        if self.depth > self.max_depth:
+            raise MathLimitError("expression is nested too deeply")
+
+
+@lru_cache(maxsize=1024)
+def parse(text, max_depth=32):
+    """Parse text into an expression tree (cached, so repeats skip parsing)"""
+    return _Parser(tokenize(text), max_depth).parse()
+
+
+class MathEvaluator:
+    """Evaluates + - * / // ** and parentheses with Python's int/float semantics
+
+    Unlike eval, work is bounded up front: expressions longer than
+    max_length or nested deeper than max_depth are refused, integer powers
+    are checked against max_exponent and their estimated size before they
+    are computed, and every intermediate result must stay within
+    max_magnitude.
+    """
+
+    def __init__(self, max_length=200, max_depth=32, max_exponent=10_000, max_magnitude=10 ** 300):
+        self.max_length = max_length
+        self.max_depth = max_depth
+        self.max_exponent = max_exponent
+        self.max_magnitude = max_magnitude
+        self._max_bits = max_magnitude.bit_length()
+
+    def evaluate(self, text):
+        """Return the value of text, raising MathError (or ZeroDivisionError)"""
+        if len(text) > self.max_length:
+            raise MathLimitError(f"expression is longer than {self.max_length} characters")
+        return self._eval(parse(text.strip(), self.max_depth))
+
+    def _eval(self, node):
+        kind = node[0]
+        if kind == "num":
+            return self._check(node[1])
+        if kind == "neg":
+            return -self._eval(node[1])
+        if kind == "pos":
+            return +self._eval(node[1])
+        left, right = self._eval(node[1]), self._eval(node[2])
+        if kind == "+":
+            return self._check(left + right)
+        if kind == "-":
+            return self._check(left - right)
+        if kind == "*":
+            return self._check(left * right)
+        if kind == "/":
+            return self._check(left / right)
+        if kind == "//":
+            return self._check(left // right)
+        return self._power(left, right)
+
+    def _power(self, base, exponent):
+        if abs(exponent) > self.max_exponent:
+            raise MathLimitError(f"exponent larger than {self.max_exponent}")
+        if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+            # |base| ** exponent has about (bits - 1) * exponent bits
+            if (abs(base).bit_length() - 1) * exponent > self._max_bits:
+                raise MathLimitError("result is too large")
+        try:
+            result = base ** exponent
+        except OverflowError:
+            raise MathLimitError("result is too large") from None
+        if isinstance(result, complex):
+            raise MathError("result is not a real number")
+        return self._check(result)
+
+    def _check(self, value):
+        """Enforce max_magnitude (inf and nan included) on a result"""
+        if not abs(value) <= self.max_magnitude:
+            raise MathLimitError("result is too large")
+        return value
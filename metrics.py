@@ -0,0 +1,153 @@
+"""Per-stage timings and per-intent outcome counters"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+# Outcomes counted per intent. An upstream error is an answer the upstream
+# gave or the client refused to ask for (non-200, quota, open breaker); an
+# exception is anything raised on the way (network errors, timeouts, bugs);
+# partial is a fan-out answered without some of its parts.
+SUCCESS = "success"
+UPSTREAM_ERROR = "upstream_error"
+EXCEPTION = "exception"
+INVALID = "invalid_input"
+PARTIAL = "partial"
+
+# (intent, outcome) of the latest count() in the current thread or asyncio
+# task, so a caller can tell how the answer it just got was counted
+last_outcome = ContextVar("last_outcome", default=None)
+
+# Histogram upper bounds in seconds, from intent matching to slow upstreams
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NullTimer:
+    """Context manager that does nothing, shared by disabled Metrics"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """Times one with-block into a Metrics histogram"""
+
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = self.metrics._clock()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.stage, self.metrics._clock() - self.start)
+        return False
+
+
+class Metrics:
+    """Latency histograms per pipeline stage and outcome counters per intent
+
+    Stages nest: "execute" covers everything execute_action does, while
+    "upstream", "decode", "format" and "math" time its parts. Read the
+    numbers with snapshot() or export them with prometheus(). With
+    enabled=False, timer() hands out one shared no-op and count() returns
+    at once, so instrumented code pays only for the method call.
+    """
+
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS, clock=time.perf_counter):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stages = {}  # stage -> [per-bucket counts (+Inf last), count, sum]
+        self._outcomes = {}  # (intent, outcome) -> count
+
+    def timer(self, stage):
+        """Return a context manager that records the block's duration under stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def observe(self, stage, seconds):
+        """Record one duration for stage"""
+        if not self.enabled:
+            return
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            histogram[0][slot] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+
+    def count(self, intent, outcome):
+        """Count one answered prompt for intent with outcome"""
+        last_outcome.set((intent, outcome))
+        if not self.enabled:
+            return
+        key = (intent, outcome)
+        with self._lock:
+            self._outcomes[key] = self._outcomes.get(key, 0) + 1
+
+    def snapshot(self):
+        """Return {"stages": {...}, "outcomes": {intent: {outcome: n}}}
+
+        Each stage reports count, total seconds, mean seconds and cumulative
+        bucket counts keyed by upper bound.
+        """
+        with self._lock:
+            stages = {stage: (list(slots), n, total) for stage, (slots, n, total) in self._stages.items()}
+            outcomes = dict(self._outcomes)
+        report = {"stages": {}, "outcomes": {}}
+        for stage, (slots, n, total) in sorted(stages.items()):
+            cumulative, running = {}, 0
+            for bound, hits in zip(self.buckets + (float("inf"),), slots):
+                running += hits
+                cumulative[bound] = running
+            report["stages"][stage] = {
+                "count": n, "sum": total, "mean": total / n if n else 0.0, "buckets": cumulative,
+            }
+        for (intent, outcome), n in sorted(outcomes.items()):
+            report["outcomes"].setdefault(intent, {})[outcome] = n
+        return report
+
+    def prometheus(self):
+        """Render the current numbers in the Prometheus text exposition format"""
+        report = self.snapshot()
+        lines = [
+            "# HELP agent_stage_seconds Time spent in each stage of the response pipeline",
+            "# TYPE agent_stage_seconds histogram",
+        ]
+        for stage, data in report["stages"].items():
+            for bound, n in data["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'agent_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {n}')
+            lines.append(f'agent_stage_seconds_sum{{stage="{stage}"}} {data["sum"]}')
+            lines.append(f'agent_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+        lines += [
+            "# HELP agent_requests_total Answered prompts by intent and outcome",
+            "# TYPE agent_requests_total counter",
+        ]
+        for intent, outcomes in report["outcomes"].items():
+            for outcome, n in outcomes.items():
+                lines.append(f'agent_requests_total{{intent="{intent}",outcome="{outcome}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._stages.clear()
+            self._outcomes.clear()
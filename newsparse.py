@@ -0,0 +1,54 @@
+"""Lean NewsAPI decoding that stops after the titles the agent shows"""
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_scan = json.JSONDecoder().raw_decode
+
+
+def _skip(text, position):
+    """Return the position of the next non-whitespace character"""
+    return _WHITESPACE.match(text, position).end()
+
+
+def first_titles(body, limit):
+    """Return the titles of the first limit articles in a NewsAPI body
+
+    The top-level object is walked key by key and the "articles" array
+    element by element, so articles past the limit and anything after the
+    array are never decoded. Returns None when the body has no "articles"
+    array (an error answer, say); malformed JSON raises ValueError like
+    json.loads.
+    """
+    text = body.decode("utf-8") if isinstance(body, (bytes, bytearray)) else body
+    position = _skip(text, 0)
+    if text[position:position + 1] != "{":
+        raise ValueError("expected a JSON object")
+    position = _skip(text, position + 1)
+    while text[position:position + 1] != "}":
+        key, position = _scan(text, position)
+        position = _skip(text, position)
+        if text[position:position + 1] != ":":
+            raise ValueError(f"expected ':' at offset {position}")
+        position = _skip(text, position + 1)
+        if key == "articles" and text[position:position + 1] == "[":
+            return _titles(text, position + 1, limit)
+        # Values ahead of the articles ("status", "totalResults") are small
+        _, position = _scan(text, position)
+        position = _skip(text, position)
+        if text[position:position + 1] == ",":
+            position = _skip(text, position + 1)
+    return None
+
+
+def _titles(text, position, limit):
+    """Decode array elements from position until limit titles are read"""
+    titles = []
+    position = _skip(text, position)
+    while len(titles) < limit and text[position:position + 1] not in ("]", ""):
+        article, position = _scan(text, position)
+        titles.append(article["title"])
+        position = _skip(text, position)
+        if text[position:position + 1] == ",":
+            position = _skip(text, position + 1)
+    return titles
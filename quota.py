@@ -0,0 +1,131 @@
+"""Client-side rate limiting for the upstream APIs"""
+import threading
+import time
+
+# endpoint -> (tokens per period, period in seconds, burst capacity).
+# Rate plus burst stays inside each free tier: NewsAPI allows 100 requests
+# a day, OpenWeather 60 a minute.
+DEFAULT_LIMITS = {
+    "weather": (50, 60, 10),
+    "news": (95, 86400, 5),
+}
+
+
+class QuotaExceededError(Exception):
+    """Raised when an endpoint has no budget left within the allowed wait"""
+
+    def __init__(self, endpoint):
+        super().__init__(f"quota exhausted for {endpoint}")
+        self.endpoint = endpoint
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations
+
+    reserve() takes a token even if the bucket is empty, as long as the
+    caller is willing to wait for it to refill; callers then sleep for the
+    returned delay. Reservations queue up in arrival order.
+    """
+
+    def __init__(self, capacity, refill_per_second, clock=time.monotonic):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens for the time elapsed (caller holds the lock)"""
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, max_wait=0.0):
+        """Take a token; return seconds to wait for it, or None if too long"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            if self.refill_per_second <= 0:
+                return None
+            wait = (1 - self._tokens) / self.refill_per_second
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def remaining(self):
+        """Return whole tokens available right now"""
+        with self._lock:
+            self._refill()
+            return max(0, int(self._tokens))
+
+
+class QuotaManager:
+    """One token bucket per (API key, endpoint)
+
+    Endpoints missing from limits are not rate limited. max_wait is how long
+    a caller may be queued for a token before the request is refused.
+    """
+
+    def __init__(self, limits=None, max_wait=0.0, clock=time.monotonic, sleep=time.sleep):
+        self.limits = DEFAULT_LIMITS if limits is None else dict(limits)
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.refused = 0
+
+    def bucket(self, api_key, endpoint):
+        """Return the bucket for api_key on endpoint, or None if unlimited"""
+        key = (api_key, endpoint)
+        bucket = self._buckets.get(key)
+        if bucket is None and endpoint in self.limits:
+            rate, period, burst = self.limits[endpoint]
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(burst, rate / period, self._clock)
+        return bucket
+
+    def _reserve(self, api_key, endpoint, max_wait):
+        """Reserve a token and return the wait, raising if none is available"""
+        bucket = self.bucket(api_key, endpoint)
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve(self.max_wait if max_wait is None else max_wait)
+        if wait is None:
+            with self._lock:
+                self.refused += 1
+            raise QuotaExceededError(endpoint)
+        return wait
+
+    def acquire(self, api_key, endpoint, max_wait=None):
+        """Spend one request of budget, sleeping if queued"""
+        wait = self._reserve(api_key, endpoint, max_wait)
+        if wait:
+            self._sleep(wait)
+
+    async def acquire_async(self, api_key, endpoint, max_wait=None):
+        """Spend one request of budget without blocking the event loop"""
+        # Only async callers get here, so sync ones never pay for asyncio
+        import asyncio
+
+        wait = self._reserve(api_key, endpoint, max_wait)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def remaining(self):
+        """Report the budget left per endpoint and (masked) API key"""
+        report = {}
+        for (api_key, endpoint), bucket in list(self._buckets.items()):
+            label = f"...{api_key[-4:]}" if api_key else "(no key)"
+            report.setdefault(endpoint, {})[label] = {
+                "remaining": bucket.remaining(),
+                "capacity": bucket.capacity,
+                "refill_per_second": bucket.refill_per_second,
+            }
+        return report
@@ -0,0 +1,87 @@
+"""Background refreshing of cached upstream answers"""
+import threading
+
+
+class BackgroundRefresher:
+    """Runs cache refreshes off the request path
+
+    submit() queues at most one refresh per key; refreshes go through the
+    agent's single-flight group, so a foreground miss for the same key
+    shares the request. schedule() runs a job every interval seconds on a
+    daemon thread, e.g. to refresh hot keys before they expire.
+    """
+
+    def __init__(self, singleflight, max_workers=2):
+        self.singleflight = singleflight
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._scheduler = None
+        self.refreshed = 0
+        self.failed = 0
+
+    def submit(self, key, fetch):
+        """Refresh key with fetch() in the background unless already queued"""
+        with self._lock:
+            if key in self._pending or self._stop.is_set():
+                return False
+            self._pending.add(key)
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="refresh")
+            executor = self._executor
+        executor.submit(self._run, key, fetch)
+        return True
+
+    def _run(self, key, fetch):
+        """Run one refresh, recording the outcome"""
+        try:
+            self.singleflight.do(key, fetch)
+        except Exception:
+            # The stale copy keeps being served until its grace runs out
+            with self._lock:
+                self.failed += 1
+        else:
+            with self._lock:
+                self.refreshed += 1
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def schedule(self, job, interval):
+        """Call job() every interval seconds until close()"""
+        if self._scheduler is not None:
+            raise RuntimeError("a refresh schedule is already running")
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    job()
+                except Exception:
+                    with self._lock:
+                        self.failed += 1
+
+        self._scheduler = threading.Thread(target=loop, name="refresh-scheduler", daemon=True)
+        self._scheduler.start()
+
+    def stats(self):
+        """Return queued, refreshed and failed refresh counts"""
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "refreshed": self.refreshed,
+                "failed": self.failed,
+            }
+
+    def close(self):
+        """Stop the schedule and wait for running refreshes"""
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.join()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,219 @@
+"""Timeouts, retries and circuit breaking for upstream calls"""
+import random
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, host):
+        super().__init__(f"circuit open for {host}")
+        self.host = host
+
+
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff
+
+    Only idempotent GETs go through the transport, so a call is retried
+    after a connection error or timeout, or when the upstream answers with
+    one of retry_statuses.
+    """
+
+    def __init__(self, attempts=3, backoff=0.2, max_backoff=2.0,
+                 retry_statuses=(500, 502, 503, 504), rng=random.random):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self._rng = rng
+
+    def delay(self, attempt):
+        """Seconds to wait after failed attempt number attempt (0-based)"""
+        return self._rng() * min(self.max_backoff, self.backoff * (2 ** attempt))
+
+
+class CircuitBreaker:
+    """Opens when the recent failure rate crosses a threshold
+
+    While open every call fails fast. After reset_timeout one probe call is
+    let through (half-open); its success closes the breaker, its failure
+    re-opens it.
+    """
+
+    def __init__(self, failure_threshold=0.5, window=20, min_calls=5,
+                 reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._outcomes = deque(maxlen=window)  # True for success
+        self._lock = threading.Lock()
+        self._opened_at = None
+        self._probing = False
+        self.state = CLOSED
+        self.trips = 0
+
+    def allow(self):
+        """Return True if a call may go upstream now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = HALF_OPEN
+                self._probing = False
+            # Half-open: exactly one probe at a time
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        """Record a healthy upstream answer"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._probing = False
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        """Record a failed call, tripping the breaker if needed"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append(False)
+            calls = len(self._outcomes)
+            failures = calls - sum(self._outcomes)
+            if self.state == CLOSED and calls >= self.min_calls \
+                    and failures / calls >= self.failure_threshold:
+                self._trip()
+
+    def release(self):
+        """Give back a half-open probe slot without recording an outcome"""
+        with self._lock:
+            self._probing = False
+
+    def _trip(self):
+        """Open the breaker (caller holds the lock)"""
+        self.state = OPEN
+        self.trips += 1
+        self._opened_at = self._clock()
+        self._probing = False
+        self._outcomes.clear()
+
+    def stats(self):
+        """Return state, trip count and the current window's failures"""
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "calls": calls,
+                "failures": calls - sum(self._outcomes),
+            }
+
+
+class Resilience:
+    """Per-upstream timeouts, retry policy and circuit breakers
+
+    timeouts maps a host to a (connect, read) pair in seconds; hosts not
+    listed use default_timeout. breaker_options are passed to each host's
+    CircuitBreaker.
+    """
+
+    def __init__(self, timeouts=None, default_timeout=(3.05, 10.0), retry=None,
+                 breaker_options=None, sleep=time.sleep):
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.retry = retry or RetryPolicy()
+        self.breaker_options = dict(breaker_options or {})
+        self.breakers = {}
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def timeout_for(self, host):
+        """Return the (connect, read) timeout for host"""
+        return self.timeouts.get(host, self.default_timeout)
+
+    def breaker_for(self, host):
+        """Return the circuit breaker guarding host"""
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self.breakers.setdefault(host, CircuitBreaker(**self.breaker_options))
+        return breaker
+
+    def call(self, host, send, retry_on):
+        """Run send(timeout) with retries under host's breaker
+
+        retry_on lists the transport's connection/timeout exception types.
+        Returns the final response; raises CircuitOpenError when the breaker
+        is open, or the last exception once retries are exhausted.
+        """
+        breaker = self.breaker_for(host)
+        if not breaker.allow():
+            raise CircuitOpenError(host)
+        timeout = self.timeout_for(host)
+        for attempt in range(self.retry.attempts):
+            last = attempt == self.retry.attempts - 1
+            try:
+                response = send(timeout)
+            except retry_on:
+                if last:
+                    breaker.record_failure()
+                    raise
+            except BaseException:
+                # Not an upstream failure (e.g. a bad URL); don't count it
+                breaker.release()
+                raise
+            else:
+                if response.status_code not in self.retry.retry_statuses:
+                    breaker.record_success()
+                    return response
+                if last:
+                    breaker.record_failure()
+                    return response
+                # Hand the connection back to the pool before retrying
+                response.close()
+            self._sleep(self.retry.delay(attempt))
+
+    async def call_async(self, host, send, retry_on):
+        """Async counterpart of call(); send(timeout) is awaited"""
+        import asyncio
+
+        breaker = self.breaker_for(host)
+        if not breaker.allow():
+            raise CircuitOpenError(host)
+        timeout = self.timeout_for(host)
+        for attempt in range(self.retry.attempts):
+            last = attempt == self.retry.attempts - 1
+            try:
+                response = await send(timeout)
+            except retry_on:
+                if last:
+                    breaker.record_failure()
+                    raise
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                if response.status_code not in self.retry.retry_statuses:
+                    breaker.record_success()
+                    return response
+                if last:
+                    breaker.record_failure()
+                    return response
+            await asyncio.sleep(self.retry.delay(attempt))
+
+    def stats(self):
+        """Return breaker stats for every upstream seen so far"""
+        return {host: breaker.stats() for host, breaker in list(self.breakers.items())}
@@ -0,0 +1,196 @@
+"""HTTP service mode: answer prompts over HTTP from a shared agent"""
+import json
+import queue
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit
+
+# Written straight to the socket when the queue is full, without parsing
+_BUSY = json.dumps({"error": "server busy, try again shortly"}).encode()
+_BUSY_RESPONSE = (
+    b"HTTP/1.0 503 Service Unavailable\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Retry-After: 1\r\n"
+    b"Content-Length: " + str(len(_BUSY)).encode() + b"\r\n"
+    b"Connection: close\r\n\r\n" + _BUSY
+)
+
+MAX_BODY = 64 * 1024
+# Shed connections waiting to be drained; past this they are closed at once
+REAPER_BACKLOG = 256
+
+
+class _AgentHandler(BaseHTTPRequestHandler):
+    """POST /respond, GET /healthz and GET /metrics"""
+
+    server_version = "SimpleAIAgent/1.0"
+    # Slow clients give up their worker after this many seconds
+    timeout = 10
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/healthz":
+            self._send_json(200, self.server.health())
+        elif path == "/metrics":
+            self._send(200, "text/plain; version=0.0.4", self.server.agent.metrics.prometheus().encode())
+        else:
+            self._send_json(404, {"error": f"no such endpoint: {path}"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path != "/respond":
+            self._send_json(404, {"error": f"no such endpoint: {path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self._send_json(413, {"error": f"body larger than {MAX_BODY} bytes"})
+            return
+        try:
+            record = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self._send_json(400, {"error": f"invalid JSON: {e}"})
+            return
+        if not isinstance(record, dict) or not isinstance(record.get("prompt"), str):
+            self._send_json(400, {"error": "expected an object with a 'prompt' string"})
+            return
+
+        agent = self.server.agent
+        try:
+            intent, response = agent.respond_with_intent(record["prompt"])
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"intent": intent, "response": response})
+
+    def _send_json(self, status, payload):
+        self._send(status, "application/json", json.dumps(payload).encode())
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AgentServer(HTTPServer):
+    """HTTP front end sharing one agent across a fixed pool of worker threads
+
+    The accept loop only queues connections; worker threads take them off
+    a bounded queue, so the agent's caches, single-flight groups and
+    connection pools are shared by every request. When the queue is full
+    the accept loop writes a canned 503 with one non-blocking send and
+    hands the socket to a reaper thread, which drains the request and
+    closes it; the accept loop never waits on a client, so overload is
+    shed without piling up. Connections close after each response, so an
+    idle client never holds a worker.
+    """
+
+    def __init__(self, agent, address=("127.0.0.1", 8000), workers=8, queue_size=64):
+        super().__init__(address, _AgentHandler)
+        self.agent = agent
+        self.shed = 0
+        self._queue = queue.Queue(queue_size)
+        self._rejected = queue.Queue(REAPER_BACKLOG)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"agent-worker-{n}", daemon=True)
+            for n in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._reaper = threading.Thread(target=self._reap, name="agent-reaper", daemon=True)
+        self._reaper.start()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def process_request(self, request, client_address):
+        """Queue the connection for a worker, or shed it with a 503"""
+        try:
+            self._queue.put_nowait((request, client_address, time.perf_counter()))
+        except queue.Full:
+            self.shed += 1
+            self._reject(request)
+
+    def _reject(self, request):
+        """Answer 503 without handing the connection to a worker
+
+        The answer fits in the empty send buffer, so the non-blocking send
+        never waits; draining and closing is left to the reaper thread.
+        """
+        try:
+            request.setblocking(False)
+            request.send(_BUSY_RESPONSE)
+            request.shutdown(socket.SHUT_WR)
+            self._rejected.put_nowait(request)
+        except (OSError, queue.Full):
+            self.shutdown_request(request)
+
+    def _reap(self):
+        """Drain and close shed connections until a None sentinel arrives"""
+        while True:
+            request = self._rejected.get()
+            if request is None:
+                return
+            try:
+                # Read what the client has sent so closing does not reset
+                # the connection before it reads the answer
+                request.settimeout(0.1)
+                request.recv(MAX_BODY)
+            except OSError:
+                pass
+            self.close_request(request)
+
+    def _work(self):
+        """Serve queued connections until a None sentinel arrives"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            request, client_address, queued_at = item
+            self.agent.metrics.observe("queue", time.perf_counter() - queued_at)
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def health(self):
+        """Return liveness plus queue depth and shed count"""
+        return {
+            "status": "ok",
+            "workers": len(self._workers),
+            "queued": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "shed": self.shed,
+        }
+
+    def server_close(self):
+        """Stop the workers once queued connections are answered, then close"""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._rejected.put(None)
+        self._reaper.join()
+        super().server_close()
+
+
+def serve(agent, host="127.0.0.1", port=8000, workers=8, queue_size=64):
+    """Serve agent over HTTP until interrupted"""
+    server = AgentServer(agent, (host, port), workers=workers, queue_size=queue_size)
+    print(f"Serving the agent on {server.url} ({workers} workers, queue of {queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,85 @@
+"""Coalesce concurrent identical upstream calls"""
+import threading
+
+
+class _Call:
+    """An in-flight threaded call that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share it
+
+    Threaded callers use do(), asyncio callers use do_async(). Keys are
+    whatever the caller passes, e.g. ("weather", "houston").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        # Upstream requests avoided because a caller joined an in-flight call
+        self.saved = 0
+
+    def do(self, key, fn):
+        """Call fn() unless a call for key is already running, then share it"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.saved += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, coro_fn):
+        """Await coro_fn() unless a call for key is already running on this loop"""
+        # A running loop means asyncio is loaded already; sync users never load it
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = loop.create_task(coro_fn())
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda t: self._finish_task(task_key, t))
+        else:
+            with self._lock:
+                self.saved += 1
+        # Shield so one cancelled caller doesn't cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def _finish_task(self, task_key, task):
+        """Forget a finished task and mark its exception as retrieved"""
+        self._tasks.pop(task_key, None)
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        """Return the number of in-flight keys and requests saved"""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls) + len(self._tasks),
+                "saved": self.saved,
+            }
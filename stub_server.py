@@ -0,0 +1,331 @@
+"""Local stand-in for the OpenWeather and NewsAPI endpoints
+
+Serves the /data/2.5/weather, /data/2.5/group, /data/2.5/forecast,
+/v2/top-headlines and /v2/everything shapes the agent parses, with per-endpoint latency, error and rate-limit
+injection, so benchmarks and integration tests run offline without
+spending API quota. Point the agent at it with the weather_base_url /
+news_base_url constructor arguments or the OPENWEATHER_BASE_URL /
+NEWS_BASE_URL environment variables:
+
+    python stub_server.py --port 8080 --latency weather=lognormal:40:0.5 --error-rate news=0.05
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8080 NEWS_BASE_URL=http://127.0.0.1:8080 python main.py
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Request path -> endpoint name used for behaviours and counters
+ENDPOINTS = {
+    "/data/2.5/weather": "weather",
+    "/data/2.5/group": "weather_group",
+    "/data/2.5/forecast": "forecast",
+    "/v2/top-headlines": "news",
+    "/v2/everything": "news",
+}
+
+# Endpoint names that can be given their own Behavior
+BEHAVIOR_NAMES = ("weather", "weather_group", "forecast", "news")
+
+# OpenWeather refuses group requests for more city IDs than this
+GROUP_LIMIT = 20
+
+_CONDITIONS = ["clear sky", "few clouds", "scattered clouds", "light rain", "overcast clouds", "snow"]
+_CONDITION_IDS = {"clear sky": 800, "few clouds": 801, "scattered clouds": 802, "light rain": 500,
+                  "overcast clouds": 804, "snow": 601}
+
+# Slots in a 5-day/3-hour forecast
+FORECAST_SLOTS = 40
+
+
+def fixed(ms):
+    """Latency distribution that always waits ms milliseconds"""
+    return lambda rng: ms / 1000
+
+
+def uniform(low_ms, high_ms):
+    """Latency distribution uniform between low_ms and high_ms"""
+    return lambda rng: rng.uniform(low_ms, high_ms) / 1000
+
+
+def lognormal(median_ms, sigma):
+    """Long-tailed latency distribution around median_ms"""
+    return lambda rng: median_ms * rng.lognormvariate(0, sigma) / 1000
+
+
+def parse_latency(spec):
+    """Parse 'fixed:MS', 'uniform:LOW:HIGH' or 'lognormal:MEDIAN:SIGMA'"""
+    kind, *args = spec.split(":")
+    factories = {"fixed": fixed, "uniform": uniform, "lognormal": lognormal}
+    if kind not in factories:
+        raise ValueError(f"unknown latency distribution: {kind}")
+    return factories[kind](*map(float, args))
+
+
+class Behavior:
+    """How one endpoint misbehaves
+
+    latency is a distribution from fixed/uniform/lognormal (None for no
+    delay); error_rate and rate_limit_rate are the fractions of requests
+    answered with a 500 or a 429; articles is how many articles a news
+    answer carries and padding how many filler bytes each one adds, for
+    large-payload tests.
+    """
+
+    def __init__(self, latency=None, error_rate=0.0, rate_limit_rate=0.0, articles=20, padding=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.articles = articles
+        self.padding = padding
+
+
+def weather_payload(city, rng):
+    """Return an OpenWeather current-conditions answer for city"""
+    return {
+        "coord": {"lon": round(rng.uniform(-180, 180), 4), "lat": round(rng.uniform(-90, 90), 4)},
+        "weather": [{"id": 800, "main": "Clear", "description": rng.choice(_CONDITIONS), "icon": "01d"}],
+        "main": {
+            "temp": round(rng.uniform(-10, 35), 1),
+            "feels_like": round(rng.uniform(-15, 38), 1),
+            "pressure": rng.randint(980, 1040),
+            "humidity": rng.randint(10, 100),
+        },
+        "wind": {"speed": round(rng.uniform(0, 15), 1), "deg": rng.randint(0, 359)},
+        "name": city.title(),
+        "cod": 200,
+    }
+
+
+def forecast_payload(city, rng, start):
+    """Return an OpenWeather 5-day/3-hour forecast for city from start (epoch seconds)"""
+    base = rng.uniform(-5, 30)
+    slots = []
+    for n in range(FORECAST_SLOTS):
+        # A daily swing around base, warmest mid-afternoon UTC
+        temp = base + 5 * math.sin((n % 8 - 3) * math.pi / 4) + rng.uniform(-1, 1)
+        description = rng.choice(_CONDITIONS)
+        dt = start + n * 10800
+        slots.append({
+            "dt": dt,
+            "main": {"temp": round(temp, 2), "temp_min": round(temp - rng.uniform(0, 1), 2),
+                     "temp_max": round(temp + rng.uniform(0, 1), 2), "humidity": rng.randint(10, 100)},
+            "weather": [{"id": _CONDITION_IDS[description], "main": description.split()[-1].title(),
+                         "description": description, "icon": "01d"}],
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(dt)),
+        })
+    return {"cod": "200", "message": 0, "cnt": len(slots), "list": slots,
+            "city": {"name": city.title(), "country": "XX", "timezone": 0}}
+
+
+def news_payload(topic, count, padding):
+    """Return a NewsAPI answer with count articles about topic"""
+    filler = "x" * padding
+    articles = [
+        {
+            "source": {"id": None, "name": "Stub Wire"},
+            "author": "Stub Reporter",
+            "title": f"{topic.title()} story {n + 1}",
+            "description": f"What happened with {topic} today",
+            "url": f"https://example.com/{topic.replace(' ', '-')}/{n + 1}",
+            "urlToImage": None,
+            "publishedAt": "2025-01-01T00:00:00Z",
+            "content": filler,
+        }
+        for n in range(count)
+    ]
+    return {"status": "ok", "totalResults": count, "articles": articles}
+
+
+class StubUpstream:
+    """Threaded fake upstream serving both APIs on one local port
+
+    Cities in not_found get OpenWeather's 404. Every request is counted
+    per endpoint and status (see stats). Use as a context manager, or
+    call start() and stop().
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, behaviors=None, not_found=("atlantis",), seed=None):
+        self.behaviors = {name: Behavior() for name in BEHAVIOR_NAMES}
+        self.behaviors.update(behaviors or {})
+        self.not_found = {city.lower() for city in not_found}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, payload = upstream.answer(self.path)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def answer(self, path):
+        """Return (status, payload) for a request path, sleeping for latency"""
+        parts = urlsplit(path)
+        endpoint = ENDPOINTS.get(parts.path)
+        if endpoint is None:
+            return self._count("unknown", 404, {"status": "error", "message": "not found"})
+        behavior = self.behaviors[endpoint]
+        with self._lock:
+            roll = self._rng.random()
+            delay = behavior.latency(self._rng) if behavior.latency else 0.0
+        if delay:
+            time.sleep(delay)
+
+        if roll < behavior.rate_limit_rate:
+            if endpoint != "news":
+                return self._count(endpoint, 429, {"cod": 429, "message": "Your account is temporary blocked"})
+            return self._count(endpoint, 429, {
+                "status": "error", "code": "rateLimited",
+                "message": "You have made too many requests recently."})
+        if roll < behavior.rate_limit_rate + behavior.error_rate:
+            return self._count(endpoint, 500, {"status": "error", "message": "Internal server error"})
+
+        query = parse_qs(parts.query)
+        if endpoint == "weather_group":
+            ids = [int(i) for i in query.get("id", [""])[0].split(",") if i]
+            if not ids or len(ids) > GROUP_LIMIT:
+                return self._count(endpoint, 400, {"cod": "400", "message": f"{len(ids)} ids requested"})
+            cities = []
+            for city_id in ids:
+                city = weather_payload(f"city {city_id}", random.Random(city_id))
+                city["id"] = city_id
+                cities.append(city)
+            return self._count(endpoint, 200, {"cnt": len(cities), "list": cities})
+        if endpoint in ("weather", "forecast"):
+            city = query.get("q", [""])[0]
+            if city.lower() in self.not_found:
+                return self._count(endpoint, 404, {"cod": "404", "message": "city not found"})
+            # Seeded by city so repeated lookups agree with each other
+            rng = random.Random(city.lower())
+            if endpoint == "forecast":
+                # Slots start at the next three-hour boundary, like the real API
+                start = (int(time.time()) // 10800 + 1) * 10800
+                return self._count(endpoint, 200, forecast_payload(city, rng, start))
+            return self._count(endpoint, 200, weather_payload(city, rng))
+        topic = query.get("q", ["general"])[0]
+        count = min(behavior.articles, int(query.get("pageSize", [100])[0]))
+        return self._count(endpoint, 200, news_payload(topic, count, behavior.padding))
+
+    def _count(self, endpoint, status, payload):
+        with self._lock:
+            key = (endpoint, status)
+            self._counts[key] = self._counts.get(key, 0) + 1
+        return status, payload
+
+    def stats(self):
+        """Return {endpoint: {status: count}} for every request served"""
+        with self._lock:
+            report = {}
+            for (endpoint, status), count in self._counts.items():
+                report.setdefault(endpoint, {})[status] = count
+            return report
+
+    def serve_forever(self):
+        """Serve on the calling thread until stop() or Ctrl-C"""
+        self._server.serve_forever()
+
+    def start(self):
+        """Serve on a daemon thread and return the base URL"""
+        # A short poll interval keeps stop() quick in test teardown
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Shut the server down and release its port"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _per_endpoint(values, convert):
+    """Parse repeated ENDPOINT=VALUE options into {endpoint: value}"""
+    parsed = {}
+    for item in values:
+        endpoint, _, value = item.partition("=")
+        if endpoint not in BEHAVIOR_NAMES:
+            raise argparse.ArgumentTypeError(
+                f"endpoint must be one of {', '.join(BEHAVIOR_NAMES)}, not {endpoint!r}")
+        parsed[endpoint] = convert(value)
+    return parsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake OpenWeather/NewsAPI server for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", action="append", default=[], metavar="ENDPOINT=SPEC",
+                        help="e.g. weather=fixed:20, news=uniform:10:80, weather=lognormal:40:0.5")
+    parser.add_argument("--error-rate", action="append", default=[], metavar="ENDPOINT=FRACTION",
+                        help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", action="append", default=[], metavar="ENDPOINT=FRACTION",
+                        help="fraction of requests answered with 429")
+    parser.add_argument("--articles", type=int, default=20, help="articles per news answer")
+    parser.add_argument("--padding", type=int, default=0, help="filler bytes per article")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    latency = _per_endpoint(args.latency, parse_latency)
+    errors = _per_endpoint(args.error_rate, float)
+    limits = _per_endpoint(args.rate_limit_rate, float)
+    behaviors = {
+        endpoint: Behavior(
+            latency=latency.get(endpoint),
+            error_rate=errors.get(endpoint, 0.0),
+            rate_limit_rate=limits.get(endpoint, 0.0),
+            articles=args.articles,
+            padding=args.padding,
+        )
+        for endpoint in BEHAVIOR_NAMES
+    }
+    upstream = StubUpstream(args.host, args.port, behaviors, seed=args.seed)
+    print(f"Serving fake OpenWeather/NewsAPI on {upstream.base_url} (Ctrl-C to stop)")
+    try:
+        upstream.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        upstream.stop()
+
+
+if __name__ == "__main__":
+    main()
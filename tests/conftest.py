@@ -0,0 +1,119 @@
+"""Shared test fixtures: a fake clock, canned upstream responses, offline agents and a local HTTP server"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+
+import pytest
+
+from main import SimpleAIAgent
+from quota import QuotaManager
+
+WEATHER_BODY = b'{"main": {"temp": 1.5}, "weather": [{"description": "snow"}]}'
+
+
+class FakeClock:
+    """Manually advanced clock; with a step, every read also advances it"""
+
+    def __init__(self, now=1000.0, step=0.0):
+        self.now = now
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """A FakeClock at 1000.0 that only moves when a test moves it"""
+    return FakeClock()
+
+
+def _response(status_code=200, payload=None):
+    response = Mock()
+    response.status_code = status_code
+    if payload is not None:
+        response.content = json.dumps(payload).encode()
+    return response
+
+
+@pytest.fixture
+def response():
+    """Build a transport response double: response(status_code, payload)"""
+    return _response
+
+
+@pytest.fixture
+def weather_response():
+    """Build a 200 OpenWeather answer: weather_response(temp, description)"""
+    def build(temp=12.0, description="mist"):
+        return _response(200, {'main': {'temp': temp}, 'weather': [{'description': description}]})
+
+    return build
+
+
+@pytest.fixture
+def news_response():
+    """Build a 200 NewsAPI answer: news_response(titles)"""
+    def build(titles):
+        return _response(200, {'articles': [{'title': title} for title in titles]})
+
+    return build
+
+
+@pytest.fixture
+def offline_agent():
+    """Build quiet agents with no quota limits and a Mock transport: offline_agent(transport=..., **kwargs)"""
+    agents = []
+
+    def build(transport=None, **kwargs):
+        kwargs.setdefault("verbose", False)
+        kwargs.setdefault("quota", QuotaManager(limits={}))
+        agent = SimpleAIAgent(transport=Mock() if transport is None else transport, **kwargs)
+        agents.append(agent)
+        return agent
+
+    yield build
+    for agent in agents:
+        agent.close()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(WEATHER_BODY)))
+        self.end_headers()
+        self.wfile.write(WEATHER_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    """Local keep-alive server answering WEATHER_BODY; yields (base_url, accepted connections)"""
+    connections = []
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+
+        def process_request(self, request, client_address):
+            connections.append(client_address)
+            super().process_request(request, client_address)
+
+    server = Server(("127.0.0.1", 0), _JSONHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", connections
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,9 +1,43 @@
-"""Comprehensive unit tests for SimpleAIAgent"""
+"""Comprehensive unit tests for SimpleAIAgent
+
+Tests that take the call fixture run against both SimpleAIAgent and
+AsyncSimpleAIAgent, which must return identical strings.
+"""
+import asyncio
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 import os
 from datetime import datetime
+from async_agent import AsyncSimpleAIAgent
 from main import SimpleAIAgent
+from transport import AsyncHTTPTransport
+
+
+@pytest.fixture(params=["sync", "async"])
+def call(request):
+    """Call a method on either agent with a faked upstream
+
+    Usage: call(method_name, argument, response=..., error=...); the async
+    agent runs method_name + "_async".
+    """
+    def run(method, argument, response=None, error=None):
+        if request.param == "sync":
+            with patch('requests.Session.get') as mock_get:
+                mock_get.return_value = response
+                mock_get.side_effect = error
+                with SimpleAIAgent() as agent:
+                    return getattr(agent, method)(argument)
+
+        async def run_async():
+            with patch.object(AsyncHTTPTransport, 'get', new_callable=AsyncMock) as mock_get:
+                mock_get.return_value = response
+                mock_get.side_effect = error
+                async with AsyncSimpleAIAgent() as agent:
+                    return await getattr(agent, f"{method}_async")(argument)
+
+        return asyncio.run(run_async())
+
+    return run
 
 
 class TestSimpleAIAgentInitialization:
@@ -23,7 +57,7 @@ class TestSimpleAIAgentInitialization:
             agent = SimpleAIAgent()
             assert agent.weather_api_key is None
             assert agent.news_api_key is None
-            assert len(agent.capabilities) == 5
+            assert len(agent.capabilities) == 7
         finally:
             if old_weather:
                 os.environ["OPENWEATHER_API_KEY"] = old_weather
@@ -45,7 +79,9 @@ class TestSimpleAIAgentInitialization:
             "get news",
             "tell time",
             "simple math",
-            "greet user"
+            "greet user",
+            "compare weather with yesterday",
+            "daily forecasts"
         ]
         assert agent.capabilities == expected_capabilities
 
@@ -65,7 +101,7 @@ class TestProcessInput:
         assert intent == "weather"
         
         intent, data = agent.process_input("forecast for tomorrow")
-        assert intent == "weather"
+        assert intent == "forecast"
     
     def test_news_intent(self):
         """Test news intent detection"""
@@ -173,11 +209,55 @@ class TestExtractLocation:
         assert location == "London"
     
     def test_extract_multiple_words(self):
-        """Test location extraction handles only first word after keyword"""
+        """Test that multi-word place names map to their canonical name"""
         agent = SimpleAIAgent()
         
         location = agent.extract_location("weather in New York")
-        assert location == "New"  # Current implementation only gets first word
+        assert location == "New York City"
+
+        location = agent.extract_location("what's the weather in sao paulo?")
+        assert location == "São Paulo"
+
+    def test_unknown_place_is_refused_locally(self, call):
+        """Test that names the gazetteer lacks are answered without an HTTP request"""
+        # No upstream response is set up, so an HTTP request would give another answer
+        assert call("respond", "weather for skiing") == "Sorry, I don't know a place called Skiing"
+        assert call("respond", "temperature for running outside") == (
+            "Sorry, I don't know a place called Running Outside")
+        assert call("respond", "forecast for Xyzzyville") == "Sorry, I don't know a place called Xyzzyville"
+        assert call("respond", "is it colder than yesterday in Xyzzyville") == (
+            "Sorry, I don't know a place called Xyzzyville")
+
+    def test_unknown_place_can_be_asked_upstream(self, response):
+        """Test that resolve_unknown_places sends unknown names to OpenWeather and caches a 404"""
+        agent = SimpleAIAgent(resolve_unknown_places=True)
+
+        location = agent.extract_location("weather in Xyzzyville")
+        assert location == "Xyzzyville"
+        with patch('requests.Session.get') as mock_get:
+            mock_get.return_value = response(404, {"message": "city not found"})
+            assert agent.get_weather(location) == "Sorry, I couldn't get weather data for Xyzzyville"
+            assert agent.get_weather(location) == "Sorry, I couldn't get weather data for Xyzzyville"
+        assert mock_get.call_count == 1
+        assert "q=Xyzzyville" in mock_get.call_args[0][0]
+
+    def test_small_places_countries_and_aliases(self):
+        """Test that towns, countries, US states and common aliases are known"""
+        agent = SimpleAIAgent()
+
+        assert agent.extract_location("weather in juneau") == "Juneau"
+        assert agent.extract_location("weather in key west") == "Key West"
+        assert agent.extract_location("weather in japan") == "Japan"
+        assert agent.extract_location("weather in hawaii") == "Hawaii"
+        assert agent.extract_location("weather in NYC") == "New York City"
+        assert agent.extract_location("weather in LA") == "Los Angeles"
+
+    def test_words_after_for_that_are_not_places(self):
+        """Test that 'forecast for tomorrow' falls back to the default location"""
+        agent = SimpleAIAgent()
+
+        assert agent.extract_location("forecast for tomorrow") == "London"
+        assert agent.extract_location("weather for berlin tomorrow") == "Berlin"
 
 
 class TestExtractTopic:
@@ -208,126 +288,71 @@ class TestExtractTopic:
 class TestGetWeather:
     """Test weather fetching functionality"""
     
-    @patch('requests.get')
-    def test_get_weather_success(self, mock_get):
+    def test_get_weather_success(self, call, response):
         """Test successful weather fetch"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        result = call("get_weather", "Paris", response(200, {
             'main': {'temp': 20.5},
             'weather': [{'description': 'sunny'}]
-        }
-        mock_get.return_value = mock_response
-        
-        agent = SimpleAIAgent()
-        result = agent.get_weather("Paris")
+        }))
         
-        assert "Paris" in result
-        assert "20.5°C" in result
-        assert "sunny" in result
+        assert result == "Weather in Paris: 20.5°C, sunny"
     
-    @patch('requests.get')
-    def test_get_weather_api_error(self, mock_get):
+    def test_get_weather_api_error(self, call, response):
         """Test weather fetch with API error"""
-        mock_response = Mock()
-        mock_response.status_code = 404
-        mock_response.json.return_value = {}
-        mock_get.return_value = mock_response
+        result = call("get_weather", "InvalidCity", response(404, {}))
         
-        agent = SimpleAIAgent()
-        result = agent.get_weather("InvalidCity")
-        
-        assert "couldn't get weather data" in result
+        assert result == "Sorry, I couldn't get weather data for InvalidCity"
     
-    @patch('requests.get')
-    def test_get_weather_exception(self, mock_get):
+    def test_get_weather_exception(self, call):
         """Test weather fetch with exception"""
-        mock_get.side_effect = Exception("Network error")
+        result = call("get_weather", "Paris", error=Exception("Network error"))
         
-        agent = SimpleAIAgent()
-        result = agent.get_weather("Paris")
-        
-        assert "unavailable" in result
+        assert result == "Weather service is currently unavailable"
 
 
 class TestGetNews:
     """Test news fetching functionality"""
     
-    @patch('requests.get')
-    def test_get_news_general_success(self, mock_get):
+    def test_get_news_general_success(self, call, response):
         """Test successful general news fetch"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        result = call("get_news", "general", response(200, {
             'articles': [
                 {'title': 'Breaking News 1'},
                 {'title': 'Breaking News 2'},
                 {'title': 'Breaking News 3'}
             ]
-        }
-        mock_get.return_value = mock_response
-        
-        agent = SimpleAIAgent()
-        result = agent.get_news("general")
+        }))
         
-        assert "Latest news" in result
-        assert "Breaking News 1" in result
-        assert "Breaking News 2" in result
+        assert result == "Latest news about general:\n• Breaking News 1\n• Breaking News 2\n• Breaking News 3"
     
-    @patch('requests.get')
-    def test_get_news_specific_topic_success(self, mock_get):
+    def test_get_news_specific_topic_success(self, call, response):
         """Test successful topic-specific news fetch"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        result = call("get_news", "technology", response(200, {
             'articles': [
                 {'title': 'Tech News 1'},
                 {'title': 'Tech News 2'}
             ]
-        }
-        mock_get.return_value = mock_response
-        
-        agent = SimpleAIAgent()
-        result = agent.get_news("technology")
+        }))
         
-        assert "technology" in result
-        assert "Tech News 1" in result
+        assert result == "Latest news about technology:\n• Tech News 1\n• Tech News 2"
     
-    @patch('requests.get')
-    def test_get_news_api_error(self, mock_get):
+    def test_get_news_api_error(self, call, response):
         """Test news fetch with API error"""
-        mock_response = Mock()
-        mock_response.status_code = 401
-        mock_response.json.return_value = {'message': 'Invalid API key'}
-        mock_get.return_value = mock_response
-        
-        agent = SimpleAIAgent()
-        result = agent.get_news("sports")
+        result = call("get_news", "sports", response(401, {'message': 'Invalid API key'}))
         
-        assert "API Error" in result or "couldn't find news" in result
+        assert result == "News API Error: Invalid API key"
     
-    @patch('requests.get')
-    def test_get_news_empty_articles(self, mock_get):
+    def test_get_news_empty_articles(self, call, response):
         """Test news fetch with no articles"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {'articles': []}
-        mock_get.return_value = mock_response
+        result = call("get_news", "obscuretopic", response(200, {'articles': []}))
         
-        agent = SimpleAIAgent()
-        result = agent.get_news("obscuretopic")
-        
-        assert "couldn't find news" in result
+        assert result == "Sorry, I couldn't find news about obscuretopic. Status code: 200"
     
-    @patch('requests.get')
-    def test_get_news_exception(self, mock_get):
+    def test_get_news_exception(self, call):
         """Test news fetch with exception"""
-        mock_get.side_effect = Exception("Connection timeout")
+        result = call("get_news", "general", error=Exception("Connection timeout"))
         
-        agent = SimpleAIAgent()
-        result = agent.get_news("general")
-        
-        assert "error" in result.lower()
+        assert result == "News service error: Connection timeout"
 
 
 class TestGetTime:
@@ -422,6 +447,13 @@ class TestDoMath:
         result = agent.do_math("1 / 0")
         assert "couldn't calculate" in result
 
+    def test_runaway_exponent_is_refused(self):
+        """Test that a tower of powers is rejected instead of computed"""
+        agent = SimpleAIAgent()
+
+        result = agent.do_math("9**9**9**9")
+        assert "couldn't calculate that: exponent larger than" in result
+
 
 class TestGreetUser:
     """Test greeting functionality"""
@@ -506,12 +538,15 @@ class TestRespond:
         
         assert result == "Hello!"
     
-    def test_respond_integration(self):
+    def test_respond_integration(self, call):
         """Test full respond integration"""
-        agent = SimpleAIAgent()
-        
         # Test with greeting (no external API needed)
-        result = agent.respond("hello")
+        result = call("respond", "hello")
         
         assert isinstance(result, str)
         assert len(result) > 0
+
+    @pytest.mark.parametrize("prompt", ["hello", "help", "2 * 8", "random gibberish xyz"])
+    def test_local_intents(self, call, prompt):
+        """Test that both agents answer intents that never touch the network alike"""
+        assert call("respond", prompt) == SimpleAIAgent().respond(prompt)
@@ -0,0 +1,29 @@
+"""Tests for the asyncio agent's transport
+
+Sync/async parity of the agent itself is covered by tests/test_agent.py,
+whose call fixture runs each test against both agents.
+"""
+import asyncio
+
+from transport import AsyncHTTPTransport, BufferedResponse
+
+
+class TestAsyncHTTPTransport:
+    """Test the aiohttp-backed transport against a local server"""
+
+    def test_concurrent_gets_share_one_session(self, local_server):
+        """Test many concurrent requests through one pooled session"""
+        base_url, _ = local_server
+        url = f"{base_url}/data/2.5/weather"
+
+        async def fetch_all():
+            async with AsyncHTTPTransport(pool_maxsize=8) as transport:
+                responses = await asyncio.gather(*(transport.get(url) for _ in range(50)))
+                return responses, transport.hosts()
+
+        responses, hosts = asyncio.run(fetch_all())
+
+        assert len(hosts) == 1
+        assert all(isinstance(r, BufferedResponse) for r in responses)
+        assert {r.status_code for r in responses} == {200}
+        assert responses[0].json()["weather"][0]["description"] == "snow"
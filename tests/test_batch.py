@@ -0,0 +1,167 @@
+"""Unit tests for JSONL batch mode"""
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from batch import read_prompts, run_batch
+from main import SimpleAIAgent, main
+
+
+def _results(out):
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+class TestReadPrompts:
+    """Test JSONL parsing"""
+
+    def test_strings_objects_and_bad_lines(self):
+        """Test accepted shapes and per-line errors"""
+        lines = ['"hello"\n', '{"id": 7, "prompt": "2 + 2"}\n', '\n', 'oops\n', '{"text": "x"}\n']
+        records = list(read_prompts(lines))
+
+        assert records[0] == (1, {"prompt": "hello"})
+        assert records[1] == (2, {"id": 7, "prompt": "2 + 2"})
+        assert records[2][0] == 4 and "invalid JSON" in records[2][1]["error"]
+        assert records[3][0] == 5 and "prompt" in records[3][1]["error"]
+
+
+class TestRunBatch:
+    """Test streaming prompts through the agent"""
+
+    def test_input_order(self):
+        """Test that results follow input order by default"""
+        agent = SimpleAIAgent(verbose=False)
+        lines = [json.dumps({"id": i, "prompt": f"{i} * 2"}) for i in range(20)]
+        out = io.StringIO()
+
+        assert run_batch(agent, lines, out, workers=4) == 20
+        results = _results(out)
+        assert [r["id"] for r in results] == list(range(20))
+        assert results[3] == {"id": 3, "prompt": "3 * 2", "line": 4, "intent": "math", "response": "Result: 6"}
+
+    def test_repeats_use_the_response_cache(self):
+        """Test that batch prompts go through respond() and its response cache"""
+        agent = SimpleAIAgent(verbose=False)
+        out = io.StringIO()
+        run_batch(agent, ['"6 * 7"', '"6 * 7 "', '"6*7"'], out, workers=1)
+        assert [r["intent"] for r in _results(out)] == ["math"] * 3
+        assert agent.response_cache.stats()["hits"] == 1
+
+    def test_completion_order(self):
+        """Test that completion order lets fast prompts overtake slow ones"""
+        agent = SimpleAIAgent(verbose=False)
+        release = threading.Event()
+        original = agent.execute_action
+
+        def execute_action(intent, data):
+            if intent == "greeting":
+                release.wait(5)
+            return original(intent, data)
+
+        agent.execute_action = execute_action
+        out = io.StringIO()
+        lines = ['"hello"', '"1 + 1"', '"2 + 2"']
+        timer = threading.Timer(0.1, release.set)
+        timer.start()
+
+        run_batch(agent, lines, out, workers=3, order="completion")
+        timer.cancel()
+        assert [r["line"] for r in _results(out)][-1] == 1
+
+    def test_input_is_consumed_lazily(self):
+        """Test that only a bounded window of prompts is read ahead"""
+        agent = SimpleAIAgent(verbose=False)
+        consumed = []
+        written = []
+
+        def lines():
+            for i in range(1000):
+                consumed.append(i)
+                yield json.dumps(f"{i} + 1")
+
+        class Sink:
+            def write(self, text):
+                written.append(text)
+                assert len(consumed) - len(written) <= 2 * 2 + 1
+
+            def flush(self):
+                pass
+
+        assert run_batch(agent, lines(), Sink(), workers=2) == 1000
+
+    def test_errors_do_not_stop_the_batch(self):
+        """Test that failing prompts produce an error line and processing continues"""
+        agent = SimpleAIAgent(verbose=False)
+        agent.execute_action = lambda intent, data: 1 / 0 if intent == "greeting" else "ok"
+        out = io.StringIO()
+
+        run_batch(agent, ['"hello"', 'not json', '"what time is it"'], out, workers=2)
+        results = _results(out)
+        assert "division" in results[0]["error"]
+        assert "invalid JSON" in results[1]["error"]
+        assert results[2]["response"] == "ok"
+
+    def test_no_respond_chatter(self, capsys):
+        """Test that batch mode prints nothing but results"""
+        agent = SimpleAIAgent(verbose=False)
+        out = io.StringIO()
+        run_batch(agent, ['"hello"'], out)
+        assert capsys.readouterr().out == ""
+
+    def test_workers_overlap(self):
+        """Test that prompts really run concurrently"""
+        agent = SimpleAIAgent(verbose=False)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def execute_action(intent, data):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+            return "ok"
+
+        agent.execute_action = execute_action
+        run_batch(agent, ['"hello"'] * 8, io.StringIO(), workers=4)
+        assert max(peak) > 1
+
+    def test_zero_workers_run_one_at_a_time(self):
+        """Test that workers below 1 still answer every prompt"""
+        out = io.StringIO()
+        assert run_batch(SimpleAIAgent(verbose=False), ['"2 + 2"', '"hello"'], out, workers=0) == 2
+        assert [r["intent"] for r in _results(out)] == ["math", "greeting"]
+
+
+class TestBatchCommandLine:
+    """Test the --batch entry point"""
+
+    def test_main_batch_files(self, tmp_path, capsys):
+        """Test reading a JSONL file and writing a JSONL file"""
+        source = tmp_path / "prompts.jsonl"
+        target = tmp_path / "answers.jsonl"
+        source.write_text('"hello"\n"6 * 7"\n', encoding="utf-8")
+
+        main(["--batch", str(source), "--output", str(target), "--workers", "2"])
+
+        results = [json.loads(line) for line in target.read_text(encoding="utf-8").splitlines()]
+        assert [r["intent"] for r in results] == ["greeting", "math"]
+        assert results[1]["response"] == "Result: 42"
+        assert capsys.readouterr().out == ""
+
+    def test_workers_must_be_positive(self, capsys):
+        """Test that --workers 0 is rejected before any agent starts"""
+        with pytest.raises(SystemExit):
+            main(["--batch", "-", "--workers", "0"])
+        assert "must be at least 1, not 0" in capsys.readouterr().err
+
+    def test_verbose_agent_still_echoes(self, capsys):
+        """Test that interactive agents keep their respond() output"""
+        SimpleAIAgent().respond("hello")
+        assert "User: hello" in capsys.readouterr().out
+
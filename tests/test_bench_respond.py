@@ -0,0 +1,55 @@
+"""Tests for the end-to-end benchmark harness"""
+import json
+
+from benchmarks.bench_respond import WORKLOAD, build_workload, main, regressions
+from main import SimpleAIAgent
+
+
+def _results(p95):
+    return {"results": {stage: {"p95_ms": p95} for stage in ("respond", "process_input", "execute_action")}}
+
+
+class TestBenchRespond:
+    """Test workload generation, the regression check and a tiny run"""
+
+    def test_workload_is_mixed_and_reproducible(self):
+        """Test that every intent appears and the seed fixes the prompts"""
+        workload = build_workload(500)
+        assert {intent for intent, _ in workload} == set(WORKLOAD)
+        assert workload == build_workload(500)
+
+    def test_prompts_have_their_labelled_intent(self):
+        """Test that every prompt template is detected as the intent it is timed under"""
+        with SimpleAIAgent(verbose=False) as agent:
+            for intent, (_, templates) in WORKLOAD.items():
+                for template in templates:
+                    prompt = template.format(city="Paris", topic="rust", a=1, b=2)
+                    assert agent.process_input(prompt)[0] == intent, prompt
+
+    def test_regressions_respect_threshold_and_noise_floor(self):
+        """Test that only real, large-enough slowdowns are reported"""
+        baseline = _results(1.0)
+        assert regressions(_results(1.1)["results"], baseline, 0.2) == []
+        assert len(regressions(_results(1.5)["results"], baseline, 0.2)) == 3
+        assert regressions(_results(0.03)["results"], _results(0.01), 0.2) == []
+
+    def test_run_saves_json_and_checks_baseline(self, tmp_path, capsys):
+        """Test a small end-to-end run against the stub upstream"""
+        output = tmp_path / "run.json"
+        assert main(["--requests", "50", "--concurrency", "2", "--upstream-latency", "0",
+                     "--output", str(output)]) == 0
+        report = json.loads(output.read_text())
+        assert report["results"]["respond"]["count"] == 50
+        assert "cached_results" not in report
+
+        assert main(["--requests", "50", "--concurrency", "2", "--upstream-latency", "0",
+                     "--response-cache", "--output", str(output)]) == 0
+        report = json.loads(output.read_text())
+        assert report["cached_results"]["respond"]["count"] == 50
+        assert "response cache on" in capsys.readouterr().out
+
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps(_results(0.0)))
+        assert main(["--requests", "50", "--upstream-latency", "0", "--baseline", str(baseline),
+                     "--min-delta", "0"]) == 1
+        assert "REGRESSION respond" in capsys.readouterr().out
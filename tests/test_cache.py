@@ -0,0 +1,107 @@
+"""Unit tests for the TTL/LRU weather cache"""
+from unittest.mock import patch
+
+from cache import MISSING, TTLCache, normalize_key
+from main import SimpleAIAgent
+
+
+class TestNormalizeKey:
+    """Test cache key normalization"""
+
+    def test_case_and_whitespace_collapse(self):
+        """Test that case and surrounding/inner whitespace are ignored"""
+        assert normalize_key("Paris") == normalize_key("paris") == normalize_key(" PARIS ")
+        assert normalize_key("New   York") == "new york"
+
+
+class TestTTLCache:
+    """Test expiry, eviction and counters"""
+
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted"""
+        cache = TTLCache()
+        assert cache.get("paris") is MISSING
+        cache.set("paris", {"temp": 20})
+        assert cache.get("paris") == {"temp": 20}
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+
+    def test_entries_expire(self, clock):
+        """Test that entries stop being served after their TTL"""
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set("paris", "sunny")
+        clock.now += 9
+        assert cache.get("paris") == "sunny"
+        clock.now += 2
+        assert cache.get("paris") is MISSING
+        assert cache.get_stale("paris") == "sunny"
+        assert cache.get_stale("rome") is MISSING
+
+    def test_negative_entries_use_shorter_ttl(self, clock):
+        """Test that negative results expire on the negative TTL"""
+        cache = TTLCache(ttl=600, negative_ttl=30, clock=clock)
+        cache.set_negative("atlantis")
+        assert cache.get("atlantis") is None
+        clock.now += 31
+        assert cache.get("atlantis") is MISSING
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+
+class TestAgentWeatherCache:
+    """Test the cache in front of get_weather"""
+
+    @patch('requests.Session.get')
+    def test_equivalent_locations_share_one_fetch(self, mock_get, response):
+        """Test that Paris, paris and ' PARIS ' hit the API once"""
+        mock_get.return_value = response(200, {
+            'main': {'temp': 20.5},
+            'weather': [{'description': 'sunny'}]
+        })
+        agent = SimpleAIAgent()
+
+        assert agent.get_weather("Paris") == "Weather in Paris: 20.5°C, sunny"
+        assert agent.get_weather("paris") == "Weather in paris: 20.5°C, sunny"
+        assert "20.5°C" in agent.get_weather(" PARIS ")
+        assert mock_get.call_count == 1
+        assert agent.weather_cache.stats()["hits"] == 2
+
+    @patch('requests.Session.get')
+    def test_not_found_is_negatively_cached(self, mock_get, clock, response):
+        """Test that a 404 is remembered for the negative TTL"""
+        mock_get.return_value = response(404, {'message': 'city not found'})
+        agent = SimpleAIAgent(weather_cache=TTLCache(ttl=600, negative_ttl=60, clock=clock))
+
+        assert "couldn't get weather data" in agent.get_weather("Pariss")
+        assert "couldn't get weather data" in agent.get_weather("Pariss")
+        assert mock_get.call_count == 1
+
+        clock.now += 61
+        agent.get_weather("Pariss")
+        assert mock_get.call_count == 2
+
+    @patch('requests.Session.get')
+    def test_other_errors_are_not_cached(self, mock_get, response):
+        """Test that exceptions and non-404 failures always retry upstream"""
+        mock_get.side_effect = Exception("Network error")
+        agent = SimpleAIAgent()
+
+        assert "unavailable" in agent.get_weather("Paris")
+        mock_get.side_effect = None
+        mock_get.return_value = response(401, {'message': 'Invalid API key'})
+        agent.get_weather("Paris")
+        agent.get_weather("Paris")
+        assert mock_get.call_count == 3
+        assert len(agent.weather_cache) == 0
@@ -0,0 +1,166 @@
+"""Unit tests for the persistent SQLite cache store"""
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from cache import MISSING, TTLCache
+from cache_store import SQLiteCacheStore
+from main import SimpleAIAgent
+
+
+def _hits(store):
+    """Return {key: hits} for the store's rows"""
+    return dict(store._connection().execute("SELECT key, hits FROM cache").fetchall())
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"), clock=clock)
+    yield store
+    store.close()
+
+
+class TestSQLiteCacheStore:
+    """Test the on-disk store"""
+
+    def test_round_trip_and_expiry(self, store):
+        """Test JSON values with a TTL"""
+        store.set("weather", "paris", {"temp": 20.5, "description": "sunny"}, ttl=60)
+        assert store.get("weather", "paris") == ({"temp": 20.5, "description": "sunny"}, 60)
+        assert store.get("news", "paris") == (MISSING, None)
+
+        store._clock.now += 61
+        assert store.get("weather", "paris") == (MISSING, None)
+
+    def test_wal_mode(self, store, tmp_path):
+        """Test that the database is in WAL mode for multi-process use"""
+        conn = sqlite3.connect(str(tmp_path / "cache.db"))
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    def test_sweep_deletes_expired_rows(self, store):
+        """Test bulk removal of expired rows"""
+        for i in range(10):
+            store.set("weather", f"city{i}", None, ttl=10 if i < 7 else 100)
+        store._clock.now += 50
+        assert store.sweep() == 7
+        assert len(store) == 3
+
+    def test_periodic_sweep(self, tmp_path, clock):
+        """Test that writes trigger a sweep every sweep_every rows"""
+        store = SQLiteCacheStore(str(tmp_path / "cache.db"), sweep_every=5, clock=clock)
+        for i in range(4):
+            store.set("news", f"topic{i}", [], ttl=1)
+        clock.now += 2
+        store.set("news", "fresh", [], ttl=100)
+        assert len(store) == 1
+        store.close()
+
+    def test_reads_do_not_write(self, store):
+        """Test that get() leaves the hit counters alone"""
+        store.set("weather", "paris", 1, ttl=100)
+        for _ in range(3):
+            store.get("weather", "paris")
+        assert _hits(store) == {"paris": 0}
+
+    def test_hottest_orders_by_reads(self, store):
+        """Test that the most-read live keys come first"""
+        for key in ("paris", "tokyo", "lima", "expired"):
+            store.set("weather", key, key.upper(), ttl=-1 if key == "expired" else 100)
+        store.add_hits("weather", {"paris": 1, "tokyo": 5, "lima": 3, "expired": 9, "missing": 2})
+
+        assert [key for key, _, _ in store.hottest("weather", 2)] == ["tokyo", "lima"]
+
+    def test_rewrite_keeps_hits(self, store):
+        """Test that refreshing a row doesn't reset its popularity"""
+        store.set("weather", "paris", 1, ttl=100)
+        store.set("weather", "rome", 1, ttl=100)
+        store.add_hits("weather", {"paris": 1})
+        store.set("weather", "paris", 2, ttl=100)
+        assert store.hottest("weather", 1)[0][:2] == ("paris", 2)
+
+    def test_shared_between_store_instances(self, tmp_path):
+        """Test that two stores (as in two processes) see each other's writes"""
+        path = str(tmp_path / "shared.db")
+        first, second = SQLiteCacheStore(path), SQLiteCacheStore(path)
+        first.set("news", "rust", {"titles": ["Rust 2.0"]}, ttl=60)
+        assert second.get("news", "rust")[0] == {"titles": ["Rust 2.0"]}
+        first.close()
+        second.close()
+
+
+class TestTieredCache:
+    """Test TTLCache reading and writing through a store"""
+
+    def test_read_through_and_write_through(self, store):
+        """Test that memory misses fall back to the store"""
+        writer = TTLCache()
+        writer.attach(store, "weather")
+        writer.set("oslo", {"temp": 3})
+
+        reader = TTLCache()
+        reader.attach(store, "weather")
+        assert reader.get("oslo") == {"temp": 3}
+        assert reader.stats()["store_hits"] == 1
+        assert reader.get("oslo") == {"temp": 3}
+        assert reader.stats()["hits"] == 1
+
+    def test_reads_are_flushed_periodically(self, store):
+        """Test that memory hits reach the store's counters every flush_every seconds"""
+        cache = TTLCache(clock=store._clock)
+        cache.attach(store, "weather", flush_every=30)
+        cache.set("paris", "P")
+        cache.set("rome", "R")
+        for _ in range(3):
+            cache.get("rome")
+        cache.get("paris")
+        assert _hits(store) == {"paris": 0, "rome": 0}
+
+        store._clock.now += 30
+        cache.get("paris")  # flushes the counts so far, then counts itself
+        assert _hits(store) == {"paris": 1, "rome": 3}
+        assert cache.flush_reads() == 1
+        assert _hits(store) == {"paris": 2, "rome": 3}
+        assert cache.flush_reads() == 0
+
+    def test_preload(self, store):
+        """Test warming memory from the hottest rows"""
+        store.set("weather", "paris", "P", ttl=100)
+        store.set("weather", "rome", "R", ttl=100)
+        store.add_hits("weather", {"rome": 1})
+        cache = TTLCache(maxsize=1)
+        cache.attach(store, "weather")
+
+        assert cache.preload(2) == 2
+        assert list(cache._data) == ["rome"]
+
+
+class TestAgentWarmStart:
+    """Test the agent with a persistent store"""
+
+    @patch('requests.Session.get')
+    def test_restart_is_served_from_disk(self, mock_get, tmp_path, weather_response):
+        """Test that a new process reuses answers without calling upstream"""
+        mock_get.return_value = weather_response(8.5, "drizzle")
+        path = str(tmp_path / "agent.db")
+
+        with SimpleAIAgent(cache_store=SQLiteCacheStore(path)) as agent:
+            agent.get_weather("Dublin")
+        assert mock_get.call_count == 1
+
+        with SimpleAIAgent(cache_store=SQLiteCacheStore(path), warm_start=10) as agent:
+            assert len(agent.weather_cache) == 1
+            assert agent.get_weather("dublin") == "Weather in dublin: 8.5°C, drizzle"
+        assert mock_get.call_count == 1
+
+    def test_close_flushes_reads(self, tmp_path):
+        """Test that reads counted since the last flush are saved on close"""
+        path = str(tmp_path / "agent.db")
+        with SimpleAIAgent(verbose=False, cache_store=SQLiteCacheStore(path)) as agent:
+            agent.weather_cache.set("dublin", {"temp": 8.5})
+            agent.weather_cache.get("dublin")
+            agent.weather_cache.get("dublin")
+        store = SQLiteCacheStore(path)
+        assert _hits(store) == {"dublin": 2}
+        store.close()
@@ -0,0 +1,108 @@
+"""Tests for near-duplicate headline suppression"""
+import numpy as np
+import pytest
+
+import dedup
+from benchmarks.bench_dedup import make_headlines
+from dedup import MinHashDeduper, dedupe, jaccard, pairwise_keep, shingles
+
+SYNDICATED = [
+    "Fed raises rates by a quarter point - Reuters",
+    "Fed raises rates by a quarter point | CNN",
+    "Fed raises interest rates by a quarter point - BBC News",
+    "Rust 2.0 released with async traits",
+    "Fed raises rates by quarter point",
+    "Rust 2.0 released with new async traits - The Verge",
+    "Storm closes schools across the north east",
+    "Local team wins the championship",
+    "Markets rally as inflation cools",
+]
+
+
+class TestShingles:
+    """Test shingling and similarity"""
+
+    def test_source_tag_and_case_are_ignored(self):
+        """Test that outlet suffixes and case do not change the shingles"""
+        assert shingles("Fed Raises Rates - Reuters") == shingles("fed raises rates | BBC News")
+        assert shingles("Fed raises rates") == {"fed raises", "raises rates"}
+
+    def test_short_and_empty(self):
+        """Test headlines shorter than the shingle size"""
+        assert shingles("Breaking") == {"breaking"}
+        assert shingles("!!!") == set()
+        assert jaccard(set(), set()) == 1.0
+        assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+
+
+class TestMinHashDeduper:
+    """Test signatures, LSH candidates and the kept headlines"""
+
+    def test_keeps_the_first_of_each_story(self):
+        """Test that syndicated variants collapse onto their first headline"""
+        assert dedupe(SYNDICATED) == [SYNDICATED[0], SYNDICATED[3], SYNDICATED[6], SYNDICATED[7], SYNDICATED[8]]
+        assert dedupe(SYNDICATED, limit=2) == [SYNDICATED[0], SYNDICATED[3]]
+        assert dedupe(SYNDICATED, threshold=1.0) == [title for i, title in enumerate(SYNDICATED) if i != 1]
+        assert dedupe([]) == []
+
+    def test_matches_pairwise_comparison(self):
+        """Test that LSH keeps the same headlines as checking every pair"""
+        titles = make_headlines(1500, seed=4)
+        assert MinHashDeduper().keep(titles) == pairwise_keep(titles)
+        assert MinHashDeduper(0.8).keep(titles) == pairwise_keep(titles, 0.8)
+
+    def test_signatures_estimate_similarity(self):
+        """Test that the share of equal signature values tracks Jaccard similarity"""
+        deduper = MinHashDeduper(num_perm=256)
+        a = shingles("the quick brown fox jumps over the lazy dog today")
+        b = shingles("the quick brown fox leaps over the lazy dog today")
+        signatures = deduper.signatures([a, b, set()])
+        assert abs(np.mean(signatures[0] == signatures[1]) - jaccard(a, b)) < 0.1
+        # Signatures are the same in every process (no salted hash())
+        assert (MinHashDeduper(num_perm=256).signatures([a]) == signatures[:1]).all()
+
+    def test_bands_keep_recall_at_threshold(self):
+        """Test that the banding makes a pair at threshold a candidate almost always"""
+        for threshold in (0.3, 0.5, 0.8, 0.9):
+            deduper = MinHashDeduper(threshold)
+            assert deduper.bands * deduper.rows <= deduper.num_perm
+            assert 1 - (1 - threshold ** deduper.rows) ** deduper.bands >= 0.99
+        with pytest.raises(ValueError):
+            MinHashDeduper(0)
+
+
+class TestAgentDedup:
+    """Test dedup mode in the agent"""
+
+    def test_news_shows_distinct_stories(self, offline_agent, news_response):
+        """Test that near-duplicates are dropped before the top five are picked"""
+        agent = offline_agent(dedupe_news=True)
+        agent.transport.get.return_value = news_response(SYNDICATED + ["Tenth story about something else"])
+        titles = agent.get_news("economy").splitlines()[1:]
+        assert titles == [f"• {SYNDICATED[i]}" for i in (0, 3, 6, 7, 8)]
+
+    def test_lean_mode_reads_a_larger_page(self, offline_agent, news_response):
+        """Test that lean dedup mode asks for and reads NEWS_CANDIDATES articles"""
+        agent = offline_agent(lean_news=True, dedupe_news=True)
+        agent.transport.get.return_value = news_response(SYNDICATED)
+        answer = agent.get_news("economy")
+        assert "pageSize=20" in agent.transport.get.call_args[0][0]
+        assert answer.count("•") == 5 and "Markets rally" in answer
+
+    def test_without_numpy(self, offline_agent, news_response, monkeypatch):
+        """Test that dedupe() falls back to pairwise comparison and keeps the same headlines"""
+        expected = dedupe(SYNDICATED, limit=4)
+        monkeypatch.setattr(dedup, "np", None)
+        assert dedupe(SYNDICATED, limit=4) == expected
+        agent = offline_agent(dedupe_news=True)
+        agent.transport.get.return_value = news_response(SYNDICATED)
+        assert agent.get_news("economy").count("•") == 5
+
+    def test_merged_topics_drop_shared_stories(self, offline_agent):
+        """Test that a story found under two topics is shown once"""
+        agent = offline_agent(dedupe_news=True)
+        agent.news_cache.set("economy", {"titles": [SYNDICATED[0], "Jobs report beats forecasts"]})
+        agent.news_cache.set("markets", {"titles": [SYNDICATED[1], SYNDICATED[8]]})
+        answer = agent.get_news_many(("economy", "markets"))
+        assert answer.splitlines()[1:] == [
+            f"• [economy] {SYNDICATED[0]}", "• [economy] Jobs report beats forecasts", f"• [markets] {SYNDICATED[8]}"]
@@ -0,0 +1,172 @@
+"""Tests for forecast aggregation and the forecast intent"""
+import asyncio
+import random
+from collections import Counter
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from async_agent import AsyncSimpleAIAgent
+import forecast
+from forecast import DAY, summarize, summarize_many
+from main import SimpleAIAgent
+from quota import QuotaManager
+from stub_server import StubUpstream, forecast_payload
+
+START = 1_700_000_000 - 1_700_000_000 % 10800  # a 3-hour boundary
+
+
+def _slot(dt, low, high, code, description=None):
+    return {"dt": dt, "main": {"temp_min": low, "temp_max": high},
+            "weather": [{"id": code, "description": description or f"code {code}"}]}
+
+
+def _naive(data):
+    """Per-day summaries computed slot by slot"""
+    offset = data["city"]["timezone"]
+    days = {}
+    for slot in data["list"]:
+        date = datetime.fromtimestamp(slot["dt"] + offset, timezone.utc).date().isoformat()
+        days.setdefault(date, []).append(slot)
+    summaries = []
+    for date in sorted(days):
+        slots = days[date]
+        counts = Counter(slot["weather"][0]["id"] for slot in slots)
+        code = min(counts, key=lambda c: (-counts[c], c))
+        summaries.append({
+            "date": date,
+            "low": min(slot["main"]["temp_min"] for slot in slots),
+            "high": max(slot["main"]["temp_max"] for slot in slots),
+            "condition": code,
+            "slots": len(slots),
+        })
+    return summaries
+
+
+class TestSummarize:
+    """Test the vectorized daily aggregation"""
+
+    def test_matches_naive_over_many_cities(self):
+        """Test summarize_many against a per-slot computation"""
+        rng = random.Random(7)
+        forecasts = [forecast_payload(f"city{n}", rng, START + 3600 * rng.randrange(24)) for n in range(50)]
+        for data in forecasts:
+            data["city"]["timezone"] = rng.choice([-36000, -18000, 0, 3600, 19800, 43200])
+        for data, summary in zip(forecasts, summarize_many(forecasts)):
+            assert [{key: day[key] for key in ("date", "low", "high", "condition", "slots")}
+                    for day in summary] == _naive(data)
+            assert sum(day["slots"] for day in summary) == len(data["list"])
+
+    def test_dominant_condition_ties_go_to_lower_code(self):
+        """Test that the most frequent code wins and ties pick the lower one"""
+        day = START - START % DAY
+        data = {"city": {"timezone": 0}, "list": [
+            _slot(day, 5, 9, 800, "clear sky"), _slot(day + 10800, 4, 8, 500, "light rain"),
+            _slot(day + 21600, 6, 12, 800, "clear sky"), _slot(day + 32400, 3, 7, 500, "light rain"),
+            _slot(day + DAY, 1, 2, 800, "clear sky"), _slot(day + DAY + 10800, 1, 2, 800, "clear sky"),
+            _slot(day + DAY + 21600, 0, 3, 601, "snow"),
+        ]}
+        first, second = summarize(data)
+        assert (first["low"], first["high"], first["condition"], first["description"]) == (3, 12, 500, "light rain")
+        assert (second["condition"], second["description"], second["slots"]) == (800, "clear sky", 3)
+
+    def test_days_follow_the_city_timezone(self):
+        """Test that slots are grouped by local rather than UTC day"""
+        day = START - START % DAY
+        slots = [_slot(day + 21 * 3600, 1, 2, 800), _slot(day + DAY + 3600, 3, 4, 800)]
+        assert [d["date"] for d in summarize({"city": {"timezone": 0}, "list": slots})] == [
+            datetime.fromtimestamp(day, timezone.utc).date().isoformat(),
+            datetime.fromtimestamp(day + DAY, timezone.utc).date().isoformat()]
+        # Four hours ahead of UTC, both slots fall on the second local day
+        assert [d["slots"] for d in summarize({"city": {"timezone": 4 * 3600}, "list": slots})] == [2]
+
+    def test_empty(self):
+        """Test answers without slots"""
+        assert summarize_many([]) == []
+        assert summarize_many([{"list": []}, {"city": {"timezone": 0}}]) == [[], []]
+
+    def test_without_numpy(self, monkeypatch):
+        """Test that the plain Python reduction gives the same summaries"""
+        rng = random.Random(11)
+        forecasts = [forecast_payload(f"city{n}", rng, START + 3600 * rng.randrange(24)) for n in range(20)]
+        for data in forecasts:
+            data["city"]["timezone"] = rng.choice([-18000, 0, 19800])
+        expected = summarize_many(forecasts)
+        monkeypatch.setattr(forecast, "np", None)
+        assert summarize_many(forecasts) == expected
+        assert summarize_many([{"list": []}]) == [[]]
+
+
+@pytest.fixture
+def agent(offline_agent, response):
+    agent = offline_agent()
+    agent.transport.get.return_value = response(200, forecast_payload("Oslo", random.Random(1), START))
+    return agent
+
+
+class TestForecastIntent:
+    """Test forecast questions end to end"""
+
+    def test_intent_and_location(self, agent):
+        """Test that forecast prompts route to the forecast intent"""
+        assert agent.process_input("What's the forecast for Oslo?") == ("forecast", "Oslo")
+        assert agent.process_input("will it rain tomorrow in Lima") == ("forecast", "Lima")
+        assert agent.process_input("weather this week in Oslo") == ("forecast", "Oslo")
+
+    def test_time_words_alone_are_not_forecasts(self, agent):
+        """Test that "tomorrow" and "this week" need a weather word to beat news"""
+        assert agent.process_input("latest news about tomorrow") == ("news", "tomorrow")
+        assert agent.process_input("news this week") == ("news", "general")
+
+    def test_answer_and_cache(self, agent):
+        """Test the rendered days and that a second ask is served from the cache"""
+        answer = agent.respond("forecast for Oslo")
+        lines = answer.splitlines()
+        assert lines[0] == "Forecast for Oslo:"
+        assert 1 <= len(lines) - 1 <= 5 and all(line.startswith("• ") for line in lines[1:])
+        assert "°C" in lines[1]
+        assert "/data/2.5/forecast?q=Oslo" in agent.transport.get.call_args[0][0]
+        assert agent.respond("oslo forecast please") == answer
+        assert agent.transport.get.call_count == 1
+        assert agent.metrics.snapshot()["outcomes"]["forecast"] == {"success": 2}
+
+    def test_errors(self, agent, response):
+        """Test 404s and failed lookups"""
+        agent.transport.get.return_value = response(404, {"message": "city not found"})
+        assert agent.get_forecast("Nowhere") == "Sorry, I couldn't get a forecast for Nowhere"
+        agent.transport.get.side_effect = RuntimeError("boom")
+        assert agent.get_forecast("Paris") == "Forecast service is currently unavailable"
+        assert agent.metrics.snapshot()["outcomes"]["forecast"] == {"upstream_error": 1, "exception": 1}
+
+    def test_answers_without_numpy(self, agent, monkeypatch):
+        """Test that a missing NumPy still gives a forecast from one upstream call"""
+        expected = agent.get_forecast("Oslo")
+        agent.forecast_cache.clear()
+        monkeypatch.setattr(forecast, "np", None)
+        assert agent.get_forecast("Oslo") == expected
+        assert agent.transport.get.call_count == 2
+
+    def test_many_against_stub(self):
+        """Test a batch of cities against the stub upstream"""
+        with StubUpstream(seed=3) as upstream, SimpleAIAgent(
+                verbose=False, quota=QuotaManager(limits={}),
+                weather_base_url=upstream.base_url, news_base_url=upstream.base_url) as agent:
+            agent.get_forecast("Paris")
+            answers = agent.get_forecast_many(["Paris", "Tokyo", "Atlantis", "tokyo"])
+            assert answers[0] == agent.get_forecast("Paris")
+            assert answers[1].startswith("Forecast for Tokyo:\n• ")
+            assert answers[2] == "Sorry, I couldn't get a forecast for Atlantis"
+            assert answers[3] == answers[1].replace("Tokyo", "tokyo")
+            assert upstream.stats()["forecast"] == {200: 2, 404: 1}
+
+    def test_async_agent(self, agent):
+        """Test that the asyncio agent answers forecasts like the sync one"""
+        async def run():
+            transport = AsyncMock()
+            transport.get.return_value = agent.transport.get.return_value
+            async with AsyncSimpleAIAgent(async_transport=transport, verbose=False,
+                                          quota=QuotaManager(limits={})) as async_agent:
+                return await async_agent.respond_async("forecast for Oslo")
+
+        assert asyncio.run(run()) == agent.respond("forecast for Oslo")
@@ -0,0 +1,102 @@
+"""Unit tests for the offline city gazetteer"""
+import json
+
+import pytest
+
+from gazetteer import Gazetteer, UnknownPlace, build, default_gazetteer, tokenize
+
+
+def _city(geonameid, name, population, alternates=()):
+    return {"geonameid": geonameid, "name": name, "countrycode": "XX", "population": population,
+            "latitude": 1.0, "longitude": 2.0, "alternatenames": list(alternates)}
+
+
+@pytest.fixture
+def small(tmp_path):
+    """Gazetteer built from a handful of cities through the real file format"""
+    source = tmp_path / "cities.json"
+    source.write_text(json.dumps({str(c["geonameid"]): c for c in [
+        _city(1, "New York City", 8_000_000, ["New York", "NYC", "Big Apple"]),
+        _city(2, "York", 200_000),
+        _city(3, "Nice", 340_000),
+        _city(4, "Sāo Tomé", 150_000),
+        _city(5, "Tiny Town", 500),
+        _city(6, "Newark", 280_000, ["York", "EWR"]),
+    ]}))
+    path = tmp_path / "cities.tsv.gz"
+    assert build(str(source), str(path)) == 5
+    return Gazetteer.load(str(path))
+
+
+class TestGazetteer:
+    """Test name matching and local rejection"""
+
+    def test_tokenize_folds_case_accents_and_punctuation(self):
+        """Test that typed and canonical spellings produce the same tokens"""
+        assert tokenize("Sāo Tomé!") == tokenize("sao tome") == ["sao", "tome"]
+
+    def test_longest_name_wins(self, small):
+        """Test that 'new york' is not read as 'york'"""
+        assert small.locate("weather in new york please").name == "New York City"
+        assert small.locate("weather in york").name == "York"
+
+    def test_official_names_beat_alternates(self, small):
+        """Test that an alternate name cannot shadow another city's official one"""
+        assert small.lookup("york").geonameid == 2
+        assert small.lookup("big apple").geonameid == 1
+        assert small.lookup("ewr") is None  # airport-style codes are dropped
+        assert small.lookup("nyc").geonameid == 1  # unless listed in ALIASES
+        assert small.lookup("tiny town") is None  # below the population cut
+
+    def test_everyday_words_need_a_preposition(self, small):
+        """Test that 'nice weather' is not a place but 'in nice' is"""
+        assert small.locate("is the weather nice today") is None
+        assert small.locate("weather in nice").name == "Nice"
+
+    def test_unknown_places(self, small):
+        """Test what comes back when no known name is found"""
+        assert small.locate("weather in atlantis") == UnknownPlace("Atlantis")
+        assert isinstance(small.locate("weather in lost city of z"), UnknownPlace)
+        assert small.locate("forecast for tomorrow") is None
+        assert small.locate("what's the weather like") is None
+
+    def test_small_towns_need_a_preposition(self, tmp_path):
+        """Test that a small town named like a word is not matched on its own"""
+        source = tmp_path / "cities.json"
+        source.write_text(json.dumps({"1": _city(1, "Time", 20_000)}))
+        build(str(source), str(tmp_path / "cities.tsv.gz"))
+        gazetteer = Gazetteer.load(str(tmp_path / "cities.tsv.gz"))
+        assert gazetteer.locate("what time is it in london") == UnknownPlace("London")
+        assert gazetteer.locate("weather in time").name == "Time"
+
+    def test_countries_regions_and_ranking(self, tmp_path):
+        """Test that countries and US states are indexed but do not shadow cities"""
+        files = {
+            "cities": {"1": _city(1, "Washington", 700_000), "2": _city(2, "Virginia", 20_000)},
+            "countries": {"3": {"geonameid": 3, "name": "Japan", "iso": "JP", "population": 126_000_000}},
+            "regions": {str(i): {"geonameid": i, "name": name, "code": name[:2].upper()}
+                        for i, name in [(4, "Washington"), (5, "Virginia"), (6, "Hawaii")]},
+        }
+        for name, data in files.items():
+            (tmp_path / f"{name}.json").write_text(json.dumps(data))
+        path = str(tmp_path / "cities.tsv.gz")
+        assert build(str(tmp_path / "cities.json"), path, countries=str(tmp_path / "countries.json"),
+                     regions=str(tmp_path / "regions.json")) == 6
+        gazetteer = Gazetteer.load(path)
+        assert gazetteer.lookup("japan").kind == "country"
+        assert gazetteer.lookup("hawaii").kind == "region"
+        assert gazetteer.lookup("washington").geonameid == 1  # the big city beats the state
+        assert gazetteer.lookup("virginia").geonameid == 5  # the state beats the small town
+        assert gazetteer.locate("is it sunny in japan").latitude is None
+
+    def test_bundled_data(self):
+        """Test that the shipped gazetteer loads and knows towns, countries and aliases"""
+        gazetteer = default_gazetteer()
+        assert len(gazetteer) > 30000
+        assert gazetteer.lookup("tokyo").country == "JP"
+        assert gazetteer.locate("weather in mexico city").name == "Mexico City"
+        assert gazetteer.lookup("juneau").population >= 15_000
+        assert gazetteer.lookup("japan").kind == "country"
+        assert gazetteer.lookup("hawaii").kind == "region"
+        assert gazetteer.lookup("nyc").name == "New York City"
+        assert gazetteer.lookup("new york").name == "New York City"
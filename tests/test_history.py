@@ -0,0 +1,165 @@
+"""Tests for the weather observation history and the trend intent"""
+import asyncio
+import sys
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from async_agent import AsyncSimpleAIAgent
+from history import DAY, OBSERVATION_BYTES, WeatherHistory
+from quota import QuotaManager
+
+NOW = 1_700_000_000.0
+
+
+def _filled(hours=48, city="chicago"):
+    """History with an hourly observation over hours, temps rising 0.5° per hour"""
+    history = WeatherHistory(capacity=64)
+    times = NOW - 3600 * np.arange(hours)[::-1]
+    history.extend(city, times, 10 + 0.5 * np.arange(hours), np.full(hours, 70.0), np.full(hours, 800))
+    return history
+
+
+class TestWeatherHistory:
+    """Test ring buffers and vectorized queries"""
+
+    def test_ring_keeps_the_newest_observations(self):
+        """Test that old observations are overwritten past capacity"""
+        history = WeatherHistory(capacity=4)
+        for n in range(6):
+            history.record("oslo", NOW + n, float(n), humidity=50, condition=800)
+        data = history.observations("oslo")
+        assert list(data["time"]) == [NOW + n for n in (2, 3, 4, 5)]
+        assert list(data["temp"]) == [2, 3, 4, 5]
+        assert list(data["condition"]) == [800] * 4
+        assert history.latest("oslo") == (NOW + 5, 5.0)
+
+    def test_memory_is_bounded_per_city(self):
+        """Test that the buffers grow with cities, not observations"""
+        history = WeatherHistory(capacity=100, initial_cities=1)
+        for city in range(10):
+            for n in range(300):
+                history.record(city, NOW + n, 20.0)
+        assert len(history) == 10
+        assert history.nbytes <= 16 * 100 * OBSERVATION_BYTES + 16 * 8
+
+    def test_max_cities(self):
+        """Test that cities past the limit are refused"""
+        history = WeatherHistory(max_cities=1)
+        assert history.record("a", NOW, 1.0)
+        assert not history.record("b", NOW, 1.0)
+        assert "b" not in history and history.latest("b") is None
+
+    def test_stats_over_window(self):
+        """Test min/max/mean/delta over the last day only"""
+        stats = _filled().stats("chicago", since=NOW - DAY)
+        assert stats["count"] == 25
+        assert stats["min"] == 21.5 and stats["max"] == 33.5
+        assert stats["mean"] == pytest.approx(27.5)
+        assert stats["delta"] == pytest.approx(12.0)
+        assert _filled().stats("nowhere") is None
+
+    def test_at_finds_nearest_within_tolerance(self):
+        """Test the observation closest to a moment"""
+        history = _filled()
+        assert history.at("chicago", NOW - DAY + 600) == 21.5
+        assert history.at("chicago", NOW + 7 * 3600, tolerance=3600) is None
+
+    def test_moving_average_matches_naive(self):
+        """Test the cumulative-sum moving average against a direct mean"""
+        history = _filled(hours=30)
+        times, averages = history.moving_average("chicago", window=3 * 3600)
+        data = history.observations("chicago")
+        for t, average in zip(times, averages):
+            inside = data["temp"][(data["time"] > t - 3 * 3600) & (data["time"] <= t)]
+            assert average == pytest.approx(inside.mean())
+
+    def test_stats_all_cities(self):
+        """Test the all-city query, including a city with nothing in the window"""
+        history = _filled()
+        history.record("old", NOW - 10 * DAY, 5.0)
+        summary = history.stats_all(since=NOW - DAY)
+        assert summary["cities"] == ["chicago", "old"]
+        assert list(summary["count"]) == [25, 0]
+        assert summary["max"][0] == 33.5 and np.isnan(summary["mean"][1])
+
+
+WEATHER = {"dt": NOW, "main": {"temp": 15.0, "humidity": 60},
+           "weather": [{"id": 500, "description": "light rain"}]}
+
+
+@pytest.fixture
+def agent(offline_agent, response):
+    agent = offline_agent()
+    agent.transport.get.return_value = response(200, WEATHER)
+    return agent
+
+
+class TestTrendIntent:
+    """Test trend questions end to end"""
+
+    def test_intent_and_location(self, agent):
+        """Test that comparisons route to trend, ahead of weather"""
+        assert agent.process_input("Is it warmer than yesterday in Chicago?") == ("trend", "Chicago")
+        assert agent.process_input("was the weather colder yesterday in Oslo") == ("trend", "Oslo")
+
+    def test_news_with_comparison_words_stays_news(self, agent):
+        """Test that "colder"/"hotter"/"cooler" in a news prompt do not fetch the weather"""
+        for prompt in ("news about a colder winter", "news about hotter summers", "latest news about cooler gadgets"):
+            assert agent.process_input(prompt)[0] == "news"
+            agent.respond(prompt)
+        urls = [call.args[0] for call in agent.transport.get.call_args_list]
+        assert len(urls) == 3 and all("newsapi.org" in url for url in urls)
+
+    def test_fetches_record_observations(self, agent):
+        """Test that weather lookups feed the history"""
+        agent.get_weather("Chicago")
+        observations = agent.history.observations("chicago")
+        assert list(observations["temp"]) == [15.0]
+        assert list(observations["humidity"]) == [60.0]
+        assert list(observations["condition"]) == [500]
+
+    def test_compares_with_yesterday(self, agent):
+        """Test the answer when an observation from a day ago exists"""
+        agent.history.record("chicago", NOW - DAY + 1200, 11.8)
+        answer = agent.respond("is it warmer than yesterday in Chicago")
+        assert answer == "Chicago is 3.2°C warmer than yesterday: 15.0°C now, 11.8°C this time yesterday"
+        assert agent.metrics.snapshot()["outcomes"]["trend"] == {"success": 1}
+
+    def test_partial_history(self, agent):
+        """Test the answers while less than a day has been observed"""
+        assert agent.get_trend("Chicago") == "I don't have earlier weather for Chicago yet; it's 15.0°C now"
+        agent.history.record("chicago", NOW - 6 * 3600, 9.0)
+        assert agent.get_trend("Chicago") == ("I don't have yesterday's weather for Chicago yet. Over the "
+                                              "last 6h it ranged 9.0-15.0°C (mean 12.0°C); it's 15.0°C now")
+
+    def test_errors(self, agent, response):
+        """Test failed lookups"""
+        agent.transport.get.return_value = response(500, {"message": "boom"})
+        assert "Sorry, I couldn't get weather data" in agent.get_trend("Chicago")
+        assert agent.metrics.snapshot()["outcomes"]["trend"] == {"upstream_error": 1}
+
+    def test_without_numpy(self, agent, monkeypatch):
+        """Test that a missing NumPy turns trends off but every weather lookup works"""
+        monkeypatch.setitem(sys.modules, "history", None)  # makes the import fail
+        assert agent.get_weather("Chicago") == "Weather in Chicago: 15.0°C, light rain"
+        assert agent.history is None
+        agent.weather_cache.clear()
+        assert agent.get_weather("Chicago") == "Weather in Chicago: 15.0°C, light rain"
+        assert agent.get_trend("Chicago") == ("Weather in Chicago: 15.0°C, light rain\n"
+                                              "(Comparing with yesterday needs NumPy, which is not installed)")
+        assert agent.metrics.snapshot()["outcomes"]["weather"] == {"success": 3}
+
+    def test_async_agent(self, response):
+        """Test that the asyncio agent awaits the weather lookup behind a trend"""
+        async def run():
+            transport = AsyncMock()
+            transport.get.return_value = response(200, WEATHER)
+            async with AsyncSimpleAIAgent(async_transport=transport, verbose=False,
+                                          quota=QuotaManager(limits={})) as agent:
+                agent.history.record("chicago", NOW - DAY, 15.2)
+                return await agent.respond_async("is it colder than yesterday in Chicago")
+
+        assert asyncio.run(run()) == ("Chicago is about as warm as yesterday: "
+                                      "15.0°C now, 15.2°C this time yesterday")
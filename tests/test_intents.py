@@ -0,0 +1,147 @@
+"""Unit tests for the precompiled intent matcher"""
+import random
+import re
+
+import pytest
+
+from intents import DEFAULT_INTENTS, DEFAULT_QUALIFIERS, IntentMatcher
+from main import SimpleAIAgent
+
+
+def _any_chain(text, intents=DEFAULT_INTENTS, qualifiers=DEFAULT_QUALIFIERS):
+    """Reference implementation: the original any() chain, plus qualifiers"""
+    def occurs(word):
+        needed = qualifiers.get(word)
+        return word in text and (needed is None or any(re.search(rf"\b{q}\b", text) for q in needed))
+
+    for name, words in intents:
+        if any(occurs(word) for word in words):
+            return name
+    return None
+
+
+class TestIntentMatcher:
+    """Test single-pass matching against the any() chain"""
+
+    def test_matches_reference_on_random_prompts(self):
+        """Test identical results on prompts built from keyword fragments"""
+        random.seed(1234)
+        pieces = [w for _, words in DEFAULT_INTENTS for w in words]
+        pieces += ["k", "s", "st", "in", "paris", " ", "?", "lo", "ti", "ca", "he", "you do", "rain", "ukraine"]
+        matcher = IntentMatcher()
+        for _ in range(5000):
+            text = "".join(random.choice(pieces) for _ in range(random.randint(0, 6)))
+            assert matcher.match(text) == _any_chain(text), text
+
+    def test_substring_quirks_are_kept(self):
+        """Test that keywords still match inside other words"""
+        matcher = IntentMatcher()
+        assert matcher.match("i know") == "time"
+        assert matcher.match("this one") == "greeting"
+        assert matcher.match("co-op") == "math"
+
+    def test_overlapping_keywords(self):
+        """Test a keyword starting inside another keyword"""
+        matcher = IntentMatcher()
+        # "latest" starts inside "calculate"; news outranks math
+        assert matcher.match("calculatest") == "news"
+
+    def test_priority_order(self):
+        """Test that the first intent in priority order wins"""
+        matcher = IntentMatcher()
+        assert matcher.match("hello, what's the latest weather") == "weather"
+        assert matcher.match("hi, what time is it") == "time"
+
+    def test_qualified_keywords(self):
+        """Test that 'yesterday' only means a trend question next to a weather word"""
+        matcher = IntentMatcher()
+        assert matcher.match("headlines from yesterday") == "news"
+        assert matcher.match("what was the weather yesterday") == "trend"
+        assert matcher.match("was it cold yesterday") == "trend"
+        assert matcher.match("news about ukraine yesterday") == "news"  # whole words only
+        assert IntentMatcher(qualifiers={}).match("headlines from yesterday") == "trend"
+
+    @pytest.mark.parametrize("prompt, intent", [
+        ("news about a colder winter", "news"),
+        ("news about hotter summers", "news"),
+        ("latest news about cooler gadgets", "news"),
+        ("headlines on warmer oceans", "news"),
+        ("is it warmer than yesterday in chicago", "trend"),
+        ("is it colder today", "trend"),
+        ("will the weather get hotter", "trend"),
+    ])
+    def test_comparison_words_need_a_qualifier(self, prompt, intent):
+        """Test that 'warmer' and friends only mean a trend next to a weather or comparison word"""
+        assert IntentMatcher().match(prompt) == intent
+
+    def test_qualified_prefix_falls_back(self):
+        """Test that an unqualified prefix keyword still counts when the longer one does not"""
+        matcher = IntentMatcher((("a", ("latest news",)), ("b", ("latest",))), {"latest news": ("today",)})
+        assert matcher.match("latest news") == "b"
+        assert matcher.match("latest news today") == "a"
+
+    def test_no_keywords(self):
+        """Test that prompts without keywords match nothing"""
+        assert IntentMatcher().match("random gibberish xyz") is None
+        assert IntentMatcher().match("") is None
+
+
+class TestRegistration:
+    """Test plugging in intents and keywords"""
+
+    def test_new_intent_goes_last(self):
+        """Test that a new intent ranks below the built-ins"""
+        matcher = IntentMatcher()
+        matcher.register("joke", ["joke", "funny"])
+        assert matcher.match("tell me a joke") == "joke"
+        assert matcher.match("hello, tell me a joke") == "greeting"
+        assert matcher.names()[-1] == "joke"
+
+    def test_before_sets_priority(self):
+        """Test that before= ranks a new intent above an existing one"""
+        matcher = IntentMatcher()
+        matcher.register("trend", ["warmer"], before="weather")
+        assert matcher.match("is the weather warmer") == "trend"
+
+    def test_prefix_keywords_of_other_intents(self):
+        """Test a keyword that is a prefix of a higher-ranked keyword"""
+        matcher = IntentMatcher()
+        matcher.register("alert", ["hel"], before="weather")
+        assert matcher.match("hello") == "alert"
+
+    def test_extend_existing_intent(self):
+        """Test adding keywords to an existing intent keeps its rank"""
+        matcher = IntentMatcher()
+        matcher.register("weather", ["rain"])
+        assert matcher.match("will it rain now") == "weather"
+        assert matcher.names() == [name for name, _ in DEFAULT_INTENTS]
+
+    def test_matchers_are_independent(self):
+        """Test that registering on one matcher leaves others untouched"""
+        first, second = IntentMatcher(), IntentMatcher()
+        first.register("joke", ["joke"])
+        assert first.match("joke") == "joke"
+        assert second.match("joke") is None
+
+
+class TestAgentIntentPlugins:
+    """Test register_intent on the agent"""
+
+    def test_registered_intent_is_dispatched(self):
+        """Test that a plugged-in intent reaches its handler"""
+        agent = SimpleAIAgent()
+        agent.register_intent(
+            "joke", ["joke"],
+            handler=lambda data: f"Joke about {data}",
+            extract=lambda text: text.split()[-1],
+        )
+
+        intent, data = agent.process_input("Tell me a joke about cats")
+        assert (intent, data) == ("joke", "cats")
+        assert agent.execute_action(intent, data) == "Joke about cats"
+
+    def test_intent_without_extractor_gets_none(self):
+        """Test that data defaults to None"""
+        agent = SimpleAIAgent()
+        agent.register_intent("joke", ["joke"], handler=lambda data: "ha")
+        assert agent.process_input("joke please") == ("joke", None)
@@ -0,0 +1,63 @@
+"""Tests for the pluggable JSON decoder"""
+import json
+import random
+
+import pytest
+
+from jsonbackend import BACKENDS, NEWS, WEATHER, WEATHER_GROUP, DecodeError, Decoder, select
+from stub_server import news_payload, weather_payload
+
+# Bodies every backend must decode to the same values
+ODD_BODIES = [
+    b'{"main": {"temp": NaN}, "weather": []}',
+    b'{"main": {"temp": 123456789012345678901234567890}}',
+    '{"message": "grüß dich"}'.encode("utf-16"),
+    b'{"main": null, "weather": "sunny", "message": 7}',
+    b'{"main": {"temp": 1}, "main": {"temp": 2}}',
+    b'[1, 2.5, "x"]',
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    return request.param
+
+
+class TestDecoder:
+    """Test that every installed backend behaves like the stdlib"""
+
+    def test_selects_only_schema_fields(self, backend):
+        """Test that fields the agent does not read are dropped"""
+        payload = weather_payload("Paris", random.Random(1))
+        data = Decoder(WEATHER, backend).decode(json.dumps(payload).encode())
+        assert data == {"main": {"temp": payload["main"]["temp"], "humidity": payload["main"]["humidity"]},
+                        "weather": [{"id": 800, "description": payload["weather"][0]["description"]}]}
+
+    def test_news_and_group(self, backend):
+        """Test list schemas on NewsAPI and group answers"""
+        news = Decoder(NEWS, backend).decode(json.dumps(news_payload("rust", 3, 50)).encode())
+        assert news == {"articles": [{"title": f"Rust story {n}"} for n in (1, 2, 3)]}
+        group = {"cnt": 1, "list": [dict(weather_payload("Oslo", random.Random(1)), id=3143244)]}
+        data = Decoder(WEATHER_GROUP, backend).decode(json.dumps(group).encode())
+        assert data == select(group, WEATHER_GROUP)
+        assert data["list"][0]["id"] == 3143244
+
+    @pytest.mark.parametrize("body", ODD_BODIES)
+    def test_same_values_as_stdlib(self, backend, body):
+        """Test NaN, huge integers, UTF-16, mismatched shapes and duplicate keys"""
+        # Compared as JSON text, since NaN != NaN
+        selected = Decoder(WEATHER, backend).decode(body)
+        assert json.dumps(selected) == json.dumps(select(json.loads(body), WEATHER))
+        assert json.dumps(Decoder(backend=backend).decode(body)) == json.dumps(json.loads(body))
+
+    @pytest.mark.parametrize("body", [b"", b"{", b"not json", b"\xff\xfe\x00"])
+    def test_invalid_json(self, backend, body):
+        """Test one error type and message whatever the backend"""
+        with pytest.raises(DecodeError, match="^upstream sent invalid JSON$"):
+            Decoder(NEWS, backend).decode(body)
+
+    def test_unknown_backend(self):
+        """Test that naming a missing backend fails at construction"""
+        with pytest.raises(ValueError, match="not installed"):
+            Decoder(backend="simdjson")
+        assert BACKENDS[-1] == "json"
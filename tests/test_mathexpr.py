@@ -0,0 +1,74 @@
+"""Unit tests for the bounded arithmetic evaluator"""
+import time
+
+import pytest
+
+from mathexpr import MathError, MathEvaluator, MathLimitError, parse, tokenize
+
+
+@pytest.fixture
+def evaluator():
+    return MathEvaluator()
+
+
+class TestParsing:
+    """Test tokenizing and precedence"""
+
+    def test_tokens(self):
+        """Test numbers and two-character operators"""
+        assert tokenize(" 2**.5 // 3.") == [
+            ("num", 2), ("op", "**"), ("num", 0.5), ("op", "//"), ("num", 3.0)]
+
+    @pytest.mark.parametrize("text", [
+        "5 + 3", "20 / 4", "7 // 2", "-7 // 2", "-2 ** 2", "2 ** -1", "2 ** 3 ** 2",
+        "--5", "5 -- 3", "2*-3", "10 - 4 - 3", "(5 + 3) * 2", ".5 + 5.", "00",
+        "12345678901234567890 * 98765432109876543210",
+    ])
+    def test_matches_python(self, evaluator, text):
+        """Test that results and their types agree with Python's eval"""
+        result = evaluator.evaluate(text)
+        expected = eval(text)
+        assert result == expected and type(result) is type(expected)
+
+    @pytest.mark.parametrize("text", ["", "1 +", "()", "1 2", "(1", "1)", "05", "1 % 2"])
+    def test_malformed(self, evaluator, text):
+        """Test that what Python would reject is rejected"""
+        with pytest.raises(MathError):
+            evaluator.evaluate(text)
+
+    def test_parses_are_cached(self):
+        """Test that a repeated expression reuses its tree"""
+        assert parse("1 + 2 * 3") is parse("1 + 2 * 3")
+
+
+class TestLimits:
+    """Test that expensive expressions are refused up front"""
+
+    @pytest.mark.parametrize("text", ["9**9**9**9", "2 ** 100000", "10 ** 400", "2.0 ** 5000"])
+    def test_large_powers(self, evaluator, text):
+        """Test that oversized powers fail fast"""
+        start = time.perf_counter()
+        with pytest.raises(MathLimitError):
+            evaluator.evaluate(text)
+        assert time.perf_counter() - start < 0.1
+
+    def test_magnitude_of_products(self):
+        """Test that repeated multiplication cannot grow past the limit"""
+        evaluator = MathEvaluator(max_magnitude=10 ** 6)
+        assert evaluator.evaluate("1000 * 1000") == 10 ** 6
+        with pytest.raises(MathLimitError):
+            evaluator.evaluate("1000 * 1000 * 10")
+
+    def test_length_and_depth(self):
+        """Test the expression length and nesting limits"""
+        evaluator = MathEvaluator(max_length=20, max_depth=3)
+        assert evaluator.evaluate("((1))") == 1
+        with pytest.raises(MathLimitError):
+            evaluator.evaluate("1 + " * 10 + "1")
+        with pytest.raises(MathLimitError):
+            evaluator.evaluate("((((1))))")
+
+    def test_complex_results_are_refused(self, evaluator):
+        """Test that fractional powers of negatives do not leak complex numbers"""
+        with pytest.raises(MathError):
+            evaluator.evaluate("(-8) ** (1/3)")
@@ -0,0 +1,94 @@
+"""Unit tests for stage timings and outcome counters"""
+from unittest.mock import Mock, patch
+
+import pytest
+
+from main import SimpleAIAgent
+from metrics import _NULL_TIMER, EXCEPTION, INVALID, SUCCESS, UPSTREAM_ERROR, Metrics
+
+
+class TestMetrics:
+    """Test histograms, counters and export"""
+
+    def test_timer_fills_cumulative_buckets(self, clock):
+        """Test that durations land in the right buckets"""
+        clock.step = 0.05
+        metrics = Metrics(buckets=(0.01, 0.1), clock=clock)
+        with metrics.timer("upstream"):
+            pass
+        metrics.observe("upstream", 0.005)
+        stage = metrics.snapshot()["stages"]["upstream"]
+        assert stage["count"] == 2
+        assert stage["sum"] == pytest.approx(0.055)
+        assert stage["buckets"] == {0.01: 1, 0.1: 2, float("inf"): 2}
+
+    def test_prometheus_text(self):
+        """Test the exposition format"""
+        metrics = Metrics(buckets=(0.1,))
+        metrics.observe("intent", 0.01)
+        metrics.count("weather", SUCCESS)
+        text = metrics.prometheus()
+        assert "# TYPE agent_stage_seconds histogram" in text
+        assert 'agent_stage_seconds_bucket{stage="intent",le="0.1"} 1' in text
+        assert 'agent_stage_seconds_bucket{stage="intent",le="+Inf"} 1' in text
+        assert 'agent_stage_seconds_count{stage="intent"} 1' in text
+        assert 'agent_requests_total{intent="weather",outcome="success"} 1' in text
+
+    def test_disabled_records_nothing(self):
+        """Test that a disabled instance hands out the shared no-op timer"""
+        metrics = Metrics(enabled=False)
+        assert metrics.timer("intent") is _NULL_TIMER
+        metrics.observe("intent", 1.0)
+        metrics.count("weather", SUCCESS)
+        assert metrics.snapshot() == {"stages": {}, "outcomes": {}}
+
+
+class TestAgentMetrics:
+    """Test the instrumented pipeline"""
+
+    @patch('requests.Session.get')
+    def test_outcomes_by_intent(self, mock_get, response, weather_response):
+        """Test success, upstream error and invalid input counts"""
+        mock_get.side_effect = [
+            weather_response(20.5, "sunny"),
+            response(404, {'message': 'city not found'}),
+            response(404, {'message': 'city not found'}),
+        ]
+        agent = SimpleAIAgent(verbose=False)
+        agent.respond("weather in Paris")
+        agent.respond("weather in Oslo")
+        agent.respond("weather in Atlantis")
+        agent.respond("calculate 2 + 2")
+        agent.respond("2 + 2")
+        agent.respond("what time is it")
+        agent.respond("tell me a joke")
+
+        snapshot = agent.metrics.snapshot()
+        assert snapshot["outcomes"] == {
+            "weather": {SUCCESS: 1, UPSTREAM_ERROR: 2},
+            "math": {INVALID: 1, SUCCESS: 1},
+            "time": {SUCCESS: 1},
+            "unknown": {INVALID: 1},
+        }
+        stages = snapshot["stages"]
+        assert stages["intent"]["count"] == 7
+        assert stages["execute"]["count"] == 7
+        assert stages["upstream"]["count"] == stages["decode"]["count"] == 3
+        assert stages["math"]["count"] == 2
+
+    @patch('requests.Session.get')
+    def test_exceptions_are_counted(self, mock_get):
+        """Test that a failing fetch and a failing plugin count as exceptions"""
+        mock_get.side_effect = Exception("Network error")
+        agent = SimpleAIAgent(verbose=False)
+        agent.get_news("python")
+        agent.register_intent("joke", ["joke"], handler=Mock(side_effect=RuntimeError()))
+        with pytest.raises(RuntimeError):
+            agent.respond("tell me a joke")
+        assert agent.metrics.snapshot()["outcomes"] == {"joke": {EXCEPTION: 1}, "news": {EXCEPTION: 1}}
+
+    def test_disabled_agent_still_answers(self):
+        """Test that turning metrics off changes nothing but the numbers"""
+        agent = SimpleAIAgent(verbose=False, metrics=Metrics(enabled=False))
+        assert agent.respond("5 + 3") == "Result: 8"
+        assert agent.metrics.snapshot() == {"stages": {}, "outcomes": {}}
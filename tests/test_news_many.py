@@ -0,0 +1,156 @@
+"""Tests for multi-topic news parsing and the concurrent fan-out"""
+import asyncio
+import threading
+from unittest.mock import AsyncMock
+
+import pytest
+
+from async_agent import AsyncSimpleAIAgent
+from main import SimpleAIAgent
+from quota import QuotaManager
+from stub_server import StubUpstream
+
+
+class _Upstream:
+    """Transport double answering per topic: slow topics block, broken ones raise"""
+
+    def __init__(self, news_response, slow=(), broken=(), counts=None):
+        self.news_response = news_response
+        self.slow, self.broken, self.counts = set(slow), set(broken), counts or {}
+        self.release = threading.Event()
+        self.calls = []
+
+    def topic(self, url):
+        return url.split("q=")[1].split("&")[0]
+
+    def answer(self, topic):
+        return self.news_response([f"{topic} story {n}" for n in range(1, self.counts.get(topic, 5) + 1)])
+
+    def get(self, url, **kwargs):
+        topic = self.topic(url)
+        self.calls.append(topic)
+        if topic in self.slow:
+            self.release.wait(5)
+        if topic in self.broken:
+            raise ConnectionError("connection reset")
+        return self.answer(topic)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def agent(offline_agent):
+    return offline_agent()
+
+
+class TestExtractTopics:
+    """Test multi-topic parsing"""
+
+    @pytest.mark.parametrize("text, topics", [
+        ("news about rust and python and ai", ["rust", "python", "ai"]),
+        ("headlines on rust, python, and ai?", ["rust", "python", "ai"]),
+        ("news about rust & python or go", ["rust", "python", "go"]),
+        ("news about Rust and rust", ["Rust"]),
+        ("news about technology", ["technology"]),
+        ("get me the news", ["general"]),
+        ("news about a, b, c, d, e, f, g", ["a", "b", "c", "d", "e"]),
+    ])
+    def test_topics(self, agent, text, topics):
+        """Test separators, dedup, the default and the topic cap"""
+        assert agent.extract_topics(text) == topics
+
+    def test_intent_data(self, agent):
+        """Test that one topic stays a string and several become a tuple"""
+        assert agent.process_input("news about rust and python") == ("news", ("rust", "python"))
+        assert agent.process_input("news about python") == ("news", "python")
+
+    def test_single_and_multiple_topics_strip_punctuation_alike(self, agent):
+        """Test that "news about ai." asks upstream for "ai", as the multi-topic path does"""
+        assert agent.process_input("news about ai.") == ("news", "ai")
+        assert agent.process_input("news about rust and ai.") == ("news", ("rust", "ai"))
+        assert agent.extract_topic("headlines on sports?") == "sports"
+        assert agent.extract_topics("news about ?") == ["general"]
+
+
+class TestGetNewsMany:
+    """Test the fan-out, merge and partial answers"""
+
+    def test_round_robin_merge_with_per_topic_quota(self, agent, news_response):
+        """Test that headlines interleave by rank, at most per_topic each"""
+        agent.transport = _Upstream(news_response, counts={"ai": 1})
+        answer = agent.get_news_many(("rust", "python", "ai"), per_topic=2)
+        assert answer == ("Latest news about rust, python and ai:\n"
+                          "• [rust] rust story 1\n• [python] python story 1\n• [ai] ai story 1\n"
+                          "• [rust] rust story 2\n• [python] python story 2")
+        assert sorted(agent.transport.calls) == ["ai", "python", "rust"]
+        assert agent.metrics.snapshot()["outcomes"]["news"] == {"success": 1}
+
+    def test_duplicate_headlines_are_kept_once(self, agent):
+        """Test that a story found under two topics appears once"""
+        reports = {"rust": {"titles": ["Shared", "Rust only"]}, "go": {"titles": ["Shared", "Go only"]}}
+        assert agent._merge_news(["rust", "go"], reports, 3) == [
+            ("rust", "Shared"), ("rust", "Rust only"), ("go", "Go only")]
+
+    def test_slow_topic_misses_the_deadline(self, agent, news_response):
+        """Test that a slow topic is left out and fills the cache once it lands"""
+        agent.transport = _Upstream(news_response, slow={"ai"})
+        try:
+            answer = agent.get_news_many(("rust", "ai"), deadline=0.2)
+            assert answer.splitlines()[-1] == "(no headlines about ai right now)"
+            assert "[rust] rust story 1" in answer and "[ai]" not in answer
+        finally:
+            agent.transport.release.set()
+        agent.singleflight.do(("news", "ai"), lambda: None)  # joins the late fetch until it lands
+        assert "[ai] ai story 1" in agent.get_news_many(("rust", "ai"), deadline=0.2)
+
+    def test_partial_answers_are_not_memoized(self, agent, news_response):
+        """Test that respond() asks again after a partial answer, so late topics show up"""
+        agent.transport = _Upstream(news_response, slow={"ai"})
+        try:
+            assert agent.respond("news about rust and ai").endswith("(no headlines about ai right now)")
+        finally:
+            agent.transport.release.set()
+        agent.singleflight.do(("news", "ai"), lambda: None)
+        assert len(agent.response_cache) == 0
+        assert "[ai] ai story 1" in agent.respond("news about rust and ai")
+        assert len(agent.response_cache) == 1
+        assert agent.metrics.snapshot()["outcomes"]["news"] == {"partial": 1, "success": 1}
+
+    def test_failures_give_partial_or_no_results(self, agent, news_response):
+        """Test that a failing topic is skipped and all failing is an error"""
+        agent.transport = _Upstream(news_response, broken={"ai"})
+        assert agent.get_news_many(("rust", "ai")).endswith("(no headlines about ai right now)")
+        agent.transport = _Upstream(news_response, broken={"go", "ai"})
+        assert agent.get_news_many(("go", "ai")) == "Sorry, I couldn't get news about go and ai right now"
+        assert agent.metrics.snapshot()["outcomes"]["news"] == {"partial": 1, "upstream_error": 1}
+
+    def test_respond_against_stub(self):
+        """Test a multi-topic prompt end to end against the stub upstream"""
+        with StubUpstream(seed=2) as upstream, SimpleAIAgent(
+                verbose=False, quota=QuotaManager(limits={}),
+                news_base_url=upstream.base_url) as agent:
+            answer = agent.respond("news about rust and python")
+            assert answer.startswith("Latest news about rust and python:\n• [rust] ")
+            assert len(answer.splitlines()) == 7
+            assert agent.respond("news about python and rust").count("•") == 6
+            assert upstream.stats()["news"] == {200: 2}
+
+    def test_async_agent(self, news_response):
+        """Test that the asyncio fan-out answers like the threaded one and honours the deadline"""
+        upstream = _Upstream(news_response)
+
+        async def get(url, **kwargs):
+            topic = upstream.topic(url)
+            if topic == "ai":
+                await asyncio.sleep(5)
+            return upstream.answer(topic)
+
+        async def run():
+            async with AsyncSimpleAIAgent(async_transport=AsyncMock(get=get), verbose=False,
+                                          quota=QuotaManager(limits={})) as agent:
+                return await agent.get_news_many_async(("rust", "python", "ai"), deadline=0.2)
+
+        answer = asyncio.run(run())
+        assert answer.startswith("Latest news about rust, python and ai:\n• [rust] rust story 1\n")
+        assert answer.endswith("(no headlines about ai right now)")
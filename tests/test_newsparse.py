@@ -0,0 +1,51 @@
+"""Tests for the lean NewsAPI decoder"""
+import json
+
+import pytest
+
+from newsparse import first_titles
+from stub_server import news_payload
+
+
+def _body(count, **extra):
+    payload = news_payload("python", count, padding=10)
+    payload.update(extra)
+    return json.dumps(payload).encode()
+
+
+class TestFirstTitles:
+    """Test first_titles against bodies shaped like NewsAPI's"""
+
+    def test_stops_at_limit(self):
+        """Test that only the first titles come back"""
+        assert first_titles(_body(20), 3) == ["Python story 1", "Python story 2", "Python story 3"]
+
+    def test_fewer_articles_than_limit(self):
+        """Test short and empty article lists"""
+        assert first_titles(_body(2), 5) == ["Python story 1", "Python story 2"]
+        assert first_titles(_body(0), 5) == []
+
+    def test_matches_json_loads(self):
+        """Test agreement with a full decode, whitespace and unicode included"""
+        body = json.dumps({
+            "status": "ok", "totalResults": 2,
+            "articles": [{"title": 'Café "open"'}, {"title": "Zürich"}],
+        }, indent=4, ensure_ascii=False).encode("utf-8")
+        assert first_titles(body, 5) == [a["title"] for a in json.loads(body)["articles"]]
+
+    def test_ignores_what_follows_the_limit(self):
+        """Test that articles past the limit are never decoded"""
+        body = _body(3)[:-40] + b"not json at all"
+        assert first_titles(body, 2) == ["Python story 1", "Python story 2"]
+
+    def test_no_articles(self):
+        """Test error answers without an articles array"""
+        assert first_titles(b'{"status": "error", "message": "bad key"}', 5) is None
+        assert first_titles(b"{}", 5) is None
+
+    def test_malformed(self):
+        """Test that malformed bodies raise ValueError"""
+        with pytest.raises(ValueError):
+            first_titles(b"[1, 2]", 5)
+        with pytest.raises(ValueError):
+            first_titles(b'{"articles" [', 5)
@@ -0,0 +1,127 @@
+"""Unit tests for the client-side quota manager"""
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+
+from cache import TTLCache
+from main import SimpleAIAgent
+from quota import QuotaExceededError, QuotaManager, TokenBucket
+
+
+class TestTokenBucket:
+    """Test refill and reservations"""
+
+    def test_burst_then_refill(self, clock):
+        """Test that the burst is spent and tokens come back over time"""
+        bucket = TokenBucket(capacity=2, refill_per_second=1, clock=clock)
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() is None
+        clock.now += 1
+        assert bucket.remaining() == 1
+
+    def test_reservations_queue_in_order(self, clock):
+        """Test that queued callers get increasing waits"""
+        bucket = TokenBucket(capacity=1, refill_per_second=2, clock=clock)
+        bucket.reserve()
+        assert bucket.reserve(max_wait=5) == 0.5
+        assert bucket.reserve(max_wait=5) == 1.0
+        assert bucket.reserve(max_wait=1.2) is None
+
+    def test_capacity_caps_refill(self, clock):
+        """Test that an idle bucket never exceeds its burst"""
+        bucket = TokenBucket(capacity=3, refill_per_second=10, clock=clock)
+        clock.now += 100
+        assert bucket.remaining() == 3
+
+
+class TestQuotaManager:
+    """Test per-key, per-endpoint budgets"""
+
+    def test_keys_and_endpoints_have_separate_buckets(self, clock):
+        """Test that budgets are tracked per (key, endpoint)"""
+        quota = QuotaManager(limits={"news": (1, 60, 1), "weather": (1, 60, 1)}, clock=clock)
+        quota.acquire("key-a", "news")
+        quota.acquire("key-b", "news")
+        quota.acquire("key-a", "weather")
+        with pytest.raises(QuotaExceededError):
+            quota.acquire("key-a", "news")
+        assert quota.refused == 1
+
+    def test_unlimited_endpoints(self):
+        """Test that endpoints without limits are never throttled"""
+        quota = QuotaManager(limits={})
+        for _ in range(1000):
+            quota.acquire("key", "weather")
+
+    def test_queueing_sleeps_for_the_reservation(self, clock):
+        """Test that callers wait up to max_wait for a token"""
+        quota = QuotaManager(limits={"weather": (60, 60, 1)}, max_wait=2, clock=clock, sleep=clock.sleep)
+        quota.acquire("key", "weather")
+        quota.acquire("key", "weather")
+        assert clock.now == pytest.approx(1001.0)
+
+    def test_async_acquire(self):
+        """Test the asyncio variant"""
+        quota = QuotaManager(limits={"news": (1, 86400, 1)})
+        asyncio.run(quota.acquire_async("key", "news"))
+        with pytest.raises(QuotaExceededError):
+            asyncio.run(quota.acquire_async("key", "news"))
+
+    def test_remaining_masks_keys(self, clock):
+        """Test the budget report"""
+        quota = QuotaManager(limits={"news": (95, 86400, 5)}, clock=clock)
+        quota.acquire("secret-key-1234", "news")
+        report = quota.remaining()
+        assert report["news"]["...1234"]["remaining"] == 4
+        assert "secret-key-1234" not in str(report)
+
+
+class TestAgentQuota:
+    """Test quota enforcement in the agent"""
+
+    @patch('requests.Session.get')
+    def test_exhausted_quota_serves_stale_answer(self, mock_get, clock, weather_response):
+        """Test the degraded answer once the budget is spent"""
+        mock_get.return_value = weather_response()
+        agent = SimpleAIAgent(
+            weather_cache=TTLCache(ttl=60, clock=clock),
+            quota=QuotaManager(limits={"weather": (1, 3600, 1)}, clock=clock),
+        )
+
+        assert agent.get_weather("Oslo") == "Weather in Oslo: 12.0°C, mist"
+        clock.now += 120  # cache entry expired, no tokens yet
+        assert agent.get_weather("Oslo") == "Weather in Oslo: 12.0°C, mist"
+        assert mock_get.call_count == 1
+
+    @patch('requests.Session.get')
+    def test_exhausted_quota_without_cache(self, mock_get, weather_response):
+        """Test the reply when there is nothing cached to fall back on"""
+        mock_get.return_value = weather_response()
+        agent = SimpleAIAgent(quota=QuotaManager(limits={"weather": (1, 3600, 1)}))
+
+        agent.get_weather("Oslo")
+        assert "quota" in agent.get_weather("Bergen")
+        assert mock_get.call_count == 1
+
+    @patch('requests.Session.get')
+    def test_news_quota(self, mock_get, response):
+        """Test that news requests stop at the budget"""
+        mock_get.return_value = response(200, {'articles': [{'title': 'Headline'}]})
+        agent = SimpleAIAgent(quota=QuotaManager(limits={"news": (1, 86400, 2)}))
+
+        agent.get_news("rust")
+        agent.get_news("python")
+        assert "quota" in agent.get_news("go")
+        assert agent.get_news("rust") == "Latest news about rust:\n• Headline"
+        assert mock_get.call_count == 2
+
+    @patch.dict(os.environ, {"OPENWEATHER_API_KEY": "weather-abcd", "NEWS_API_KEY": "news-wxyz"})
+    def test_remaining_quota_reports_both_apis(self):
+        """Test the agent's budget report"""
+        agent = SimpleAIAgent()
+        report = agent.remaining_quota()
+        assert report["weather"]["...abcd"]["remaining"] == 10
+        assert report["news"]["...wxyz"]["remaining"] == 5
@@ -0,0 +1,103 @@
+"""Unit tests for stale-while-revalidate and background refresh"""
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from cache import MISSING, TTLCache
+from main import SimpleAIAgent
+from refresh import BackgroundRefresher
+from singleflight import SingleFlight
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for refresh"
+        time.sleep(0.005)
+
+
+class TestStaleLookup:
+    """Test the grace window in TTLCache.lookup"""
+
+    def test_lookup_flags_stale_entries(self, clock):
+        """Test fresh, stale and expired-past-grace lookups"""
+        cache = TTLCache(ttl=10, grace=5, clock=clock)
+        cache.set("paris", "sunny")
+        assert cache.lookup("paris") == ("sunny", True)
+        clock.now += 12
+        assert cache.lookup("paris") == ("sunny", False)
+        clock.now += 5
+        assert cache.lookup("paris") == (MISSING, False)
+        assert cache.stats()["stale_hits"] == 1
+
+    def test_hot_keys_picks_popular_entries_near_expiry(self, clock):
+        """Test that only the most-read, soon-expiring, positive keys are due"""
+        cache = TTLCache(ttl=100, grace=30, clock=clock)
+        for key in ("paris", "rome", "oslo"):
+            cache.set(key, key)
+        cache.set_negative("atlantis")
+        cache.set("lima", "lima", ttl=1000)
+        for key, reads in (("paris", 5), ("rome", 3), ("oslo", 1), ("atlantis", 9), ("lima", 9)):
+            for _ in range(reads):
+                cache.get(key)
+
+        clock.now += 80
+        assert cache.hot_keys(limit=5, due_within=30) == ["paris", "rome", "oslo"]
+        # Counts were halved, but the top three are still the same keys
+        assert cache.hot_keys(limit=3, due_within=30) == ["paris"]
+
+
+class TestBackgroundRefresher:
+    """Test deduplication and scheduling"""
+
+    def test_duplicate_submissions_are_dropped(self):
+        """Test that a key is refreshed once while a refresh is pending"""
+        release = threading.Event()
+        fetch = Mock(side_effect=lambda: release.wait())
+        refresher = BackgroundRefresher(SingleFlight())
+        assert refresher.submit("paris", fetch)
+        assert not refresher.submit("paris", fetch)
+        release.set()
+        refresher.close()
+        assert fetch.call_count == 1
+        assert refresher.stats() == {"pending": 0, "refreshed": 1, "failed": 0}
+
+    def test_failures_are_counted(self):
+        """Test that a failing refresh is swallowed and counted"""
+        refresher = BackgroundRefresher(SingleFlight())
+        refresher.submit("paris", Mock(side_effect=ConnectionError()))
+        refresher.close()
+        assert refresher.stats()["failed"] == 1
+
+
+class TestAgentRefresh:
+    """Test stale serving and proactive refresh through the agent"""
+
+    @patch('requests.Session.get')
+    def test_stale_report_is_served_then_refreshed(self, mock_get, clock, weather_response):
+        """Test that an expired report is answered instantly and refetched"""
+        mock_get.return_value = weather_response(20.5, "sunny")
+        agent = SimpleAIAgent(weather_cache=TTLCache(ttl=600, grace=300, clock=clock))
+        assert "20.5°C" in agent.get_weather("Paris")
+
+        mock_get.return_value = weather_response(25.0, "sunny")
+        clock.now += 700
+        assert "20.5°C" in agent.get_weather("Paris")
+        _wait_for(lambda: agent.refresher.stats()["refreshed"] == 1)
+        assert "25.0°C" in agent.get_weather("Paris")
+        assert mock_get.call_count == 2
+        agent.close()
+
+    @patch('requests.Session.get')
+    def test_scheduler_refreshes_hot_keys_before_expiry(self, mock_get, clock, weather_response):
+        """Test that popular locations are refetched ahead of their TTL"""
+        mock_get.return_value = weather_response(20.5, "sunny")
+        agent = SimpleAIAgent(weather_cache=TTLCache(ttl=600, grace=300, clock=clock))
+        agent.get_weather("Paris")
+        agent.get_weather("Paris")
+
+        clock.now += 590
+        agent.start_background_refresh(top_k=10, interval=0.01, lead=60)
+        _wait_for(lambda: mock_get.call_count >= 2)
+        agent.close()
+        assert agent.weather_cache.lookup("paris") == ({"temp": 20.5, "description": "sunny"}, True)
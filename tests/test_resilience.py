@@ -0,0 +1,160 @@
+"""Unit tests for timeouts, retries and circuit breaking"""
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from main import SimpleAIAgent
+from resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, Resilience, RetryPolicy,
+)
+from transport import HTTPTransport
+
+
+def _resilience(attempts=3, **breaker_options):
+    return Resilience(
+        retry=RetryPolicy(attempts=attempts, backoff=0.01),
+        breaker_options=breaker_options,
+        sleep=lambda seconds: None,
+    )
+
+
+class TestRetryPolicy:
+    """Test backoff timing"""
+
+    def test_delay_grows_and_is_capped(self):
+        """Test exponential growth up to max_backoff"""
+        policy = RetryPolicy(backoff=0.5, max_backoff=3.0, rng=lambda: 1.0)
+        assert [policy.delay(n) for n in range(4)] == [0.5, 1.0, 2.0, 3.0]
+
+    def test_delay_is_jittered(self):
+        """Test that jitter scales the delay down"""
+        policy = RetryPolicy(backoff=1.0, rng=lambda: 0.25)
+        assert policy.delay(1) == 0.5
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def test_trips_on_error_rate(self):
+        """Test opening once the failure rate crosses the threshold"""
+        breaker = CircuitBreaker(failure_threshold=0.5, min_calls=4)
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.stats()["trips"] == 1
+        assert not breaker.allow()
+
+    def test_half_open_probe_recovers(self, clock):
+        """Test that one successful probe closes the breaker"""
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        clock.now += 10
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()  # only one probe at a time
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_failed_probe_reopens(self, clock):
+        """Test that a failed probe re-opens and counts another trip"""
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now += 10
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.stats() == {"state": OPEN, "trips": 2, "calls": 0, "failures": 0}
+        assert not breaker.allow()
+
+
+class TestResilienceCall:
+    """Test the retrying, breaker-guarded call"""
+
+    def test_retries_connection_errors(self, response):
+        """Test that connection errors are retried until success"""
+        send = Mock(side_effect=[ConnectionError(), ConnectionError(), response(200)])
+        result = _resilience().call("host", send, (ConnectionError,))
+        assert result.status_code == 200
+        assert send.call_count == 3
+
+    def test_retries_server_errors(self, response):
+        """Test that 5xx answers are retried and the last one returned"""
+        send = Mock(return_value=response(503))
+        resilience = _resilience(attempts=2)
+        assert resilience.call("host", send, (ConnectionError,)).status_code == 503
+        assert send.call_count == 2
+        assert resilience.stats()["host"]["failures"] == 1
+
+    def test_client_errors_are_not_retried(self, response):
+        """Test that 4xx answers return immediately"""
+        send = Mock(return_value=response(404))
+        assert _resilience().call("host", send, (ConnectionError,)).status_code == 404
+        assert send.call_count == 1
+
+    def test_other_exceptions_are_not_retried(self):
+        """Test that unexpected exceptions propagate without retry"""
+        send = Mock(side_effect=ValueError("bad url"))
+        with pytest.raises(ValueError):
+            _resilience().call("host", send, (ConnectionError,))
+        assert send.call_count == 1
+
+    def test_timeouts_are_per_host(self, response):
+        """Test that each host gets its configured timeout"""
+        resilience = Resilience(timeouts={"newsapi.org": (1, 2)})
+        send = Mock(return_value=response(200))
+        resilience.call("newsapi.org", send, (ConnectionError,))
+        resilience.call("api.openweathermap.org", send, (ConnectionError,))
+        assert [c.args[0] for c in send.call_args_list] == [(1, 2), (3.05, 10.0)]
+
+    def test_open_breaker_fails_fast(self):
+        """Test that an open breaker raises without calling upstream"""
+        resilience = _resilience(attempts=1, min_calls=2)
+        send = Mock(side_effect=ConnectionError())
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                resilience.call("host", send, (ConnectionError,))
+        with pytest.raises(CircuitOpenError):
+            resilience.call("host", send, (ConnectionError,))
+        assert send.call_count == 2
+
+
+class TestAgentResilience:
+    """Test the resilience layer through the agent"""
+
+    @patch('requests.Session.get')
+    def test_requests_carry_timeouts(self, mock_get, response):
+        """Test that upstream GETs always have a timeout"""
+        mock_get.return_value = response(404, {})
+        SimpleAIAgent().get_weather("Atlantis")
+        assert mock_get.call_args.kwargs["timeout"] == (3.05, 10.0)
+
+    @patch('requests.Session.get')
+    def test_outage_fails_fast_to_unavailable(self, mock_get):
+        """Test that once the breaker trips, calls stop reaching the upstream"""
+        mock_get.side_effect = requests.exceptions.ConnectionError("refused")
+        transport = HTTPTransport(resilience=_resilience(attempts=2, min_calls=2))
+        agent = SimpleAIAgent(transport=transport)
+
+        assert agent.get_weather("Paris") == "Weather service is currently unavailable"
+        assert agent.get_weather("Rome") == "Weather service is currently unavailable"
+        assert mock_get.call_count == 4
+
+        assert agent.get_weather("Oslo") == "Weather service is currently unavailable"
+        assert mock_get.call_count == 4
+        assert transport.resilience.stats()["api.openweathermap.org"]["state"] == OPEN
+
+    @patch('requests.Session.get')
+    def test_news_breaker_message(self, mock_get):
+        """Test the fail-fast message for news"""
+        mock_get.side_effect = requests.exceptions.Timeout("read timed out")
+        transport = HTTPTransport(resilience=_resilience(attempts=1, min_calls=1))
+        agent = SimpleAIAgent(transport=transport)
+
+        assert "News service error" in agent.get_news("rust")
+        assert agent.get_news("python") == "News service is currently unavailable"
@@ -0,0 +1,141 @@
+"""Tests for whole-answer memoization in respond()"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from async_agent import AsyncSimpleAIAgent
+from cache import MISSING, ResponseCache
+from main import RESPONSE_TTLS
+from quota import QuotaManager
+
+WEATHER = {"main": {"temp": 21.5, "humidity": 40}, "weather": [{"id": 800, "description": "clear sky"}]}
+
+
+class TestResponseCache:
+    """Test keys, per-intent TTLs and eviction"""
+
+    def test_key_is_normalized(self):
+        """Test that case and whitespace variants share one key, and only they do"""
+        key = ResponseCache.key("What's the weather  in Paris ")
+        assert key == ResponseCache.key("what's the WEATHER in paris")
+        assert key != ResponseCache.key("what's the weather in rome")
+        assert len(key) == len(ResponseCache.key("x" * 65536)) == 16
+
+    def test_per_intent_ttls(self, clock):
+        """Test that each intent's TTL applies and unlisted or zero TTLs are skipped"""
+        cache = ResponseCache({"math": float("inf"), "weather": 60, "time": 0}, clock=clock)
+        assert cache.set(1, "math", "4")
+        assert cache.set(2, "weather", "sunny")
+        assert not cache.set(3, "time", "noon")
+        assert not cache.set(4, "custom", "x")
+        clock.now += 61
+        assert cache.get(1) == "4"
+        assert cache.get(2) is MISSING
+        assert cache.get(3) is MISSING
+        assert cache.stats()["hits"] == 1
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Test the size bound"""
+        cache = ResponseCache({"math": 10}, maxsize=2)
+        for key in (1, 2, 3):
+            cache.set(key, "math", str(key))
+        cache.set(2, "math", "two")  # rewriting moves it to the back
+        cache.set(4, "math", "4")
+        assert [cache.get(key) for key in (1, 2, 3, 4)] == [MISSING, "two", MISSING, "4"]
+        assert cache.stats()["evictions"] == 2 and len(cache) == 2
+
+    def test_hits_keep_entries(self):
+        """Test that reading an entry protects it from the next eviction"""
+        cache = ResponseCache({"math": 10}, maxsize=2)
+        cache.set("a", "math", "1")
+        cache.set("b", "math", "2")
+        assert cache.get("a") == "1"
+        cache.set("c", "math", "3")
+        assert [cache.get(key) for key in "abc"] == ["1", MISSING, "3"]
+
+
+@pytest.fixture
+def agent(offline_agent, response, clock):
+    agent = offline_agent(response_cache=ResponseCache(RESPONSE_TTLS, clock=clock))
+    agent.transport.get.return_value = response(200, WEATHER)
+    agent.clock = clock
+    return agent
+
+
+class TestRespondMemoization:
+    """Test respond() in front of the pipeline"""
+
+    def test_repeated_prompt_skips_the_pipeline(self, agent):
+        """Test that a hit does not run intent detection or the action again"""
+        first = agent.respond("2 + 3")
+        assert first.endswith("5")
+        agent.process_input = Mock(side_effect=AssertionError("pipeline ran"))
+        assert agent.respond("  2   + 3 ") == first
+        agent.clock.now += 10 ** 9
+        assert agent.respond("2 + 3") == first
+        # Hits are counted like the answers they repeat
+        assert agent.metrics.snapshot()["outcomes"]["math"] == {"success": 3}
+
+    def test_upstream_answers_expire(self, agent):
+        """Test that weather answers are reused only for the weather TTL"""
+        answer = agent.respond("weather in Paris")
+        agent.weather_cache.clear()
+        assert agent.respond("weather in paris") == answer
+        assert agent.transport.get.call_count == 1
+        agent.clock.now += RESPONSE_TTLS["weather"] + 1
+        agent.respond("weather in Paris")
+        assert agent.transport.get.call_count == 2
+
+    def test_hits_count_as_upstream_cache_reads(self, agent):
+        """Test that memoized answers keep their location hot for the refresh scheduler"""
+        agent.respond("weather in Oslo")
+        for _ in range(3):
+            agent.respond("weather in Paris")
+        assert agent.transport.get.call_count == 2
+        assert agent.weather_cache.hot_keys(1, due_within=10 ** 9) == ["paris"]
+
+    def test_time_and_errors_are_not_cached(self, agent, response):
+        """Test that time answers and upstream failures are recomputed"""
+        agent.respond("what time is it")
+        agent.respond("what time is it")
+        agent.transport.get.return_value = response(500, {"message": "boom"})
+        failed = agent.respond("weather in Oslo")
+        agent.transport.get.return_value = response(200, WEATHER)
+        assert agent.respond("weather in Oslo") != failed
+        assert len(agent.response_cache) == 1
+        assert agent.metrics.snapshot()["outcomes"]["time"] == {"success": 2}
+
+    def test_invalid_input_is_cached(self, agent):
+        """Test that answers fixed by the prompt alone, like a malformed expression, are reused"""
+        answer = agent.respond("calculate abc + def")
+        assert answer == "Sorry, I can only do basic math operations"
+        assert agent.response_cache.stats()["size"] == 1
+        agent.respond("Calculate abc + def")
+        assert agent.response_cache.stats()["hits"] == 1
+
+    def test_registered_intents_answer_prompts_asked_before(self, agent):
+        """Test that unknown answers are not kept and registering an intent drops memoized ones"""
+        assert agent.respond("tell me a joke").startswith("I'm not sure how to help")
+        assert len(agent.response_cache) == 0
+        agent.respond("hello")
+        agent.register_intent("joke", ["joke"], handler=lambda data: "Why did the cache miss?")
+        assert len(agent.response_cache) == 0
+        assert agent.respond("tell me a joke") == "Why did the cache miss?"
+        agent.register_intent("wave", ["hello"], handler=lambda data: "*waves*", before="greeting")
+        assert agent.respond("hello") == "*waves*"
+
+    def test_async_agent(self, response):
+        """Test that respond_async shares the response cache"""
+        async def run():
+            transport = AsyncMock()
+            transport.get.return_value = response(200, WEATHER)
+            async with AsyncSimpleAIAgent(async_transport=transport, verbose=False,
+                                          quota=QuotaManager(limits={})) as agent:
+                first = await agent.respond_async("weather in Paris")
+                agent.weather_cache.clear()
+                second = await agent.respond_async("Weather in Paris")
+                return first, second, transport.get.call_count, agent.respond("weather in paris")
+
+        first, second, calls, sync = asyncio.run(run())
+        assert first == second == sync and calls == 1
@@ -0,0 +1,129 @@
+"""Tests for the HTTP service mode"""
+import socket
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from main import SimpleAIAgent, main
+from server import AgentServer
+from stub_server import StubUpstream
+
+
+@pytest.fixture
+def upstream():
+    with StubUpstream() as server:
+        yield server
+
+
+def _start(agent, **kwargs):
+    server = AgentServer(agent, ("127.0.0.1", 0), **kwargs)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server
+
+
+def _stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+class TestAgentServer:
+    """Test the endpoints and load shedding"""
+
+    def test_respond_returns_intent_and_answer(self, upstream):
+        """Test a weather prompt end to end through the stub upstream"""
+        agent = SimpleAIAgent(verbose=False, weather_base_url=upstream.base_url)
+        server = _start(agent, workers=2)
+        try:
+            reply = requests.post(f"{server.url}/respond", json={"prompt": "weather in Paris"})
+            assert reply.status_code == 200
+            assert reply.json()["intent"] == "weather"
+            assert reply.json()["response"].startswith("Weather in Paris: ")
+            assert requests.post(f"{server.url}/respond", json={"prompt": "5 + 3"}).json() == {
+                "intent": "math", "response": "Result: 8"}
+            # Repeats are answered from the response cache, intent included
+            assert requests.post(f"{server.url}/respond", json={"prompt": "5  + 3"}).json() == {
+                "intent": "math", "response": "Result: 8"}
+            assert agent.response_cache.stats()["hits"] == 1
+        finally:
+            _stop(server)
+            agent.close()
+
+    def test_health_metrics_and_bad_requests(self):
+        """Test /healthz, /metrics and the 4xx answers"""
+        agent = SimpleAIAgent(verbose=False)
+        server = _start(agent, workers=1, queue_size=4)
+        try:
+            health = requests.get(f"{server.url}/healthz").json()
+            assert health == {"status": "ok", "workers": 1, "queued": 0, "queue_size": 4, "shed": 0}
+            assert requests.post(f"{server.url}/respond", data=b"{nope").status_code == 400
+            assert requests.post(f"{server.url}/respond", json={"text": "hi"}).status_code == 400
+            assert requests.get(f"{server.url}/nowhere").status_code == 404
+            metrics = requests.get(f"{server.url}/metrics").text
+            assert 'agent_stage_seconds_count{stage="queue"}' in metrics
+        finally:
+            _stop(server)
+
+    def test_full_queue_sheds_with_503(self):
+        """Test that requests beyond workers + queue are refused at once"""
+        agent = SimpleAIAgent(verbose=False)
+        entered, release = threading.Event(), threading.Event()
+
+        def slow(data):
+            entered.set()
+            release.wait()
+            return "done"
+
+        agent.register_intent("slow", ["slow"], handler=slow)
+        server = _start(agent, workers=1, queue_size=1)
+        replies = []
+
+        def post():
+            replies.append(requests.post(f"{server.url}/respond", json={"prompt": "slow please"}))
+
+        try:
+            busy = threading.Thread(target=post)
+            busy.start()
+            assert entered.wait(2)
+            queued = threading.Thread(target=post)
+            queued.start()
+            deadline = time.monotonic() + 2
+            while server.health()["queued"] < 1:
+                assert time.monotonic() < deadline
+                time.sleep(0.005)
+
+            start = time.perf_counter()
+            shed = requests.post(f"{server.url}/respond", json={"prompt": "slow please"})
+            assert shed.status_code == 503
+            assert shed.headers["Retry-After"] == "1"
+            assert time.perf_counter() - start < 1
+            assert server.health()["shed"] == 1
+
+            # Clients that send nothing are shed without stalling the accept loop
+            silent = [socket.create_connection(server.server_address) for _ in range(10)]
+            start = time.perf_counter()
+            assert requests.post(f"{server.url}/respond", json={"prompt": "hi"}).status_code == 503
+            assert time.perf_counter() - start < 0.5
+            for client in silent:
+                client.settimeout(2)
+                assert client.recv(64).startswith(b"HTTP/1.0 503")
+                client.close()
+            assert server.health()["shed"] == 12
+
+            release.set()
+            busy.join()
+            queued.join()
+            assert [reply.json()["response"] for reply in replies] == ["done", "done"]
+        finally:
+            release.set()
+            _stop(server)
+
+    @pytest.mark.parametrize("argv, scheduled", [([], True), (["--refresh-interval", "0"], False)])
+    def test_serve_starts_background_refresh(self, argv, scheduled):
+        """Test that --serve keeps hot answers fresh unless the refresh is turned off"""
+        agents = []
+        with patch("server.serve", side_effect=lambda agent, *args: agents.append(agent)):
+            main(["--serve", *argv])
+        assert (agents[0].refresher._scheduler is not None) == scheduled
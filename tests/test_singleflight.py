@@ -0,0 +1,147 @@
+"""Unit tests for single-flight request coalescing"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import pytest
+
+from main import SimpleAIAgent
+from singleflight import SingleFlight
+
+
+class TestSingleFlightThreads:
+    """Test coalescing for threaded callers"""
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test that only the leader runs fn while others wait"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return "sunny"
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            futures = [pool.submit(flight.do, "houston", fetch) for _ in range(10)]
+            while flight.stats()["saved"] < 9:
+                time.sleep(0.001)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert results == ["sunny"] * 10
+        assert len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "saved": 9}
+
+    def test_errors_are_shared(self):
+        """Test that followers see the leader's exception"""
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fetch():
+            release.wait(5)
+            raise ConnectionError("upstream down")
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(flight.do, "key", fetch) for _ in range(3)]
+            while flight.stats()["saved"] < 2:
+                time.sleep(0.001)
+            release.set()
+            for future in futures:
+                with pytest.raises(ConnectionError):
+                    future.result()
+
+    def test_sequential_calls_are_not_coalesced(self):
+        """Test that a finished call does not serve later callers"""
+        flight = SingleFlight()
+        fetch = Mock(return_value=1)
+        flight.do("key", fetch)
+        flight.do("key", fetch)
+        assert fetch.call_count == 2
+        assert flight.saved == 0
+
+
+class TestSingleFlightAsync:
+    """Test coalescing for asyncio callers"""
+
+    def test_concurrent_tasks_share_one_call(self):
+        """Test that gathered coroutines await a single fetch"""
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "rain"
+
+        async def run():
+            return await asyncio.gather(*(flight.do_async("key", fetch) for _ in range(20)))
+
+        assert asyncio.run(run()) == ["rain"] * 20
+        assert len(calls) == 1
+        assert flight.saved == 19
+
+    def test_cancelled_caller_does_not_cancel_fetch(self):
+        """Test that the shared fetch survives one caller being cancelled"""
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return "fog"
+
+        async def run():
+            first = asyncio.ensure_future(flight.do_async("key", fetch))
+            second = asyncio.ensure_future(flight.do_async("key", fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == "fog"
+
+
+class TestAgentCoalescing:
+    """Test coalescing in get_weather and get_news"""
+
+    @patch('requests.Session.get')
+    def test_storm_of_weather_requests(self, mock_get):
+        """Test that simultaneous lookups for one city issue one request"""
+        def slow_response(*args, **kwargs):
+            time.sleep(0.05)
+            response = Mock()
+            response.status_code = 200
+            response.content = json.dumps({
+                'main': {'temp': 31.0},
+                'weather': [{'description': 'thunderstorm'}]
+            }).encode()
+            return response
+
+        mock_get.side_effect = slow_response
+        agent = SimpleAIAgent()
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            results = list(pool.map(agent.get_weather, ["Houston"] * 20))
+
+        assert set(results) == {"Weather in Houston: 31.0°C, thunderstorm"}
+        assert mock_get.call_count == 1
+        assert agent.singleflight.saved == 19
+
+    @patch('requests.Session.get')
+    def test_trending_news_topic(self, mock_get):
+        """Test that simultaneous news lookups for one topic issue one request"""
+        def slow_response(*args, **kwargs):
+            time.sleep(0.05)
+            response = Mock()
+            response.status_code = 200
+            response.content = json.dumps({'articles': [{'title': 'Storm update'}]}).encode()
+            return response
+
+        mock_get.side_effect = slow_response
+        agent = SimpleAIAgent()
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(agent.get_news, ["hurricane"] * 10))
+
+        assert set(results) == {"Latest news about hurricane:\n• Storm update"}
+        assert mock_get.call_count == 1
@@ -0,0 +1,18 @@
+"""Startup budget: importing main and answering offline prompts stays cheap"""
+from benchmarks.bench_startup import measure
+
+# Importing requests alone used to take longer than this
+STARTUP_BUDGET_MS = 120
+
+
+class TestStartup:
+    """Test cold starts in fresh interpreters"""
+
+    def test_offline_prompts_load_no_heavy_modules(self):
+        """Test that the HTTP stack, asyncio and JSON backends stay unloaded"""
+        assert measure(runs=1)["heavy_modules"] == []
+
+    def test_time_to_first_response_budget(self):
+        """Test the median time from import to answering offline prompts"""
+        summary = measure(runs=3)
+        assert summary["all_offline_ms"] < STARTUP_BUDGET_MS, summary
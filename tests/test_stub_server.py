@@ -0,0 +1,119 @@
+"""Offline integration tests against the local stub upstream"""
+import pytest
+import requests
+
+from main import SimpleAIAgent
+from resilience import Resilience, RetryPolicy
+from stub_server import Behavior, StubUpstream, fixed, parse_latency
+from transport import HTTPTransport
+
+
+@pytest.fixture
+def upstream():
+    with StubUpstream(seed=1) as server:
+        yield server
+
+
+def _agent(server, **kwargs):
+    transport = HTTPTransport(resilience=Resilience(
+        retry=RetryPolicy(attempts=1), sleep=lambda seconds: None))
+    return SimpleAIAgent(transport=transport, verbose=False, weather_base_url=server.base_url,
+                         news_base_url=server.base_url, **kwargs)
+
+
+class TestStubUpstream:
+    """Test the fake endpoints directly"""
+
+    def test_weather_shape_is_stable_per_city(self, upstream):
+        """Test that a city always gets the same parseable report"""
+        url = f"{upstream.base_url}/data/2.5/weather?q=Paris&units=metric"
+        first, second = requests.get(url).json(), requests.get(url).json()
+        assert first == second
+        assert isinstance(first["main"]["temp"], float)
+        assert first["weather"][0]["description"]
+
+    def test_unknown_city_is_404(self, upstream):
+        """Test OpenWeather's not-found answer"""
+        response = requests.get(f"{upstream.base_url}/data/2.5/weather?q=Atlantis")
+        assert response.status_code == 404
+        assert response.json()["message"] == "city not found"
+
+    def test_forecast_shape(self, upstream):
+        """Test the 5-day/3-hour forecast answer"""
+        data = requests.get(f"{upstream.base_url}/data/2.5/forecast?q=Paris&units=metric").json()
+        times = [slot["dt"] for slot in data["list"]]
+        assert len(times) == 40 and times[0] % 10800 == 0
+        assert all(b - a == 10800 for a, b in zip(times, times[1:]))
+        assert all(s["main"]["temp_min"] <= s["main"]["temp_max"] for s in data["list"])
+        assert "timezone" in data["city"]
+
+    def test_large_payloads(self):
+        """Test that article count and padding scale the news answer"""
+        with StubUpstream(behaviors={"news": Behavior(articles=100, padding=1000)}) as server:
+            response = requests.get(f"{server.base_url}/v2/everything?q=python")
+        assert len(response.json()["articles"]) == 100
+        assert len(response.content) > 100_000
+
+    def test_page_size(self):
+        """Test that pageSize caps the articles returned"""
+        with StubUpstream(behaviors={"news": Behavior(articles=100)}) as server:
+            response = requests.get(f"{server.base_url}/v2/everything?q=python&pageSize=5")
+        assert len(response.json()["articles"]) == 5
+
+    def test_latency_specs(self):
+        """Test the CLI latency syntax"""
+        assert parse_latency("fixed:20")(None) == 0.02
+        with pytest.raises(ValueError):
+            parse_latency("gaussian:1")
+
+
+class TestAgentAgainstStub:
+    """Test the agent end to end without network access"""
+
+    def test_weather_and_news(self, upstream):
+        """Test that both intents parse the stub's answers"""
+        agent = _agent(upstream)
+        assert agent.respond("weather in Paris").startswith("Weather in Paris: ")
+        assert "Python story 1" in agent.respond("news about python")
+        assert "Sorry, I couldn't get weather data" in agent.respond("weather in Atlantis")
+        assert upstream.stats() == {"weather": {200: 1, 404: 1}, "news": {200: 1}}
+        # The 404 is negatively cached
+        assert "Sorry, I couldn't get weather data" in agent.get_weather("Atlantis")
+        assert upstream.stats()["weather"] == {200: 1, 404: 1}
+        agent.close()
+
+    def test_lean_news(self):
+        """Test that lean mode asks for five articles and shows the same titles"""
+        with StubUpstream(behaviors={"news": Behavior(articles=100, padding=1000)}) as server:
+            agent = _agent(server, lean_news=True)
+            assert "&pageSize=5" in agent._news_url("python")
+            answer = agent.respond("news about python")
+            assert "Python story 5" in answer and "Python story 6" not in answer
+            assert "General story 1" in agent.get_news("general")
+            agent.close()
+
+    def test_injected_errors(self):
+        """Test that 500s and 429s surface as the agent's error answers"""
+        behaviors = {"weather": Behavior(error_rate=1.0), "news": Behavior(rate_limit_rate=1.0)}
+        with StubUpstream(behaviors=behaviors) as server:
+            agent = _agent(server)
+            assert "Sorry, I couldn't get weather data" in agent.get_weather("Paris")
+            assert "too many requests" in agent.get_news("python")
+            assert server.stats() == {"weather": {500: 1}, "news": {429: 1}}
+            agent.close()
+
+    def test_latency_is_injected(self):
+        """Test that the endpoint waits for its latency distribution"""
+        with StubUpstream(behaviors={"weather": Behavior(latency=fixed(50))}) as server:
+            response = requests.get(f"{server.base_url}/data/2.5/weather?q=Paris")
+        assert response.elapsed.total_seconds() >= 0.05
+
+    def test_base_urls_from_environment(self, monkeypatch, upstream):
+        """Test OPENWEATHER_BASE_URL / NEWS_BASE_URL"""
+        monkeypatch.setenv("OPENWEATHER_BASE_URL", upstream.base_url + "/")
+        monkeypatch.setenv("NEWS_BASE_URL", upstream.base_url)
+        agent = SimpleAIAgent(verbose=False)
+        assert agent._weather_url("Paris").startswith(upstream.base_url + "/data/2.5/weather?q=Paris")
+        assert agent._news_url("general").startswith(upstream.base_url + "/v2/top-headlines?")
+        assert "°C" in agent.get_weather("Paris")
+        agent.close()
@@ -0,0 +1,78 @@
+"""Unit tests for the pooled HTTP transport"""
+from unittest.mock import patch
+
+
+from main import SimpleAIAgent
+from transport import HTTPTransport
+
+
+class TestHTTPTransport:
+    """Test session pooling"""
+
+    def test_same_host_shares_session(self):
+        """Test that URLs on one host reuse a single session"""
+        transport = HTTPTransport()
+        first = transport.session_for("http://api.openweathermap.org/data/2.5/weather?q=Paris")
+        second = transport.session_for("http://api.openweathermap.org/data/2.5/weather?q=Rome")
+        assert first is second
+        transport.close()
+
+    def test_hosts_get_separate_sessions(self):
+        """Test one session per upstream host"""
+        transport = HTTPTransport()
+        weather = transport.session_for("http://api.openweathermap.org/data/2.5/weather")
+        news = transport.session_for("https://newsapi.org/v2/everything")
+        assert weather is not news
+        assert set(transport.hosts()) == {
+            ("http", "api.openweathermap.org"),
+            ("https", "newsapi.org"),
+        }
+        transport.close()
+
+    def test_pool_size_is_applied(self):
+        """Test that the configured pool size reaches the adapter"""
+        transport = HTTPTransport(pool_maxsize=32)
+        session = transport.session_for("https://newsapi.org/v2/top-headlines")
+        assert session.get_adapter("https://newsapi.org")._pool_maxsize == 32
+        transport.close()
+
+    def test_keep_alive_disabled_sends_connection_close(self):
+        """Test that keep_alive=False asks the server to close"""
+        transport = HTTPTransport(keep_alive=False)
+        session = transport.session_for("http://example.com/")
+        assert session.headers["Connection"] == "close"
+        transport.close()
+
+    def test_connections_are_reused(self, local_server):
+        """Test that repeated requests ride one TCP connection"""
+        base_url, connections = local_server
+        with HTTPTransport() as transport:
+            for _ in range(5):
+                assert transport.get(f"{base_url}/data").status_code == 200
+        assert len(connections) == 1
+
+    def test_close_drops_sessions(self):
+        """Test that close empties the pool"""
+        transport = HTTPTransport()
+        session = transport.session_for("http://example.com/")
+        with patch.object(session, "close") as mock_close:
+            transport.close()
+        mock_close.assert_called_once()
+        assert transport.hosts() == []
+
+
+class TestAgentTransportLifecycle:
+    """Test the agent's ownership of its transport"""
+
+    def test_agent_accepts_custom_transport(self):
+        """Test injecting a preconfigured transport"""
+        transport = HTTPTransport(pool_maxsize=2)
+        agent = SimpleAIAgent(transport=transport)
+        assert agent.transport is transport
+
+    def test_context_manager_closes_transport(self):
+        """Test that leaving the with block closes pooled sessions"""
+        with patch.object(HTTPTransport, "close") as mock_close:
+            with SimpleAIAgent() as agent:
+                assert isinstance(agent, SimpleAIAgent)
+        mock_close.assert_called_once()
@@ -0,0 +1,62 @@
+"""Tests for multi-city weather lookups through the group endpoint"""
+import pytest
+
+from gazetteer import default_gazetteer
+from main import SimpleAIAgent
+from quota import QuotaManager
+from resilience import Resilience, RetryPolicy
+from stub_server import Behavior, StubUpstream
+from transport import HTTPTransport
+
+
+def _agent(server):
+    transport = HTTPTransport(resilience=Resilience(retry=RetryPolicy(attempts=1)))
+    return SimpleAIAgent(verbose=False, transport=transport, quota=QuotaManager(limits={}),
+                         weather_base_url=server.base_url)
+
+
+@pytest.fixture
+def cities():
+    return [place.name for place in default_gazetteer().places if place.kind == "city"][:45]
+
+
+class TestGetWeatherMany:
+    """Test chunking, cache filling and fallbacks"""
+
+    def test_cities_are_fetched_in_groups_of_twenty(self, cities):
+        """Test that 45 cities cost three requests and fill the cache"""
+        with StubUpstream() as server:
+            agent = _agent(server)
+            answers = agent.get_weather_many(cities)
+            assert server.stats() == {"weather_group": {200: 3}}
+            assert [answer.split(":")[0] for answer in answers] == [f"Weather in {city}" for city in cities]
+            assert all("°C, " in answer for answer in answers)
+
+            assert agent.get_weather_many(cities) == answers
+            assert agent.get_weather(cities[0]) == answers[0]
+            assert server.stats() == {"weather_group": {200: 3}}
+            agent.close()
+
+    def test_answers_match_get_weather(self, cities):
+        """Test cached, unknown and non-city names keep get_weather's format"""
+        with StubUpstream(not_found=("xyzzyville",)) as server:
+            agent = _agent(server)
+            agent.get_weather("Paris")
+            answers = agent.get_weather_many(["Paris", "paris", cities[0], "Xyzzyville", "Japan"])
+            assert answers[0] == agent.get_weather("Paris")
+            assert answers[1].startswith("Weather in paris: ")
+            assert answers[3] == "Sorry, I couldn't get weather data for Xyzzyville"
+            assert answers[4].startswith("Weather in Japan: ")
+            # Paris was cached; Xyzzyville and the country Japan have no city ID
+            # and fell back to their own requests
+            assert server.stats() == {"weather": {200: 2, 404: 1}, "weather_group": {200: 1}}
+            agent.close()
+
+    def test_failed_group_falls_back_to_single_fetches(self, cities):
+        """Test that a failing group endpoint still answers every city"""
+        with StubUpstream(behaviors={"weather_group": Behavior(error_rate=1.0)}) as server:
+            agent = _agent(server)
+            answers = agent.get_weather_many(cities[:5])
+            assert all(answer.startswith(f"Weather in {city}: ") for city, answer in zip(cities, answers))
+            assert server.stats() == {"weather_group": {500: 1}, "weather": {200: 5}}
+            agent.close()
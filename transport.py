@@ -0,0 +1,174 @@
+"""Pooled HTTP transport shared by the agent's upstream calls"""
+import json
+import threading
+from urllib.parse import urlsplit
+
+from resilience import Resilience
+
+
+class HTTPTransport:
+    """Keeps one keep-alive requests.Session per upstream host
+
+    Every GET runs under the resilience layer: per-host timeouts, jittered
+    retries for connection failures and 5xx answers, and a circuit breaker.
+    """
+
+    def __init__(self, pool_maxsize=10, pool_block=False, keep_alive=True, resilience=None):
+        # pool_maxsize is the number of connections kept open per host;
+        # with pool_block=True callers wait for a free one instead of
+        # opening (and then discarding) an extra connection
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.resilience = resilience or Resilience()
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def retry_on(self):
+        """Failures worth retrying and counting against an upstream's breaker"""
+        import requests
+
+        return (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+    def session_for(self, url):
+        """Return the pooled session for the scheme and host of url"""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._new_session()
+                    self._sessions[key] = session
+        return session
+
+    def _new_session(self):
+        """Build a session with a sized connection pool"""
+        # requests (with urllib3, charset detection and certifi) costs more
+        # to import than the rest of the agent, so wait for the first GET
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def get(self, url, **kwargs):
+        """Issue a GET through the session for url's host"""
+        session = self.session_for(url)
+        return self.resilience.call(
+            urlsplit(url).netloc,
+            lambda timeout: session.get(url, timeout=timeout, **kwargs),
+            self.retry_on,
+        )
+
+    def hosts(self):
+        """List the (scheme, host) pairs that currently have a session"""
+        return list(self._sessions)
+
+    def close(self):
+        """Close every pooled session and drop its connections"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class BufferedResponse:
+    """Fully read response exposing the parts of requests' API the agent uses"""
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    def close(self):
+        """Nothing to release; the body is already read"""
+
+    def json(self):
+        """Decode the body as JSON"""
+        return json.loads(self.content)
+
+
+class AsyncHTTPTransport:
+    """Keeps one aiohttp.ClientSession per upstream host for asyncio callers"""
+
+    def __init__(self, pool_maxsize=100, keep_alive=True, resilience=None):
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.resilience = resilience or Resilience()
+        self._sessions = {}
+
+    def session_for(self, url):
+        """Return the pooled session for the scheme and host of url"""
+        # Runs without awaiting, so the check-then-set is atomic on the loop
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._new_session()
+            self._sessions[key] = session
+        return session
+
+    def _new_session(self):
+        """Build a session whose connector caps open connections"""
+        # aiohttp is only needed by the asyncio agent, so import it lazily
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_maxsize,
+            force_close=not self.keep_alive,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    async def get(self, url, verify=True, **kwargs):
+        """Issue a GET and return the fully read response"""
+        import asyncio
+
+        import aiohttp
+
+        session = self.session_for(url)
+        if not verify:
+            kwargs["ssl"] = False
+
+        async def send(timeout):
+            connect, read = timeout
+            client_timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+            async with session.get(url, timeout=client_timeout, **kwargs) as response:
+                return BufferedResponse(response.status, await response.read())
+
+        return await self.resilience.call_async(
+            urlsplit(url).netloc, send, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+    def hosts(self):
+        """List the (scheme, host) pairs that currently have a session"""
+        return list(self._sessions)
+
+    async def close(self):
+        """Close every pooled session"""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            await session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()